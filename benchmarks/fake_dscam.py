@@ -0,0 +1,595 @@
+"""Scripted stand-in for the DsCam SDK, so that PyNikonSciCam can be benchmarked without a camera or Windows.
+
+The stand-in implements the CAM_* entry points used by the package on plain Python objects, simulating a number of
+Fi3 cameras with a feature set, feature descriptions, soft triggering, events and frames whose brightness follows the
+exposure time and gain.
+
+Importing this module makes ctypes.WinDLL return a dispatch table whose entry points are forwarded to the stand-in
+selected with install(), so it must be imported before PyNikonSciCam.
+"""
+import collections
+import ctypes
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+class _SdkFunction:
+    """Callable standing in for a ctypes function pointer, accepting argtypes and restype."""
+    __slots__ = ("name", "func", "argtypes", "restype")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.func = None
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args):
+        if self.func is None:
+            raise RuntimeError(f"No stand-in installed for {self.name}, call fake_dscam.install() first.")
+        return self.func(*args)
+
+
+class _DllShim:
+    """Object returned by ctypes.WinDLL, forwarding each CAM_* entry point to the installed stand-in."""
+    def __init__(self) -> None:
+        self._functions: dict[str, _SdkFunction] = {}
+        self.sdk: "FakeDsCam | None" = None
+
+    def __getattr__(self, name: str) -> _SdkFunction:
+        if not name.startswith("CAM_"):
+            raise AttributeError(name)
+        if name not in self._functions:
+            function = _SdkFunction(name)
+            if self.sdk is not None:
+                function.func = self.sdk.entry_point(name)
+            self._functions[name] = function
+        return self._functions[name]
+
+    def bind(self, sdk: "FakeDsCam") -> None:
+        self.sdk = sdk
+        for name, function in self._functions.items():
+            function.func = sdk.entry_point(name)
+
+
+_shim = _DllShim()
+ctypes.WinDLL = lambda path, *args, **kwargs: _shim
+
+from pynikonscicam import structures as s  # noqa: E402
+from pynikonscicam import constants as c  # noqa: E402
+from pynikonscicam import decoding  # noqa: E402
+from pynikonscicam.error_codes import ErrorCodes  # noqa: E402
+
+Fid = c.ECamFeatureId
+Vt = c.ECamVariantRunType
+
+# Supported formats of the stand-in: (colour, mode) -> (width, height, bits per pixel)
+FORMATS: dict[tuple[int, int], tuple[int, int, int]] = {}
+for _colour, _bpp in ((c.ECamFormatColor.ecfcRgb24, 24), (c.ECamFormatColor.ecfcYuv444, 24),
+                      (c.ECamFormatColor.ecfcMono16, 16), (c.ECamFormatColor.ecfcRgb48, 48),
+                      (c.ECamFormatColor.ecfcY16, 16), (c.ECamFormatColor.ecfcRaw16, 16)):
+    FORMATS[(_colour, c.ECamFormatSize.ecfsH2880x2048)] = (2880, 2048, _bpp)
+    FORMATS[(_colour, c.ECamFormatSize.ecfsH1440x1024)] = (1440, 1024, _bpp)
+
+# Range features: id -> (min, max, resolution, default)
+RANGES: dict[int, tuple[int, int, int, int]] = {
+    Fid.ExposureTime: (100, 60_000_000, 1, 10_000),
+    Fid.Gain: (100, 6400, 1, 100),
+    Fid.ExposureBias: (-6, 6, 1, 0),
+    Fid.ExposureTimeLimit: (100, 60_000_000, 1, 60_000_000),
+    Fid.GainLimit: (100, 6400, 1, 6400),
+    Fid.Brightness: (-100, 100, 1, 0),
+    Fid.Sharpness: (0, 10, 1, 0),
+    Fid.Hue: (-100, 100, 1, 0),
+    Fid.Saturation: (-100, 100, 1, 0),
+    Fid.WhiteBalanceRed: (0, 799, 1, 100),
+    Fid.WhiteBalanceBlue: (0, 799, 1, 100),
+    Fid.WhiteBalanceGreen: (0, 799, 1, 100),
+    Fid.CisPower: (0, 1, 1, 1),
+}
+
+# Element list features: id -> (allowed values, default)
+ELEMENTS: dict[int, tuple[tuple[int, ...], int]] = {
+    Fid.ExposureMode: (tuple(c.ECamExposureMode), c.ECamExposureMode.ContinuousAE),
+    Fid.MeteringMode: (tuple(c.ECamMeteringMode), c.ECamMeteringMode.Average),
+    Fid.CaptureMode: ((0, 1), 0),
+    Fid.Tone: (tuple(t for t in c.ECamTone if t != c.ECamTone.Unknown), c.ECamTone.Linear),
+    Fid.WhiteBalance: (tuple(c.ECamWhiteBalance), c.ECamWhiteBalance.wbManual),
+    Fid.Presets: (tuple(c.ECamPresetsId), c.ECamPresetsId.ecpiDefault),
+    Fid.TriggerMode: ((c.ECamTriggerMode.Off, c.ECamTriggerMode.Hard, c.ECamTriggerMode.Soft), c.ECamTriggerMode.Off),
+    Fid.ExposureOutput: (tuple(c.ECamSignalOutput), c.ECamSignalOutput.ecsoOff),
+    Fid.IrcfAdaptor: ((0, 1), 0),
+}
+
+DEFAULT_FORMAT = (c.ECamFormatColor.ecfcRgb24, c.ECamFormatSize.ecfsH2880x2048)
+
+
+def _deref(arg):
+    """Get the object behind a ctypes.byref() or ctypes.pointer() argument."""
+    if arg is None:
+        return None
+    if hasattr(arg, "_obj"):
+        return arg._obj
+    if hasattr(arg, "contents"):
+        return arg.contents
+    return arg
+
+
+def _set_variant(variant: s.CAM_Variant, var_type: int, value) -> None:
+    variant.eVarType = var_type
+    setattr(variant.Value, c.VarTypeAttrMap[var_type], value)
+
+
+class _Camera:
+    """State of one simulated camera."""
+    def __init__(self, sdk: "FakeDsCam", index: int) -> None:
+        self.sdk = sdk
+        self.index = index
+        self.is_open = False
+        self.transferring = False
+        self.frame_count = 0
+        self.lock = threading.Lock()
+        self.notice_callback = None
+        self.events: dict[int, collections.deque] = {t: collections.deque() for t in c.ECamEventType}
+        self.pending_frames: collections.deque = collections.deque()  # Ready times of triggered frames
+        self._rendered_key = None
+        self._rendered: np.ndarray | None = None
+
+        self.features: dict[int, s.CAM_FeatureValue] = {}
+        self.descriptions: dict[int, s.CAM_FeatureDesc] = {}
+        for feature_id, var_type in c.FeatureIDVarTypeMap.items():
+            if feature_id == Fid.Unknown:
+                continue
+            feature = s.CAM_FeatureValue()
+            feature.uiFeatureId = feature_id
+            description = s.CAM_FeatureDesc()
+            description.uiFeatureId = feature_id
+            if feature_id in RANGES:
+                minimum, maximum, resolution, default = RANGES[feature_id]
+                _set_variant(feature.stVariant, var_type, default)
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_Range
+                desc_range = description.FeatureDesc.stRange
+                for variant, value in ((desc_range.stMin, minimum), (desc_range.stMax, maximum),
+                                       (desc_range.stRes, resolution), (desc_range.stDef, default)):
+                    _set_variant(variant, var_type, value)
+            elif feature_id in ELEMENTS:
+                allowed, default = ELEMENTS[feature_id]
+                _set_variant(feature.stVariant, var_type, int(default))
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_ElementList
+                description.uiListCount = len(allowed)
+                for i, value in enumerate(allowed):
+                    element = description.FeatureDesc.stElementList[i]
+                    _set_variant(element.varValue, var_type, int(value))
+                    element.wszComment = getattr(value, "name", str(value))
+            elif feature_id == Fid.Format:
+                _set_variant(feature.stVariant, var_type, DEFAULT_FORMAT)
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_FormatList
+                description.uiListCount = len(FORMATS)
+                for i, ((colour, mode), (width, height, bpp)) in enumerate(FORMATS.items()):
+                    format_desc = description.FeatureDesc.stFormatList[i]
+                    format_desc.stFormat.eColor = colour
+                    format_desc.stFormat.eMode = mode
+                    format_desc.uiImageWidth = width
+                    format_desc.uiImageHeight = height
+                    format_desc.uiBitPerPixel = bpp
+            elif feature_id == Fid.MeteringArea:
+                _set_variant(feature.stVariant, var_type, (720, 512, 1440, 1024))
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_Area
+                desc_area = description.FeatureDesc.stArea
+                desc_area.stMin = s.CAM_Area(0, 0, 16, 16)
+                desc_area.stMax = s.CAM_Area(2864, 2032, 2880, 2048)
+                desc_area.stRes = s.CAM_Area(1, 1, 1, 1)
+                desc_area.stDef = s.CAM_Area(720, 512, 1440, 1024)
+            elif feature_id in (Fid.RoiPosition, Fid.MeteringAim):
+                _set_variant(feature.stVariant, var_type, (0, 0))
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_Position
+                desc_position = description.FeatureDesc.stPosition
+                desc_position.stMax = s.CAM_Position(2816, 1984)
+                desc_position.stRes = s.CAM_Position(2, 2)
+            elif feature_id == Fid.RoiSize:
+                _set_variant(feature.stVariant, var_type, (2880, 2048))
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_Size
+                desc_size = description.FeatureDesc.stSize
+                desc_size.stMin = s.CAM_Size(64, 64)
+                desc_size.stMax = desc_size.stDef = s.CAM_Size(2880, 2048)
+                desc_size.stRes = s.CAM_Size(8, 8)
+            elif feature_id == Fid.TriggerOption:
+                _set_variant(feature.stVariant, var_type, (1, 0))
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_TriggerOption
+                trigger_option = description.FeatureDesc.stTriggerOption
+                for variant, value in ((trigger_option.stRangeFrameCount.stMin, 1),
+                                       (trigger_option.stRangeFrameCount.stMax, 1000),
+                                       (trigger_option.stRangeFrameCount.stRes, 1),
+                                       (trigger_option.stRangeFrameCount.stDef, 1)):
+                    _set_variant(variant, c.ECamVariantRunType.evrt_uint32, value)
+                for variant, value in ((trigger_option.stRangeDelayTime.stMin, 0),
+                                       (trigger_option.stRangeDelayTime.stMax, 10_000_000),
+                                       (trigger_option.stRangeDelayTime.stRes, 1),
+                                       (trigger_option.stRangeDelayTime.stDef, 0)):
+                    _set_variant(variant, c.ECamVariantRunType.evrt_int32, value)
+            else:
+                feature.stVariant.eVarType = var_type
+                description.eFeatureDescType = c.ECamFeatureDescType.edesc_unknown
+            self.features[feature_id] = feature
+            self.descriptions[feature_id] = description
+
+    def value(self, feature_id: int):
+        feature = self.features[feature_id]
+        return getattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType])
+
+    @property
+    def geometry(self) -> tuple[int, int, int, int]:
+        """(colour, width, height, image bytes) of the current format."""
+        image_format = self.features[Fid.Format].stVariant.Value.stFormat
+        width, height, bpp = FORMATS[(image_format.eColor, image_format.eMode)]
+        return image_format.eColor, width, height, width * height * bpp // 8
+
+    def queue_event(self, event_type: int, ready_time: float, **fields) -> None:
+        event = s.CAM_Event()
+        event.eEventType = event_type
+        tick = self.sdk.tick(ready_time)
+        match event_type:
+            case c.ECamEventType.ecetImageReceived:
+                payload = event.stImageReceived
+            case c.ECamEventType.ecetFeatureChanged:
+                payload = event.stFeatureChanged
+            case c.ECamEventType.ecetTransError:
+                payload = event.stTransError
+            case c.ECamEventType.ecetBusReset:
+                payload = event.stBusReset
+            case _:
+                payload = event.stSignal
+                payload.eEventType = event_type
+        payload.uiTick = tick & 0xFFFFFFFF
+        payload.uiTick64 = tick
+        for name, value in fields.items():
+            setattr(payload, name, value)
+        with self.lock:
+            self.events[event_type].append((ready_time, event))
+
+    def render(self) -> np.ndarray:
+        """Get the raw image bytes for the current format, exposure and gain."""
+        colour, width, height, nbytes = self.geometry
+        exposure = self.value(Fid.ExposureTime)
+        gain = self.value(Fid.Gain)
+        key = (colour, width, height, exposure, gain)
+        if key != self._rendered_key:
+            # Smooth scene whose brightness is proportional to exposure * gain, 10 ms at unity gain is mid scale
+            scene = self.sdk.scene(height, width)
+            shape = decoding.image_shape(colour, height, width)
+            dtype = decoding.image_dtype(colour)
+            full_scale = np.iinfo(dtype).max
+            levels = np.clip(scene * (0.5 * (exposure / 10_000) * (gain / 100) * full_scale), 0, full_scale)
+            img = np.broadcast_to(levels.reshape(height, width, *([1] * (len(shape) - 2))), shape).astype(dtype)
+            self._rendered = np.frombuffer(img.tobytes(), dtype=np.uint8)
+            self._rendered_key = key
+        return self._rendered
+
+
+class FakeDsCam:
+    """Stand-in for the DsCam DLL object returned by ctypes.WinDLL.
+
+    Args:
+        device_count (int): Number of simulated cameras.
+        exposure_delay (bool): Delay the ImageReceived event of a soft trigger by the exposure time,
+            otherwise frames are available immediately so that only host side costs are measured.
+        tick_rate (float): Camera tick frequency in Hz, used for event and image time stamps.
+        tick_offset (int): Camera tick at host time.perf_counter() == 0.
+        tick_drift (float): Relative rate error of the camera clock, e.g. 50e-6 for 50 ppm.
+        one_push_time (float): Seconds one-push AE and white balance take to settle.
+    """
+    def __init__(self, device_count: int = 1, exposure_delay: bool = False, tick_rate: float = 1e6,
+                 tick_offset: int = 1_000_000, tick_drift: float = 0.0, one_push_time: float = 0.2) -> None:
+        self.exposure_delay = exposure_delay
+        self.tick_rate = tick_rate
+        self.tick_offset = tick_offset
+        self.tick_drift = tick_drift
+        self.one_push_time = one_push_time
+        # Feature values reached by one-push AE and white balance
+        self.ae_result: dict[int, int] = {Fid.ExposureTime: 8_000, Fid.Gain: 200}
+        self.wb_result: dict[int, int] = {Fid.WhiteBalanceRed: 120, Fid.WhiteBalanceBlue: 90}
+        self.call_counts: collections.Counter = collections.Counter()
+        self.devices_open = False
+
+        self._device_array = (s.CAM_Device * max(device_count, 1))()
+        for i in range(device_count):
+            device = self._device_array[i]
+            device.eCamDeviceType = c.ECamDeviceType.Fi3_Simulator
+            device.uiSerialNo = 1000 + i
+            device.wszCameraName = f"DS-Fi3 Simulator {i}"
+            device.wszFwVersion = "1.0.0"
+            device.wszFpgaVersion = "1.0.0"
+            device.wszUsbDcVersion = "1.0.0"
+            device.wszUsbVersion = "3.0"
+            device.wszDriverVersion = "1.0.0"
+        self.cameras = [_Camera(self, i) for i in range(device_count)]
+        self._scenes: dict[tuple[int, int], np.ndarray] = {}
+
+    def entry_point(self, name: str):
+        """Get the implementation of an SDK entry point, counting its calls."""
+        func = getattr(self, "_" + name, None)
+        if func is None:
+            def func(*args):
+                return ErrorCodes.ERR_NOTIMPL
+
+        def call(*args):
+            self.call_counts[name] += 1
+            return func(*args)
+        return call
+
+    def tick(self, host_time: float) -> int:
+        """Camera tick count at a host time.perf_counter() time."""
+        return int(self.tick_offset + host_time * self.tick_rate * (1.0 + self.tick_drift))
+
+    def scene(self, height: int, width: int) -> np.ndarray:
+        """Deterministic test scene in [0, 1]."""
+        if (height, width) not in self._scenes:
+            y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+            x = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+            self._scenes[(height, width)] = 0.25 + 0.75 * (0.5 * x + 0.5 * y)
+        return self._scenes[(height, width)]
+
+    def _camera(self, handle: int) -> _Camera | None:
+        index = int(handle) - 1
+        if 0 <= index < len(self.cameras) and self.cameras[index].is_open:
+            return self.cameras[index]
+        return None
+
+    # Scripting helpers, not part of the SDK
+
+    def inject_event(self, handle: int, event_type: c.ECamEventType, **fields) -> None:
+        """Queue an event, e.g. ecetTransError or ecetBusReset, on an open camera."""
+        self.cameras[int(handle) - 1].queue_event(event_type, time.perf_counter(), **fields)
+
+    def set_feature_externally(self, handle: int, feature_id: c.ECamFeatureId, value) -> None:
+        """Change a feature as the camera would itself, e.g. during auto-exposure, queueing ecetFeatureChanged."""
+        camera = self.cameras[int(handle) - 1]
+        feature = camera.features[feature_id]
+        _set_variant(feature.stVariant, feature.stVariant.eVarType, value)
+        camera.queue_event(c.ECamEventType.ecetFeatureChanged, time.perf_counter(),
+                           uiFeatureId=int(feature_id), stVariant=feature.stVariant)
+
+    def inject_notice(self, handle: int, notice_type: c.ECamNoticeType, **fields) -> None:
+        """Deliver a notice to the camera's notice callback, e.g. an ecnicTemperature ecntInfo notice."""
+        camera = self.cameras[int(handle) - 1]
+        notice = s.CAM_Notice()
+        notice.eNoticeType = notice_type
+        payload = {c.ECamNoticeType.ecntTransError: notice.stTransError,
+                   c.ECamNoticeType.ecntGroup: notice.stGroup,
+                   c.ECamNoticeType.ecntInfo: notice.stInfo}[notice_type]
+        tick = self.tick(time.perf_counter())
+        payload.uiTick = tick & 0xFFFFFFFF
+        payload.uiTick64 = tick
+        for name, value in fields.items():
+            setattr(payload, name, value)
+        if camera.notice_callback:
+            camera.notice_callback(handle, ctypes.pointer(notice), None)
+
+    # SDK entry points
+
+    def _CAM_OpenDevices(self, device_count, devices):
+        _deref(device_count).value = len(self.cameras)
+        _deref(devices).contents = self._device_array[0]
+        self.devices_open = True
+        return ErrorCodes.OK
+
+    def _CAM_CloseDevices(self):
+        self.devices_open = False
+        return ErrorCodes.OK
+
+    def _CAM_Open(self, device_index, camera_handle, err_msg_size, err_msg):
+        if not self.devices_open or not 0 <= device_index < len(self.cameras):
+            return ErrorCodes.ERR_INVALIDARG
+        camera = self.cameras[device_index]
+        camera.is_open = True
+        camera.transferring = False
+        _deref(camera_handle).value = device_index + 1
+        return ErrorCodes.OK
+
+    def _CAM_Close(self, camera_handle):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        camera.is_open = False
+        camera.transferring = False
+        return ErrorCodes.OK
+
+    def _CAM_GetAllFeatures(self, camera_handle, features):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        vector = _deref(features)
+        if vector.uiCapacity < len(camera.features):
+            return ErrorCodes.ERR_INVALIDARG
+        for i, feature in enumerate(camera.features.values()):
+            vector.pstFeatureValue[i] = feature
+        vector.uiCountUsed = len(camera.features)
+        return ErrorCodes.OK
+
+    def _CAM_GetFeatures(self, camera_handle, features):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        vector = _deref(features)
+        for i in range(vector.uiCountUsed):
+            feature_id = vector.pstFeatureValue[i].uiFeatureId
+            if feature_id not in camera.features:
+                return ErrorCodes.ERR_INVALIDARG
+            vector.pstFeatureValue[i] = camera.features[feature_id]
+        return ErrorCodes.OK
+
+    def _CAM_SetFeatures(self, camera_handle, features):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        vector = _deref(features)
+        new_values = []
+        for i in range(vector.uiCountUsed):
+            feature = vector.pstFeatureValue[i]
+            if feature.uiFeatureId not in camera.features:
+                return ErrorCodes.ERR_INVALIDARG
+            value = getattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType])
+            if feature.uiFeatureId in RANGES:
+                minimum, maximum, _, _ = RANGES[feature.uiFeatureId]
+                if not minimum <= value <= maximum:
+                    return ErrorCodes.ERR_INVALIDARG
+            elif feature.uiFeatureId in ELEMENTS and value not in ELEMENTS[feature.uiFeatureId][0]:
+                return ErrorCodes.ERR_INVALIDARG
+            elif feature.uiFeatureId == Fid.Format and (value.eColor, value.eMode) not in FORMATS:
+                return ErrorCodes.ERR_INVALIDARG
+            new_values.append(feature)
+        for feature in new_values:
+            ctypes.memmove(ctypes.addressof(camera.features[feature.uiFeatureId]), ctypes.addressof(feature),
+                           ctypes.sizeof(s.CAM_FeatureValue))
+        return ErrorCodes.OK
+
+    def _CAM_GetFeatureDesc(self, camera_handle, feature_id, feature_desc):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        if feature_id not in camera.descriptions:
+            return ErrorCodes.ERR_INVALIDARG
+        ctypes.memmove(ctypes.addressof(_deref(feature_desc)), ctypes.addressof(camera.descriptions[feature_id]),
+                       ctypes.sizeof(s.CAM_FeatureDesc))
+        return ErrorCodes.OK
+
+    def _CAM_GetImage(self, camera_handle, newest_required, image, remained):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        now = time.perf_counter()
+        with camera.lock:
+            ready = [t for t in camera.pending_frames if t <= now]
+            if not ready:
+                return ErrorCodes.ERR_FAIL
+            if newest_required:
+                for _ in ready:
+                    camera.pending_frames.popleft()
+            else:
+                camera.pending_frames.popleft()
+            camera.frame_count += 1
+            frame_no = camera.frame_count
+            _deref(remained).value = len(camera.pending_frames)
+
+        st_image = _deref(image)
+        colour, width, height, nbytes = camera.geometry
+        if st_image.uiDataBufferSize < nbytes + s.CAM_IMG_INFO_SIZE:
+            return ErrorCodes.ERR_INVALIDARG
+        data = camera.render()
+        ctypes.memmove(st_image.pDataBuffer, data.ctypes.data, nbytes)
+
+        info = s.CAM_ImageInfo()
+        info.usFrameNo = frame_no & 0xFFFF
+        info.uiExposureTime = camera.value(Fid.ExposureTime)
+        info.usGain = camera.value(Fid.Gain)
+        info.ucImageColor = colour
+        info.ucTriggerMode = camera.value(Fid.TriggerMode)
+        info.uiSerialNo = 1000 + camera.index
+        info.usImageWidth = width
+        info.usImageHeight = height
+        info.uiFrameSize = nbytes + s.CAM_IMG_INFO_SIZE
+        ctypes.memmove(ctypes.addressof(st_image.pDataBuffer.contents) + nbytes, ctypes.addressof(info),
+                       s.CAM_IMG_INFO_SIZE)
+
+        tick = self.tick(now)
+        st_image.uiImageSize = nbytes
+        st_image.uiEndTime = tick & 0xFFFFFFFF
+        st_image.uiEndTime64 = tick
+        st_image.uiFrameCount = frame_no
+        return ErrorCodes.OK
+
+    def _CAM_Command(self, camera_handle, command, data):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        data = _deref(data)
+        match command:
+            case c.CAM_CMD_GET_FRAMESIZE:
+                _, _, _, nbytes = camera.geometry
+                data.uiFrameSize = nbytes + s.CAM_IMG_INFO_SIZE
+                data.uiFrameInterval = 66_000
+            case c.CAM_CMD_START_FRAMETRANSFER:
+                camera.transferring = True
+            case c.CAM_CMD_STOP_FRAMETRANSFER:
+                camera.transferring = False
+                with camera.lock:
+                    camera.pending_frames.clear()
+            case c.CAM_CMD_IS_TRANSFER_STARTED:
+                data.bStarted = camera.transferring
+            case c.CAM_CMD_ONEPUSH_SOFTTRIGGER:
+                if not camera.transferring or camera.value(Fid.TriggerMode) != c.ECamTriggerMode.Soft:
+                    return ErrorCodes.ERR_FAIL
+                now = time.perf_counter()
+                ready_time = now + (camera.value(Fid.ExposureTime) / 1e6 if self.exposure_delay else 0.0)
+                with camera.lock:
+                    camera.pending_frames.append(ready_time)
+                camera.queue_event(c.ECamEventType.ecetExposureEnd, ready_time)
+                camera.queue_event(c.ECamEventType.ecetTriggerReady, ready_time)
+                camera.queue_event(c.ECamEventType.ecetImageReceived, ready_time,
+                                   uiFrameNo=camera.frame_count + len(camera.pending_frames),
+                                   uiRemained=len(camera.pending_frames))
+            case c.CAM_CMD_ONEPUSH_AE:
+                now = time.perf_counter()
+                if camera.value(Fid.ExposureMode) != c.ECamExposureMode.OnePushAE:
+                    camera.queue_event(c.ECamEventType.ecetAeDisable, now)
+                    return ErrorCodes.OK
+                camera.queue_event(c.ECamEventType.ecetAeRunning, now)
+                self._change_features(camera, self.ae_result, now + self.one_push_time / 2)
+                camera.queue_event(c.ECamEventType.ecetAeStay, now + self.one_push_time)
+            case c.CAM_CMD_ONEPUSH_WHITEBALANCE:
+                if camera.value(Fid.WhiteBalance) != c.ECamWhiteBalance.wbOnePush:
+                    return ErrorCodes.ERR_FAIL
+                self._change_features(camera, self.wb_result, time.perf_counter() + self.one_push_time)
+            case c.CAM_CMD_CONTROL_CIS:
+                if data.bSet:
+                    _set_variant(camera.features[Fid.CisPower].stVariant, Vt.evrt_int32, int(data.ucState))
+                else:
+                    data.ucState = camera.value(Fid.CisPower)
+            case c.CAM_CMD_GET_SDKVERSION:
+                data.wszSdkVersion = "fake-1.0"
+        return ErrorCodes.OK
+
+    @staticmethod
+    def _change_features(camera: _Camera, values: dict[int, int], ready_time: float) -> None:
+        """Change features as a one-push command does, with ecetFeatureChanged events at ready_time."""
+        for feature_id, value in values.items():
+            feature = camera.features[feature_id]
+            _set_variant(feature.stVariant, feature.stVariant.eVarType, value)
+            camera.queue_event(c.ECamEventType.ecetFeatureChanged, ready_time, uiFeatureId=int(feature_id),
+                               stVariant=feature.stVariant)
+
+    def _CAM_SetNoticeCallback(self, camera_handle, callback, trans_data):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        camera.notice_callback = callback
+        return ErrorCodes.OK
+
+    def _CAM_EventPolling(self, camera_handle, stop_event, event_type, event):
+        camera = self._camera(camera_handle)
+        if camera is None:
+            return ErrorCodes.ERR_HANDLE
+        with camera.lock:
+            queue = camera.events[event_type]
+            if not queue or queue[0][0] > time.perf_counter():
+                return ErrorCodes.ERR_ACCESSDENIED
+            _, queued_event = queue.popleft()
+        ctypes.memmove(ctypes.addressof(_deref(event)), ctypes.addressof(queued_event), ctypes.sizeof(s.CAM_Event))
+        return ErrorCodes.OK
+
+
+def install(sdk: FakeDsCam | None = None) -> FakeDsCam:
+    """Forward the SDK entry points used by PyNikonSciCam to a stand-in.
+    Args:
+        sdk (FakeDsCam | None): The stand-in to install, a single camera stand-in is created if None.
+    Returns:
+        FakeDsCam: The installed stand-in.
+    """
+    sdk = sdk if sdk is not None else FakeDsCam()
+    _shim.bind(sdk)
+    methods = sys.modules.get("pynikonscicam.methods")
+    if methods is not None and methods.pDsCamDLL is not _shim:  # Imported before this module, e.g. on Windows
+        methods.pDsCamDLL = _shim
+    return sdk
@@ -0,0 +1,266 @@
+"""Benchmarks of acquisition, decoding and feature access, run against the DsCam stand-in in fake_dscam.py.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.1
+
+Each benchmark times individual calls and reports the median, mean, p90 and min duration in microseconds,
+the call rate and, where a call moves image data, the throughput in MB/s. When a baseline is given, benchmarks
+whose median is slower than the baseline by more than the threshold are reported as regressions and the exit
+code is 1.
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_dscam  # noqa: E402  Must be imported before pynikonscicam
+
+import numpy as np  # noqa: E402
+
+from pynikonscicam import NikonCamera  # noqa: E402
+from pynikonscicam import constants as consts  # noqa: E402
+from pynikonscicam import decoding  # noqa: E402
+from pynikonscicam import frame_server  # noqa: E402
+from pynikonscicam import methods  # noqa: E402
+from pynikonscicam import remote  # noqa: E402
+from pynikonscicam import tracing  # noqa: E402
+
+
+# Benchmark name -> function returning (timings in seconds, bytes moved per call)
+BENCHMARKS: dict[str, Callable[[float], tuple[list[float], int]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark function taking the repeat scale."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_calls(func: Callable[[], object], repeat: int, warmup: int = 3) -> list[float]:
+    """Time individual calls of a function, in seconds."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            func()
+            timings.append((time.perf_counter_ns() - start) / 1e9)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return timings
+
+
+def _repeat(base: int, scale: float) -> int:
+    return max(int(base * scale), 3)
+
+
+def _camera(**kwargs) -> NikonCamera:
+    fake_dscam.install(fake_dscam.FakeDsCam(**kwargs))
+    return NikonCamera(0)
+
+
+@benchmark("construction")
+def bench_construction(scale: float) -> tuple[list[float], int]:
+    fake_dscam.install(fake_dscam.FakeDsCam())
+
+    def construct():
+        NikonCamera(0).disconnect()
+    return time_calls(construct, _repeat(20, scale), warmup=1), 0
+
+
+@benchmark("get_image")
+def bench_get_image(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        nbytes = decoding.image_nbytes(camera.colour, camera.height, camera.width)
+        return time_calls(camera.get_image, _repeat(100, scale)), nbytes
+
+
+@benchmark("get_image_out")
+def bench_get_image_out(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        out = np.empty(camera.image_shape, camera.image_dtype)
+        nbytes = decoding.image_nbytes(camera.colour, camera.height, camera.width)
+        return time_calls(lambda: camera.get_image(out), _repeat(100, scale)), nbytes
+
+
+@benchmark("remote_get_image_out")
+def bench_remote_get_image_out(scale: float) -> tuple[list[float], int]:
+    """get_image_out through a RemoteNikonCamera, the difference is the per-frame cost of the camera process."""
+    with remote.RemoteNikonCamera(0, initializer=fake_dscam.install) as camera:
+        out = np.empty(camera.image_shape, camera.image_dtype)
+        nbytes = decoding.image_nbytes(camera.colour, camera.height, camera.width)
+        return time_calls(lambda: camera.get_image(out), _repeat(100, scale)), nbytes
+
+
+def _bench_decode(colour: consts.ECamFormatColor, scale: float) -> tuple[list[float], int]:
+    height, width = 2048, 2880
+    nbytes = decoding.image_nbytes(colour, height, width)
+    buffer = np.random.default_rng(0).integers(0, 256, nbytes, dtype=np.uint8)
+    return time_calls(lambda: decoding.decode_image(buffer, colour, height, width), _repeat(50, scale)), nbytes
+
+
+for _colour in decoding.FormatColorLayout:
+    benchmark(f"decode_{consts.ECamFormatColor(_colour).name}")(
+        lambda scale, colour=_colour: _bench_decode(colour, scale))
+
+
+@benchmark("get_feature_value")
+def bench_get_feature_value(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        return time_calls(lambda: camera.get_feature_value(consts.ECamFeatureId.ExposureTime), _repeat(500, scale)), 0
+
+
+@benchmark("set_feature_value")
+def bench_set_feature_value(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        values = iter(range(10_000, 10_000_000))
+        return time_calls(lambda: camera.set_feature_value(consts.ECamFeatureId.ExposureTime, next(values)),
+                          _repeat(500, scale)), 0
+
+
+@benchmark("set_feature_values")
+def bench_set_feature_values(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        values = iter(range(10_000, 10_000_000))
+
+        def set_values():
+            value = next(values)
+            camera.set_feature_values({consts.ECamFeatureId.ExposureTime: value,
+                                       consts.ECamFeatureId.Gain: 100 + value % 1000})
+        return time_calls(set_values, _repeat(500, scale)), 0
+
+
+@benchmark("set_trigger_mode")
+def bench_set_trigger_mode(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        modes = itertools.cycle((consts.ECamTriggerMode.Off, consts.ECamTriggerMode.Soft))
+        return time_calls(lambda: camera.set_trigger_mode(next(modes)), _repeat(2000, scale)), 0
+
+
+@benchmark("sdk_call")
+def bench_sdk_call(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera:
+        return time_calls(lambda: methods.poll_event(camera.camera_handle, consts.ECamEventType.ecetAeStay),
+                          _repeat(5000, scale)), 0
+
+
+@benchmark("sdk_call_traced")
+def bench_sdk_call_traced(scale: float) -> tuple[list[float], int]:
+    with _camera() as camera, tracing.SdkTracer(tracing.SummarySink()):
+        return time_calls(lambda: methods.poll_event(camera.camera_handle, consts.ECamEventType.ecetAeStay),
+                          _repeat(5000, scale)), 0
+
+
+@benchmark("frame_server_loopback")
+def bench_frame_server_loopback(scale: float) -> tuple[list[float], int]:
+    image = np.random.default_rng(0).integers(0, 256, (2048, 2880, 3), dtype=np.uint8)
+    repeat = _repeat(50, scale)
+    warmup = 3
+    with frame_server.FrameServer(port=0, policy=frame_server.BLOCK) as server:
+        with frame_server.FrameClient(*server.address, timeout=10) as client:
+            while not server.clients:
+                time.sleep(0.01)
+            publisher = threading.Thread(target=lambda: [server.publish(image) for _ in range(repeat + warmup)])
+            publisher.start()
+            out = np.empty_like(image)
+            timings = time_calls(lambda: client.read(out), repeat, warmup)
+            publisher.join()
+    return timings, image.nbytes
+
+
+def summarise(timings: list[float], nbytes: int) -> dict[str, float]:
+    """Summarise call timings in microseconds, with the call rate and throughput."""
+    timings_us = np.asarray(timings) * 1e6
+    median = float(np.median(timings_us))
+    result = {
+        "calls": len(timings),
+        "median_us": median,
+        "mean_us": float(timings_us.mean()),
+        "p90_us": float(np.percentile(timings_us, 90)),
+        "min_us": float(timings_us.min()),
+        "calls_per_s": 1e6 / median if median > 0 else float("inf"),
+    }
+    if nbytes:
+        result["mb_per_s"] = nbytes / median if median > 0 else float("inf")
+    return result
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Compare the median of each benchmark with the baseline.
+    Returns:
+        list[str]: Names of the benchmarks that regressed by more than the threshold.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median_us"] / baseline[name]["median_us"]
+        result["baseline_median_us"] = baseline[name]["median_us"]
+        result["change"] = ratio - 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale the number of repeats of every benchmark.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file.")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file as a new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown of the median reported as a regression, default 0.1.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        results[name] = summarise(*func(args.scale))
+        print(f"{name:<32}{results[name]['median_us']:>14.1f} us"
+              + (f"{results[name]['mb_per_s']:>12.1f} MB/s" if "mb_per_s" in results[name] else ""))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            print(f"REGRESSION {name}: {results[name]['change']:+.1%} median vs baseline")
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
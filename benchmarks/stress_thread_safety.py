@@ -0,0 +1,188 @@
+"""Stress test of concurrent NikonCamera use, run against the DsCam stand-in in fake_dscam.py.
+
+Usage:
+    python benchmarks/stress_thread_safety.py --duration 10
+
+One thread streams with get_image while others set features (single, batched and profiles), read cached feature
+values, switch the image Format and poll events. Every image must have the shape of one of the formats in use and
+every cached read must be a value that was set. Reports the streaming frame time with and without the other threads,
+how long single SDK calls hold the SDK lock (which bounds the wait of a feature write, other than a Format change),
+the latency of feature writes and cached reads, and exits with code 1 if any thread raised or saw an invalid value.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_dscam  # noqa: E402  Must be imported before pynikonscicam
+
+import numpy as np  # noqa: E402
+
+from pynikonscicam import NikonCamera, FeatureProfile  # noqa: E402
+from pynikonscicam import constants as consts  # noqa: E402
+
+Fid = consts.ECamFeatureId
+EXPOSURES = (1_000, 2_000, 5_000)
+GAINS = (100, 200, 400)
+FORMATS = ((consts.ECamFormatColor.ecfcRgb24, consts.ECamFormatSize.ecfsH2880x2048),
+           (consts.ECamFormatColor.ecfcRgb24, consts.ECamFormatSize.ecfsH1440x1024))
+
+
+def _percentiles(timings: list[float]) -> str:
+    if not timings:
+        return "no samples"
+    us = np.asarray(timings) * 1e6
+    return (f"n={len(us):<6} median {np.median(us):9.1f} us   p99 {np.percentile(us, 99):9.1f} us   "
+            f"max {us.max():9.1f} us")
+
+
+class TimedLock:
+    """Wraps the camera's SDK lock to record how long each SDK call holds it, the bound on a feature write's wait."""
+    def __init__(self, lock) -> None:
+        self.lock = lock
+        self.holds: list[float] = []
+        self._acquired = 0.0
+
+    def __enter__(self):
+        self.lock.acquire()
+        self._acquired = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.holds.append(time.perf_counter() - self._acquired)
+        self.lock.release()
+
+
+class Stress:
+    def __init__(self, camera: NikonCamera, duration: float, switch_formats: bool) -> None:
+        self.camera = camera
+        self.duration = duration
+        self.switch_formats = switch_formats
+        self.stop = threading.Event()
+        self.errors: list[str] = []
+        self.frame_times: list[float] = []
+        self.write_times: list[float] = []
+        self.read_times: list[float] = []
+        self.format_times: list[float] = []
+        self.shapes = {(height, width, 3) for height, width in ((2048, 2880), (1024, 1440))}
+
+    def _guard(self, name, func):
+        def run():
+            try:
+                func()
+            except Exception as exc:
+                self.errors.append(f"{name}: {type(exc).__name__}: {exc}")
+                self.stop.set()
+        return threading.Thread(target=run, name=name, daemon=True)
+
+    def stream(self) -> None:
+        last_frame = 0
+        while not self.stop.is_set():
+            # Hold the data lock so a Format change cannot replace the image structure before it is read
+            with self.camera._data_lock:
+                start = time.perf_counter()
+                image = self.camera.get_image()
+                self.frame_times.append(time.perf_counter() - start)
+                info = self.camera.get_image_info()
+                frame = self.camera._stImage.uiFrameCount
+            if image.shape not in self.shapes:
+                raise AssertionError(f"Image of unexpected shape {image.shape}")
+            if info.uiExposureTime not in EXPOSURES + (10_000,):
+                raise AssertionError(f"Frame with unexpected exposure time {info.uiExposureTime}")
+            if frame <= last_frame:
+                raise AssertionError(f"Frame count went from {last_frame} to {frame}")
+            last_frame = frame
+
+    def write(self) -> None:
+        profiles = [FeatureProfile(f"p{i}", {Fid.ExposureTime: e, Fid.Gain: g})
+                    for i, (e, g) in enumerate(zip(EXPOSURES, GAINS))]
+        i = 0
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            match i % 3:
+                case 0:
+                    self.camera.set_feature_value(Fid.ExposureTime, EXPOSURES[i % len(EXPOSURES)])
+                case 1:
+                    self.camera.set_feature_values({Fid.ExposureTime: EXPOSURES[i % len(EXPOSURES)],
+                                                    Fid.Gain: GAINS[i % len(GAINS)]})
+                case 2:
+                    self.camera.apply_profile(profiles[i % len(profiles)], only_changed=False)
+            self.write_times.append(time.perf_counter() - start)
+            i += 1
+            time.sleep(0.001)
+
+    def read(self) -> None:
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            exposure = self.camera.get_cached_feature_value(Fid.ExposureTime)
+            gain = self.camera.get_cached_feature_value(Fid.Gain)
+            self.read_times.append(time.perf_counter() - start)
+            if exposure not in EXPOSURES + (10_000,) or gain not in GAINS:
+                raise AssertionError(f"Cached read of unexpected values {exposure}, {gain}")
+            time.sleep(0.0001)
+
+    def switch(self) -> None:
+        i = 0
+        while not self.stop.wait(0.05):
+            start = time.perf_counter()
+            self.camera.set_feature_value(Fid.Format, FORMATS[i % len(FORMATS)])
+            self.format_times.append(time.perf_counter() - start)
+            i += 1
+
+    def run(self) -> None:
+        # Streaming alone, as the reference for the frame time
+        threads = [self._guard("stream", self.stream)]
+        threads[0].start()
+        time.sleep(min(self.duration / 4, 2.0))
+        self.stop.set()
+        threads[0].join()
+        reference, self.frame_times = self.frame_times, []
+        if self.errors:
+            return
+
+        self.stop.clear()
+        sdk_lock = self.camera._sdk_lock = TimedLock(self.camera._sdk_lock)
+        self.camera.events.start(0.001)  # Event polling competes for the SDK too
+        threads = [self._guard("stream", self.stream), self._guard("write", self.write),
+                   self._guard("read", self.read)]
+        if self.switch_formats:
+            threads.append(self._guard("switch_format", self.switch))
+        for thread in threads:
+            thread.start()
+        self.stop.wait(self.duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        self.camera.events.stop()
+        self.camera._sdk_lock = sdk_lock.lock
+
+        print(f"get_image alone          {_percentiles(reference)}")
+        print(f"get_image under stress   {_percentiles(self.frame_times)}")
+        print(f"SDK lock holds           {_percentiles(sdk_lock.holds)}")
+        print(f"feature writes           {_percentiles(self.write_times)}")
+        print(f"cached feature reads     {_percentiles(self.read_times)}")
+        if self.switch_formats:
+            print(f"format switches          {_percentiles(self.format_times)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run the concurrent threads for.")
+    parser.add_argument("--no-format-switch", action="store_true", help="Do not switch the Format while streaming.")
+    args = parser.parse_args(argv)
+
+    fake_dscam.install(fake_dscam.FakeDsCam(exposure_delay=True))
+    with NikonCamera(0) as camera:
+        camera.set_feature_values({Fid.ExposureTime: EXPOSURES[0], Fid.Gain: GAINS[0]})
+        stress = Stress(camera, args.duration, not args.no_format_switch)
+        stress.run()
+    for error in stress.errors:
+        print(f"ERROR {error}")
+    return 1 if stress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
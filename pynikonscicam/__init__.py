@@ -1,3 +1,5 @@
 from .camera_class_nikon import NikonCamera
 from .constants import ECamFeatureId
 from .constants import ECamFormatColor, ECamFormatSize
+from .auto_exposure import AutoExposureController
+from .profiles import FeatureProfile
@@ -0,0 +1,194 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from . import constants as consts
+from .camera_class_nikon import NikonCamera
+
+
+class AutoExposureResult(NamedTuple):
+    level: float  # Measured percentile level of the frame, as a fraction of full scale
+    exposure: int  # Exposure time applied for the next frame (microseconds)
+    gain: int  # Gain applied for the next frame (logical value)
+    converged: bool  # Whether the measured level was within tolerance of the target
+
+
+def _feature_range(camera: NikonCamera, feature_id: consts.ECamFeatureId) -> tuple[int, int, int] | None:
+    """Get the (min, max, resolution) of a range feature from the camera's feature validator."""
+    limits = camera.validator.range(feature_id)
+    if limits is None:
+        return None
+    return int(limits.minimum), int(limits.maximum), max(int(limits.resolution), 1)
+
+
+class AutoExposureController:
+    """Deterministic software auto-exposure for a NikonCamera.
+
+    Each call to update() measures a percentile of a frame on a sparse pixel lattice (optionally restricted to
+    the camera's MeteringArea), predicts the exposure time and gain that bring that percentile to the target
+    level assuming the signal is proportional to exposure * gain, and applies both with a single CAM_SetFeatures call.
+    Exposure is preferred over gain, gain is only raised above unity once the exposure time is at its maximum.
+
+    Example:
+        controller = AutoExposureController(camera, target=0.7, percentile=99.0)
+        controller.start()
+        while True:
+            img = camera.get_image()
+            result = controller.update(img)
+
+    NOTE Gain is treated as a linear multiplier, with gain_unity as a 1x gain. By default that is the minimum of the
+    camera's Gain range, its normal gain. A camera whose normal gain is the logical value 0 has no such multiplier,
+    pass gain_unity for it or set adjust_gain=False.
+    """
+    def __init__(
+            self,
+            camera: NikonCamera,
+            target: float = 0.5,
+            percentile: float = 99.0,
+            stride: int = 16,
+            use_metering_area: bool = False,
+            loop_gain: float = 1.0,
+            tolerance: float = 0.05,
+            max_step: float = 8.0,
+            full_scale: float | None = None,
+            gain_unity: int | None = None,
+            adjust_gain: bool = True,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera to control.
+            target (float): Target level of the percentile, as a fraction of full scale.
+            percentile (float): Percentile of the pixel values to bring to the target, e.g. 99 to avoid clipping highlights.
+            stride (int): Spacing of the sampling lattice in pixels, in both directions.
+            use_metering_area (bool): Only sample within the camera's MeteringArea feature.
+            loop_gain (float): Proportional gain of the loop, 1.0 corrects the full error each frame, lower values damp it.
+            tolerance (float): Relative error from the target within which the loop is considered converged.
+            max_step (float): Maximum factor by which the exposure * gain product can change in one frame.
+            full_scale (float | None): Pixel value corresponding to a level of 1.0, the maximum of the image type if None.
+            gain_unity (int | None): Gain value corresponding to a gain of 1x, the minimum of the Gain range if None.
+            adjust_gain (bool): Allow raising the gain once the exposure time is at its maximum.
+        Raises:
+            ValueError: If adjust_gain is set and the unity gain is not positive.
+        """
+        if not 0.0 < target < 1.0:
+            raise ValueError("Target must be between 0 and 1.")
+        if not 0.0 <= percentile <= 100.0:
+            raise ValueError("Percentile must be between 0 and 100.")
+        if stride < 1:
+            raise ValueError("Stride must be at least 1.")
+
+        self.camera = camera
+        self.target = target
+        self.percentile = percentile
+        self.stride = stride
+        self.use_metering_area = use_metering_area
+        self.loop_gain = loop_gain
+        self.tolerance = tolerance
+        self.max_step = max_step
+        self.full_scale = full_scale
+        self.adjust_gain = adjust_gain
+
+        # Limits from the cached feature descriptions, falling back to the current values if unavailable
+        self.exposure = int(camera.get_feature_value(consts.ECamFeatureId.ExposureTime))
+        self.gain = int(camera.get_feature_value(consts.ECamFeatureId.Gain))
+        self.exposure_min, self.exposure_max, self.exposure_res = (
+            _feature_range(camera, consts.ECamFeatureId.ExposureTime) or (1, self.exposure, 1))
+        self.gain_min, self.gain_max, self.gain_res = (
+            _feature_range(camera, consts.ECamFeatureId.Gain) or (self.gain, self.gain, 1))
+        if consts.ECamFeatureId.ExposureTimeLimit in camera.feature_map:
+            exposure_limit = int(camera.get_feature_value(consts.ECamFeatureId.ExposureTimeLimit))
+            if exposure_limit > 0:
+                self.exposure_max = min(self.exposure_max, exposure_limit)
+        if gain_unity is None:
+            gain_unity = self.gain_min
+        if adjust_gain and gain_unity <= 0:
+            raise ValueError(f"Gain {gain_unity} cannot be used as a 1x gain, pass gain_unity or set adjust_gain=False.")
+        self.gain_unity = gain_unity
+        if adjust_gain:
+            self.gain_min = max(self.gain_min, gain_unity)  # Gain is only used to extend the exposure range
+
+        self._area: tuple[slice, slice] | None = None
+        if use_metering_area:
+            area: consts.AreaFeature = camera.get_feature_value(consts.ECamFeatureId.MeteringArea)
+            self._area = (slice(area.top, area.top + area.height), slice(area.left, area.left + area.width))
+
+    def start(self) -> None:
+        """Switch the camera to manual exposure so that the controller is the only thing adjusting it."""
+        self.camera.set_feature_value(consts.ECamFeatureId.ExposureMode, consts.ECamExposureMode.Manual)
+
+    def measure(self, img: np.ndarray) -> float:
+        """Measure the percentile level of an image on the sampling lattice.
+        Args:
+            img (np.ndarray): Image of shape (height, width) or (height, width, channels).
+        Returns:
+            float: The percentile of the sampled pixels, as a fraction of full scale.
+                For colour images the brightest channel of each pixel is used, so that no channel clips.
+        """
+        if self._area is not None:
+            img = img[self._area]
+        sample = img[::self.stride, ::self.stride]
+        if sample.ndim == 3:
+            sample = sample.max(axis=2)
+        sample = sample.ravel()
+        if sample.size == 0:
+            raise ValueError("No pixels to sample, check the image size, stride and metering area.")
+
+        # Partial sort is cheaper than a full percentile calculation
+        k = min(int(self.percentile / 100.0 * sample.size), sample.size - 1)
+        full_scale = self.full_scale if self.full_scale is not None else np.iinfo(self.camera.image_dtype).max
+        return float(np.partition(sample, k)[k]) / full_scale
+
+    def predict(self, level: float) -> tuple[int, int]:
+        """Predict the exposure time and gain that bring the measured level to the target.
+        Args:
+            level (float): The measured level, as a fraction of full scale.
+        Returns:
+            tuple[int, int]: The exposure time and gain.
+        """
+        if level >= 1.0:
+            # Saturated, the true level is unknown so step down by the maximum
+            ratio = 1.0 / self.max_step
+        elif level <= 0.0:
+            ratio = self.max_step
+        else:
+            ratio = (self.target / level) ** self.loop_gain
+            ratio = min(max(ratio, 1.0 / self.max_step), self.max_step)
+
+        if not self.adjust_gain:
+            return self._snap(self.exposure * ratio, self.exposure_min, self.exposure_max, self.exposure_res), self.gain
+
+        # Desired exposure * gain product, in units of microseconds at unity gain
+        total = self.exposure * (max(self.gain, self.gain_unity) / self.gain_unity) * ratio
+        exposure = self._snap(total, self.exposure_min, self.exposure_max, self.exposure_res)
+        gain = self._snap(self.gain_unity * total / exposure, self.gain_min, self.gain_max, self.gain_res)
+        return exposure, gain
+
+    def update(self, img: np.ndarray) -> AutoExposureResult:
+        """Measure a frame and apply the predicted exposure time and gain for the next frame.
+        Args:
+            img (np.ndarray): The latest frame from the camera.
+        Returns:
+            AutoExposureResult: The measured level and the settings applied.
+        """
+        level = self.measure(img)
+        converged = abs(level - self.target) <= self.tolerance * self.target
+        if converged:
+            return AutoExposureResult(level, self.exposure, self.gain, True)
+
+        exposure, gain = self.predict(level)
+        changes = {}
+        if exposure != self.exposure:
+            changes[consts.ECamFeatureId.ExposureTime] = exposure
+        if gain != self.gain:
+            changes[consts.ECamFeatureId.Gain] = gain
+        if changes:
+            # Single CAM_SetFeatures call for both features
+            self.camera.set_feature_values(changes)
+            self.exposure, self.gain = exposure, gain
+        return AutoExposureResult(level, exposure, gain, False)
+
+    @staticmethod
+    def _snap(value: float, minimum: int, maximum: int, resolution: int) -> int:
+        """Round a value to the feature's resolution within its range."""
+        value = minimum + round((value - minimum) / resolution) * resolution
+        return int(min(max(value, minimum), maximum))
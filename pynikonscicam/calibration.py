@@ -0,0 +1,246 @@
+import csv
+import math
+import os
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from . import constants as consts
+from .camera_class_nikon import NikonCamera
+
+
+class SweepPoint(NamedTuple):
+    exposure: int  # Exposure time (microseconds)
+    gain: int  # Gain (logical value)
+
+
+class PTCPoint(NamedTuple):
+    exposure: int
+    gain: int
+    mean: float  # Mean signal above the black level (DN), averaged over the pairs
+    variance: float  # Temporal variance (DN^2), from the difference of each pair so fixed pattern noise cancels
+    pairs: int
+    saturated: float  # Fraction of pixels at full scale
+    settle_frames: int  # Frames discarded before the camera confirmed the new exposure time and gain
+
+
+class GainFit(NamedTuple):
+    gain: int
+    conversion_gain: float  # Electrons per DN, 1 / slope of variance against mean
+    read_noise_dn: float  # Temporal noise at zero signal (DN), from the intercept
+    read_noise_e: float  # Read noise in electrons
+    nonlinearity: float  # Largest deviation of the mean from a straight line in exposure, % of the largest mean
+    points: int  # Points used in the fits, unsaturated points only
+
+
+class PTCResult(NamedTuple):
+    points: list[PTCPoint]
+    fits: dict[int, GainFit]  # Fit of the points at each gain
+
+    def save_csv(self, path: str | os.PathLike) -> None:
+        """Save the photon transfer curve, one row per point."""
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(PTCPoint._fields)
+            writer.writerows(self.points)
+
+
+def _fit_line(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """Least squares (slope, intercept) of y against x."""
+    slope, intercept = np.polyfit(x, y, 1)
+    return float(slope), float(intercept)
+
+
+def fit_ptc(points: list[PTCPoint], max_saturated: float = 1e-3, max_mean: float | None = None) -> dict[int, GainFit]:
+    """Fit the photon transfer curve of each gain.
+
+    In the shot noise limited region the temporal variance is read_noise^2 + mean / conversion_gain (all in DN), so a
+    straight line fit of variance against mean gives the conversion gain from its slope and the read noise from its
+    intercept. Linearity is the deviation of the mean from a straight line in exposure time.
+    Args:
+        points (list[PTCPoint]): Points of the sweep.
+        max_saturated (float): Points with a larger fraction of saturated pixels are left out of the fits.
+        max_mean (float | None): Points with a larger mean are left out of the fits, e.g. 90% of full scale.
+    Returns:
+        dict[int, GainFit]: The fit of each gain with at least two usable points.
+    """
+    fits = {}
+    for gain in sorted({point.gain for point in points}):
+        usable = [point for point in points if point.gain == gain and point.saturated <= max_saturated
+                  and (max_mean is None or point.mean <= max_mean)]
+        if len({point.mean for point in usable}) < 2:
+            continue
+        means = np.array([point.mean for point in usable])
+        slope, intercept = _fit_line(means, np.array([point.variance for point in usable]))
+        conversion_gain = 1.0 / slope if slope > 0 else math.nan
+        read_noise_dn = math.sqrt(intercept) if intercept > 0 else 0.0
+
+        nonlinearity = math.nan
+        exposures = np.array([point.exposure for point in usable], dtype=np.float64)
+        if len(np.unique(exposures)) >= 2:
+            line_slope, line_intercept = _fit_line(exposures, means)
+            residuals = means - (line_slope * exposures + line_intercept)
+            nonlinearity = float(np.max(np.abs(residuals)) / np.max(np.abs(means)) * 100)
+
+        fits[gain] = GainFit(gain, conversion_gain, read_noise_dn, read_noise_dn * conversion_gain, nonlinearity,
+                             len(usable))
+    return fits
+
+
+class PTCSweep:
+    """Sweeps the exposure time and gain of a camera to measure its photon transfer curve (PTC).
+
+    Each point of the grid is applied with a single CAM_SetFeatures call, then frames are taken until the exposure time
+    in the frame's CAM_ImageInfo confirms the new settings, rather than waiting for a fixed time. Pairs of frames are
+    reduced to their mean and the variance of their difference as they arrive, so only two frames are kept in memory.
+    The camera should look at a uniform, stable light source.
+
+    Example:
+        sweep = PTCSweep(camera, PTCSweep.plan_exposures(camera, 100, 200_000, 20), gains=[100, 400])
+        result = sweep.run()
+        for fit in result.fits.values():
+            print(fit.gain, fit.conversion_gain, fit.read_noise_e)
+    """
+    def __init__(
+            self,
+            camera: NikonCamera,
+            exposures: list[int],
+            gains: list[int] | None = None,
+            pairs: int = 4,
+            roi: tuple[int, int, int, int] | None = None,
+            channel: int | None = None,
+            black_level: float = 0.0,
+            full_scale: float | None = None,
+            max_settle_frames: int = 10,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera.
+            exposures (list[int]): Exposure times to measure (microseconds).
+            gains (list[int] | None): Gains to measure, the current gain if None.
+            pairs (int): Frame pairs averaged at each point.
+            roi (tuple[int, int, int, int] | None): (top, left, height, width) of the region measured, the whole frame
+                if None. A region of uniform illumination gives a cleaner curve.
+            channel (int | None): Colour channel measured for colour formats, all channels if None.
+            black_level (float): Offset of the camera's output at zero signal (DN), subtracted from the means.
+            full_scale (float | None): Value of a saturated pixel, the maximum of the image type if None.
+            max_settle_frames (int): Frames taken at most while waiting for the camera to confirm new settings.
+        """
+        if pairs < 1:
+            raise ValueError("At least one pair of frames is needed per point.")
+        if not exposures:
+            raise ValueError("No exposure times to sweep.")
+        self.camera = camera
+        self.exposures = [int(exposure) for exposure in exposures]
+        if gains is None:
+            gains = [camera.get_feature_value(consts.ECamFeatureId.Gain)]
+        self.gains = [int(gain) for gain in gains]
+        self.pairs = pairs
+        self.roi = roi
+        self.channel = channel
+        self.black_level = black_level
+        self.full_scale = full_scale
+        self.max_settle_frames = max_settle_frames
+
+    @staticmethod
+    def plan_exposures(camera: NikonCamera, minimum: int, maximum: int, count: int, log: bool = True) -> list[int]:
+        """Plan exposure times between two limits, snapped to the camera's exposure resolution and range.
+        Args:
+            camera (NikonCamera): The camera.
+            minimum (int): Shortest exposure time (microseconds).
+            maximum (int): Longest exposure time (microseconds).
+            count (int): Number of exposure times.
+            log (bool): Space the times logarithmically, which samples the low signal end of the curve more densely.
+        Returns:
+            list[int]: The distinct exposure times, in increasing order.
+        """
+        if log:
+            times = np.geomspace(max(minimum, 1), maximum, count)
+        else:
+            times = np.linspace(minimum, maximum, count)
+        snapped = {camera.validator.validate(consts.ECamFeatureId.ExposureTime, float(t), clamp=True, snap=True)
+                   for t in times}
+        return sorted(int(t) for t in snapped)
+
+    def plan(self) -> list[SweepPoint]:
+        """The grid of points in the order they are measured, every exposure time at each gain."""
+        return [SweepPoint(exposure, gain) for gain in self.gains for exposure in self.exposures]
+
+    def _region(self, image: np.ndarray) -> np.ndarray:
+        if self.roi is not None:
+            top, left, height, width = self.roi
+            image = image[top:top + height, left:left + width]
+        if self.channel is not None and image.ndim == 3:
+            image = image[..., self.channel]
+        return image
+
+    def _settle(self, point: SweepPoint, buffer: np.ndarray) -> int:
+        """Take frames until the camera reports the point's exposure time and gain.
+        Returns:
+            int: Number of frames discarded.
+        """
+        for discarded in range(self.max_settle_frames):
+            self.camera.get_image(out=buffer)
+            info = self.camera.get_image_info()
+            if info.uiExposureTime == point.exposure and info.usGain == point.gain:
+                return discarded
+        raise RuntimeError(f"Camera did not confirm an exposure time of {point.exposure} us and a gain of "
+                           f"{point.gain} within {self.max_settle_frames} frames.")
+
+    def measure(self, point: SweepPoint, buffers: tuple[np.ndarray, np.ndarray] | None = None) -> PTCPoint:
+        """Apply a point and measure its mean and temporal variance.
+        Args:
+            point (SweepPoint): The exposure time and gain.
+            buffers (tuple[np.ndarray, np.ndarray] | None): Two preallocated image arrays, allocated if None.
+        """
+        camera = self.camera
+        if buffers is None:
+            buffers = (np.empty(camera.image_shape, camera.image_dtype), np.empty(camera.image_shape, camera.image_dtype))
+        first, second = buffers
+        camera.set_feature_values({consts.ECamFeatureId.ExposureTime: point.exposure,
+                                   consts.ECamFeatureId.Gain: point.gain})
+        settle_frames = self._settle(point, first)  # The confirming frame is the first of the first pair
+        full_scale = self.full_scale if self.full_scale is not None else np.iinfo(camera.image_dtype).max
+
+        difference = None
+        mean_sum = variance_sum = saturated_sum = 0.0
+        for pair in range(self.pairs):
+            if pair:
+                camera.get_image(out=first)
+            camera.get_image(out=second)
+            a, b = self._region(first), self._region(second)
+            if difference is None:
+                difference = np.empty(a.shape, np.float32)
+            np.subtract(a, b, out=difference, dtype=np.float32)
+            mean_sum += (a.mean(dtype=np.float64) + b.mean(dtype=np.float64)) / 2
+            variance_sum += difference.var(dtype=np.float64) / 2  # Var(a - b) = 2 * temporal variance
+            saturated_sum += (np.count_nonzero(a >= full_scale) + np.count_nonzero(b >= full_scale)) / (2 * a.size)
+
+        return PTCPoint(point.exposure, point.gain, float(mean_sum / self.pairs - self.black_level),
+                        float(variance_sum / self.pairs), self.pairs, float(saturated_sum / self.pairs), settle_frames)
+
+    def run(self, progress: Callable[[PTCPoint], None] | None = None, restore: bool = True,
+            max_saturated: float = 1e-3) -> PTCResult:
+        """Measure every point of the grid and fit the curve of each gain.
+        Args:
+            progress (Callable[[PTCPoint], None] | None): Called with each point once measured.
+            restore (bool): Restore the camera's exposure time and gain afterwards.
+            max_saturated (float): Points with a larger fraction of saturated pixels are left out of the fits.
+        Returns:
+            PTCResult: The points and the fit of each gain.
+        """
+        camera = self.camera
+        original = {feature_id: camera.get_feature_value(feature_id)
+                    for feature_id in (consts.ECamFeatureId.ExposureTime, consts.ECamFeatureId.Gain)}
+        buffers = (np.empty(camera.image_shape, camera.image_dtype), np.empty(camera.image_shape, camera.image_dtype))
+        points = []
+        try:
+            for point in self.plan():
+                measured = self.measure(point, buffers)
+                points.append(measured)
+                if progress is not None:
+                    progress(measured)
+        finally:
+            if restore:
+                camera.set_feature_values(original)
+        return PTCResult(points, fit_ptc(points, max_saturated))
@@ -1,6 +1,8 @@
 import time
 import ctypes
-from typing import Any
+import contextlib
+import threading
+from typing import Any, Callable, NamedTuple
 
 import numpy as np
 
@@ -9,21 +11,71 @@ from . import structures as structs
 from . import constants as consts
 from . import error_codes as err_codes
 from . import commands as cmds
+from . import decoding as decoding
+from .latency import LatencyRecorder
+from .clock_sync import ClockSync, FrameTime
+from .devices import DeviceManager
+from .events import EventCapture, EventDispatcher, OnePushResult
+from .metrics import CameraMetrics, MetricsServer
+from .profiles import FeatureProfile
+from .validation import FeatureValidator
 
 
-class NikonCamera:
-    def __init__(self, camera_index: int = 0, set_defaults: bool = True, trigger_mode: consts.ECamTriggerMode = consts.ECamTriggerMode.Soft) -> None:
-        self.camera_index: int = camera_index
+class ImageMetadata(NamedTuple):
+    frame_count: int  # CAM_Image.uiFrameCount
+    camera_time: int  # CAM_Image.uiEndTime64, camera ticks at the end of the exposure
+    info: bytes  # Raw CAM_ImageInfo appended to the image, see CAM_ImageInfo.from_buffer_copy
+
 
-        # Get an array of possible devices
-        self.device_count, self.device_handles = methods.open_devices()
+class NikonCamera:
+    """A Nikon DS camera.
+
+    Thread safety: one thread can stream with get_image while others read and set features. Three locks are used,
+    always taken in this order:
+        - the control lock serialises feature writes, trigger mode changes and connection changes;
+        - the data lock is held by get_image (and whatever reads or replaces the reusable image structure);
+        - the SDK lock is held for the duration of each single SDK call made by get_image or a feature write, so
+          a feature write waits at most for one SDK call of the streaming thread and vice versa.
+    get_cached_feature_value reads the last known values without taking any lock. Changing the Format waits for
+    a get_image in progress, as the image buffer is reallocated. Calling get_image from several threads at once is
+    safe but serialised.
+    """
+    # Stages of get_image recorded by the latency recorder
+    GET_IMAGE_STAGES = ("trigger", "wait_image", "get_image", "decode", "wait_trigger_ready")
+
+    def __init__(self, camera_index: int = 0, set_defaults: bool = True, trigger_mode: consts.ECamTriggerMode = consts.ECamTriggerMode.Soft,
+                 serial_number: int | None = None) -> None:
+        """
+        Args:
+            camera_index (int): Index of the camera in the device list.
+            set_defaults (bool): Set the default settings, see set_defaults.
+            trigger_mode (ECamTriggerMode): Trigger mode.
+            serial_number (int | None): Serial number of the camera, overrides camera_index if given.
+        """
         if camera_index < 0:
             raise ValueError("Camera index cannot be negative.")
-        elif camera_index >= self.device_count:
-            raise ConnectionError(f"Camera index unavailable. Must be between 0 and {self.device_count - 1}.")
+        self._control_lock = threading.RLock()
+        self._data_lock = threading.RLock()
+        self._sdk_lock = threading.Lock()
+        self._feature_values: dict[consts.ECamFeatureId, Any] = {}  # Last known values, see get_cached_feature_value
+
+        # The device list is shared by every camera in the process and closed when the last one disconnects
+        self._device_manager = DeviceManager.instance()
+        devices = self._device_manager.acquire()
+        self._holds_devices = True
+        try:
+            if serial_number is not None:
+                camera_index = self._device_manager.find(serial_number).index
+            self.device_count = len(devices)
+            if camera_index >= self.device_count:
+                raise ConnectionError(f"Camera index unavailable. Must be between 0 and {self.device_count - 1}.")
+        except Exception:
+            self._release_devices()
+            raise
+        self.camera_index: int = camera_index
 
         # Get the CamDevice object for the specified camera
-        self._cam_device = self.device_handles[camera_index]
+        self._cam_device = self._device_manager.device(camera_index)
 
         # Get camera properties
         self.camera_handle: int = -1  # Camera handle before connection is made
@@ -36,11 +88,23 @@ class NikonCamera:
         self.usb_dc_version: str = self._cam_device.wszUsbDcVersion
         self.usb_version: str = self._cam_device.wszUsbVersion
 
+        # Image geometry, updated from the Format feature once connected
         self.width = 2880
         self.height = 2048
+        self.colour = consts.ECamFormatColor.ecfcRgb24
+        self._stImage: structs.CAM_Image | None = None
 
         self.is_connected = False
-        self.connect()
+        self.events = EventDispatcher(self)
+        self.tracking_features = False  # Feature values kept current from ecetFeatureChanged events
+        self.metrics: CameraMetrics | None = None
+        self._metrics_server: MetricsServer | None = None
+        self._owns_metrics_server = False
+        try:
+            self.connect()
+        except Exception:
+            self._release_devices()
+            raise
 
         self.update_feature_map()
 
@@ -48,27 +112,119 @@ class NikonCamera:
 
         if set_defaults:
             self.set_defaults()
+        self._update_image_geometry()
+
+        # Optional per-stage latency recording of get_image, see enable_latency_recording
+        self.latency_recorder: LatencyRecorder | None = None
+        # Optional mapping of camera ticks to host time, see enable_clock_sync
+        self.clock_sync: ClockSync | None = None
 
         # Initialize image structure
-        self._stImage = None
         self._initialize_image_structure()
+        self._image_buffers = 1  # Driver image buffers allocated when frame transfer starts, see capture_n
+        self.transfer_paused = False  # See pause_transfer
+        self._cis_powered_down = False
         self._start_FrameTransfer()
 
     def _initialize_image_structure(self) -> None:
         """Initialize the image structure once for reuse."""
-        self._stImage = structs.CAM_Image()
-        frame_size = cmds.get_frame_size(self.camera_handle)
-        self._stImage.uiDataBufferSize = frame_size.uiFrameSize
-        self._stImage.pDataBuffer = (ctypes.c_uint8 * self._stImage.uiDataBufferSize)()
+        with self._data_lock:
+            with self._sdk_lock:
+                frame_size = cmds.get_frame_size(self.camera_handle)
+            stImage = structs.CAM_Image()
+            stImage.uiDataBufferSize = frame_size.uiFrameSize
+            stImage.pDataBuffer = (ctypes.c_uint8 * stImage.uiDataBufferSize)()
+            self._image_buffer = np.ctypeslib.as_array(stImage.pDataBuffer, shape=(stImage.uiDataBufferSize,))
+            self._stImage = stImage
+
+    def _update_image_geometry(self) -> None:
+        """Update the image width, height and colour from the current Format feature and its description."""
+        if consts.ECamFeatureId.Format not in self.feature_map:
+            return
+        image_format: consts.FormatFeature = methods.get_feature_value(self.feature_map[consts.ECamFeatureId.Format])
+        self.colour = image_format.colour
+
+        for description in self._feature_descriptions:
+            if (description.uiFeatureId != consts.ECamFeatureId.Format
+                    or description.eFeatureDescType != consts.ECamFeatureDescType.edesc_FormatList):
+                continue
+            for i in range(description.uiListCount):
+                format_desc = description.FeatureDesc.stFormatList[i]
+                if format_desc.stFormat.eColor == image_format.colour and format_desc.stFormat.eMode == image_format.mode:
+                    self.width = int(format_desc.uiImageWidth)
+                    self.height = int(format_desc.uiImageHeight)
+                    return
+
+    @property
+    def image_shape(self) -> tuple[int, ...]:
+        """Shape of the images returned by get_image for the current format."""
+        return decoding.image_shape(self.colour, self.height, self.width)
+
+    @property
+    def image_dtype(self) -> np.dtype:
+        """Sample type of the images returned by get_image for the current format."""
+        return decoding.image_dtype(self.colour)
 
     def _start_FrameTransfer(self) -> None:
         """Start frame transfer."""
-        cmds.start_frame_transfer(self.camera_handle)
+        with self._sdk_lock:
+            cmds.start_frame_transfer(self.camera_handle, self._image_buffers)
+
+    def _restart_FrameTransfer(self, buffers: int) -> None:
+        """Restart frame transfer with a number of driver image buffers, discarding the frames not yet fetched."""
+        with self._sdk_lock:
+            cmds.stop_frame_transfer(self.camera_handle)
+            cmds.start_frame_transfer(self.camera_handle, buffers)
+        self._image_buffers = buffers
+
+    def pause_transfer(self, cis_off: bool = False) -> None:
+        """Stop frame transfer, e.g. between the acquisitions of a time-lapse. Waits for a get_image in progress, and
+        get_image and capture_n raise a RuntimeError until resume_transfer is called.
+        Args:
+            cis_off (bool): Also power down the image sensor (CIS).
+        """
+        with self._control_lock, self._data_lock:
+            if self.transfer_paused:
+                return
+            with self._sdk_lock:
+                cmds.stop_frame_transfer(self.camera_handle)
+                if cis_off:
+                    cmds.control_cis(self.camera_handle, 0)
+            self._cis_powered_down = cis_off
+            self.transfer_paused = True
+
+    def resume_transfer(self) -> None:
+        """Power the image sensor back up if it was powered down and restart frame transfer, see pause_transfer."""
+        with self._control_lock, self._data_lock:
+            if not self.transfer_paused:
+                return
+            if self._cis_powered_down:
+                with self._sdk_lock:
+                    cmds.control_cis(self.camera_handle, 1)
+                self._cis_powered_down = False
+            self._start_FrameTransfer()
+            self.transfer_paused = False
 
     def connect(self) -> None:
         """Connect to the camera."""
-        self.camera_handle = methods.open_camera(self.camera_index)
-        self.is_connected = True
+        with self._control_lock:
+            self.camera_handle = methods.open_camera(self.camera_index)
+            self.is_connected = True
+
+    def reconnect(self) -> None:
+        """Close and reopen the camera handle, e.g. after a failed bus reset.
+        NOTE Features are not restored, see get_feature_snapshot."""
+        with self._control_lock, self._data_lock:
+            try:
+                with self._sdk_lock:
+                    methods.close_camera(self.camera_handle)
+            except Exception:
+                pass  # The old handle is likely no longer valid
+            self.is_connected = False
+            self.connect()
+            self.events.register_notice_callback()
+            if self.clock_sync is not None:
+                self.clock_sync.reset()  # The camera clock may have restarted
 
     def set_defaults(self) -> None:
         """Set default camera settings.\n
@@ -81,15 +237,31 @@ class NikonCamera:
         if not self.is_connected:
             return
 
+        with self._control_lock, self._data_lock:
+            if not self.is_connected:
+                return
+            try:
+                self.disable_metrics()
+                self.events.close()
+                self.set_trigger_mode(consts.ECamTriggerMode.Off)
+                with self._sdk_lock:
+                    methods.close_camera(self.camera_handle)
+            except Exception as e:
+                print(f"Error during camera disconnect: {str(e)}")  # Or use logging.error() if you prefer
+            finally:
+                self.is_connected = False
+                self.camera_handle = -1
+                self._release_devices()
+
+    def _release_devices(self) -> None:
+        """Release this camera's hold on the device list, which is closed once every camera has released it."""
+        if not self._holds_devices:
+            return
+        self._holds_devices = False
         try:
-            self.set_trigger_mode(consts.ECamTriggerMode.Off)
-            methods.close_camera(self.camera_handle)
-            methods.close_devices()
+            self._device_manager.release()
         except Exception as e:
-            print(f"Error during camera disconnect: {str(e)}")  # Or use logging.error() if you prefer
-        finally:
-            self.is_connected = False
-            self.camera_handle = -1
+            print(f"Error closing devices: {str(e)}")
 
     def __repr__(self) -> str:
         return (
@@ -124,73 +296,268 @@ class NikonCamera:
 
         if update_map:
             self.update_feature_map()
+        elif self.tracking_features:  # Kept current by ecetFeatureChanged events, see enable_feature_tracking
+            return self._feature_values[feature_id]
 
         # Get the latest feature value
-        feature_vector = methods.get_all_features(self.camera_handle)
+        with self._sdk_lock:
+            feature_vector = methods.get_all_features(self.camera_handle)
+        feature = self._find_feature(feature_vector, feature_id)
+        if feature is None:
+            raise ValueError(f"Feature {feature_id.name} not found in current feature values")
+        return methods.get_feature_value(feature)
+
+    def _find_feature(self, feature_vector: structs.Vector_CAM_FeatureValue,
+                      feature_id: consts.ECamFeatureId) -> structs.CAM_FeatureValue | None:
+        """Find a feature in a vector from get_all_features, at its slot in the feature map's vector if it is there."""
+        slot = self._feature_slots.get(feature_id)
+        if slot is not None and slot < feature_vector.uiCountUsed:
+            feature = feature_vector.pstFeatureValue[slot]
+            if feature.uiFeatureId == feature_id:
+                return feature
         for i in range(feature_vector.uiCountUsed):
             if feature_vector.pstFeatureValue[i].uiFeatureId == feature_id:
-                return methods.get_feature_value(feature_vector.pstFeatureValue[i])
+                return feature_vector.pstFeatureValue[i]
+        return None
+
+    def get_cached_feature_value(self, feature_id: consts.ECamFeatureId):
+        """Get the last known value of a feature without any SDK call or lock, e.g. from a GUI thread while another
+        thread streams. Values are updated by the feature setters and update_feature_map.
+        Raises:
+            ValueError: If the feature is not available for the camera.
+        """
+        try:
+            return self._feature_values[feature_id]
+        except KeyError:
+            raise ValueError(f"Feature {consts.ECamFeatureId(feature_id).name} is not available for this camera.") from None
 
-        raise ValueError(f"Feature {feature_id.name} not found in current feature values")
+    def _cache_feature_values(self, feature_ids) -> None:
+        """Update the cached values of features from the feature map."""
+        values = dict(self._feature_values)
+        for feature_id in feature_ids:
+            values[feature_id] = methods.get_feature_value(self.feature_map[feature_id])
+        self._feature_values = values  # Replaced rather than mutated so lock-free readers see a consistent dict
 
     def update_feature_map(self) -> None:
-        # Get features and values
-        self._features_vec: structs.Vector_CAM_FeatureValue = methods.get_all_features(self.camera_handle)
-        self._feature_descriptions: list[structs.CAM_FeatureDesc] = methods.get_all_feature_descriptions(self.camera_handle, self._features_vec)
-
-        # Convert features vector to list to be consistent with feature descriptions
-        self._features: list[structs.CAM_FeatureValue] = [self._features_vec.pstFeatureValue[i] for i in range(self._features_vec.uiCountUsed)]
-
-        self.feature_map = {
-            consts.ECamFeatureId(feature.uiFeatureId): feature  # Store the whole feature object, not just its value
-            for feature in self._features
-        }
-
-    def set_feature_value(self, feature_id: consts.ECamFeatureId, value) -> None:
+        with self._control_lock:
+            # Get features and values
+            with self._sdk_lock:
+                self._features_vec: structs.Vector_CAM_FeatureValue = methods.get_all_features(self.camera_handle)
+                self._feature_descriptions: list[structs.CAM_FeatureDesc] = methods.get_all_feature_descriptions(self.camera_handle, self._features_vec)
+            self.validator = FeatureValidator(self._feature_descriptions)
+
+            # Convert features vector to list to be consistent with feature descriptions
+            self._features: list[structs.CAM_FeatureValue] = [self._features_vec.pstFeatureValue[i] for i in range(self._features_vec.uiCountUsed)]
+
+            self.feature_map = {
+                consts.ECamFeatureId(feature.uiFeatureId): feature  # Store the whole feature object, not just its value
+                for feature in self._features
+            }
+            # Slot of each feature in the vector, and one-element vectors over single slots, see set_feature_fast
+            self._feature_slots = {feature_id: i for i, feature_id in enumerate(self.feature_map)}
+            self._single_vectors: dict[consts.ECamFeatureId, structs.Vector_CAM_FeatureValue] = {}
+            self._feature_values = {}
+            self._cache_feature_values(self.feature_map)
+
+    def get_feature_snapshot(self) -> structs.Vector_CAM_FeatureValue:
+        """Copy the last known values of all settable features into a vector, e.g. to restore them with a single
+        CAM_SetFeatures call. Command features such as OnePushSoftTrigger are excluded.
+        Returns:
+            Vector_CAM_FeatureValue: The feature values.
+        """
+        settable = [feature for feature in self.feature_map.values()
+                    if feature.stVariant.eVarType not in (consts.ECamVariantRunType.evrt_voidptr,
+                                                          consts.ECamVariantRunType.evrt_unknown)]
+        snapshot = structs.Vector_CAM_FeatureValue()
+        snapshot.uiCapacity = len(settable)
+        snapshot.uiCountUsed = len(settable)
+        snapshot.pstFeatureValue = (structs.CAM_FeatureValue * len(settable))(*settable)
+        return snapshot
+
+    def set_feature_value(self, feature_id: consts.ECamFeatureId, value, clamp: bool = False, snap: bool = False) -> None:
         """Set the value of a feature. Some features are only settable to certain ranges,
-        and so prefer to use a managed attribute/property to set these."""
+        and so prefer to use a managed attribute/property to set these.
+        Values are checked against the feature's description before being sent, see FeatureValidator.validate
+        for clamp and snap."""
         # Check if this is available for the camera
         if feature_id not in self.feature_map:
             raise ValueError(f"Feature {feature_id.name} is not available for this camera.")
-
-        try:
-            methods.set_feature_value(self.camera_handle, self.feature_map[feature_id], value)
-        except Exception as exc:
-            raise exc
-        else:  # If no error, update the feature in the map with the new value
-            # Get fresh copy of features to ensure we have the updated state
-            feature_vector = methods.get_all_features(self.camera_handle)
-            for i in range(feature_vector.uiCountUsed):
-                if feature_vector.pstFeatureValue[i].uiFeatureId == feature_id:
-                    self.feature_map[feature_id] = feature_vector.pstFeatureValue[i]
-                    break
-
-    def set_feature_values(self, features: dict[consts.ECamFeatureId, Any]) -> None:
-        """Set multiple feature values at once."""
+        value = self.validator.validate(feature_id, value, clamp, snap)
+
+        with self._control_lock, self._format_guard((feature_id,)):
+            try:
+                with self._sdk_lock:
+                    methods.set_feature_value(self.camera_handle, self.feature_map[feature_id], value)
+            except Exception as exc:
+                raise exc
+            else:  # If no error, update the feature in the map with the new value
+                # Get fresh copy of features to ensure we have the updated state
+                with self._sdk_lock:
+                    feature_vector = methods.get_all_features(self.camera_handle)
+                feature = self._find_feature(feature_vector, feature_id)
+                if feature is not None:  # In place, so the map keeps pointing into its vector
+                    self.feature_map[feature_id].stVariant = feature.stVariant
+                self._cache_feature_values((feature_id,))
+                if feature_id == consts.ECamFeatureId.Format:
+                    self._on_format_changed()
+
+    def set_feature_values(self, features: dict[consts.ECamFeatureId, Any], clamp: bool = False, snap: bool = False) -> None:
+        """Set multiple feature values at once. Values are checked as in set_feature_value. If the SDK rejects them,
+        the feature map keeps the previous values."""
         missing_features = set(features) - set(self.feature_map)
         if missing_features:
             raise ValueError(f"Features {', '.join(f.name for f in missing_features)} are not available for this camera.")
-
-        try:
-            methods.set_feature_values(self.camera_handle, {self.feature_map[i]: v for i, v in features.items()})
-        except Exception as exc:
-            raise exc
-        else:
-            for i, v in features.items():
-                self.feature_map[i] = v
+        features = {i: self.validator.validate(i, v, clamp, snap) for i, v in features.items()}
+
+        with self._control_lock, self._format_guard(features):
+            # The feature structs in the map are updated in place with the new values
+            with self._sdk_lock:
+                methods.set_feature_values(self.camera_handle, {self.feature_map[i]: v for i, v in features.items()})
+            self._cache_feature_values(features)
+            if consts.ECamFeatureId.Format in features:
+                self._on_format_changed()
+
+    def apply_profile(self, profile: FeatureProfile, only_changed: bool = True) -> list[consts.ECamFeatureId]:
+        """Set the values of a feature profile with a single SDK call.
+        Args:
+            profile (FeatureProfile): The profile.
+            only_changed (bool): Only send the features whose current value differs from the profile.
+        Returns:
+            list[ECamFeatureId]: The features that were sent.
+        """
+        with self._control_lock:
+            feature_ids = profile._apply(self, only_changed)
+            self._cache_feature_values(feature_ids)
+            return feature_ids
+
+    def _format_guard(self, feature_ids) -> contextlib.AbstractContextManager:
+        """The data lock if the features include the Format, otherwise a no-op context. Held from setting the Format
+        until the image buffer is reallocated, so that no get_image runs with a buffer of the old size."""
+        if consts.ECamFeatureId.Format in feature_ids:
+            return self._data_lock
+        return contextlib.nullcontext()
+
+    def _on_format_changed(self) -> None:
+        """Update the image geometry and reallocate the image buffer for a new Format."""
+        if self._stImage is None:  # Still initialising, done once the format is set
+            return
+        with self._data_lock:  # Waits for a get_image in progress, which uses the old buffer
+            self._update_image_geometry()
+            self._initialize_image_structure()
+
+    def set_feature_fast(self, feature_id: consts.ECamFeatureId, value) -> None:
+        """Set a single feature with one CAM_SetFeatures call of just that feature, for features switched often such
+        as TriggerMode. Unlike set_feature_value, the feature values are not read back from the camera afterwards,
+        the map is updated with the value sent. No other feature is sent, so none can be reverted to a stale value.
+        Args:
+            feature_id (ECamFeatureId): The feature.
+            value: The value, checked as in set_feature_value.
+        Raises:
+            ValueError: If the feature is not available or the value is not valid.
+            Exception: If the SDK rejects the value, the feature map keeps the previous value.
+        """
+        slot = self._feature_slots.get(feature_id)
+        if slot is None:
+            raise ValueError(f"Feature {consts.ECamFeatureId(feature_id).name} is not available for this camera.")
+        value = self.validator.validate(feature_id, value)
+
+        with self._control_lock, self._format_guard((feature_id,)):
+            vector = self._single_vectors.get(feature_id)
+            if vector is None:  # Points into the feature map's vector, so the map is updated in place
+                vector = structs.Vector_CAM_FeatureValue()
+                vector.uiCapacity = 1
+                vector.uiCountUsed = 1
+                vector.pstFeatureValue = ctypes.pointer(self._features[slot])
+                self._single_vectors[feature_id] = vector
+            feature = self._features[slot]
+            previous = structs.CAM_Variant.from_buffer_copy(feature.stVariant)
+            methods.set_variant_value(feature.stVariant, value)
+            try:
+                with self._sdk_lock:
+                    methods.set_features(self.camera_handle, vector)
+            except Exception:
+                feature.stVariant = previous
+                raise
+            self._cache_feature_values((feature_id,))
+            if feature_id == consts.ECamFeatureId.Format:
+                self._on_format_changed()
 
     def set_trigger_mode(self, trigger_mode: consts.ECamTriggerMode) -> None:
-        """Set the trigger mode."""
-        # Get index of featureValue within features vector for trigger mode
-        # methods.set_feature_value(self.camera_handle, self.feature_map[consts.ECamFeatureId.TriggerMode], trigger_mode)
-        # Get index of featureValue within features vector for trigger mode
-        # TODO Make efficient
-        for i in range(self._features_vec.uiCountUsed):
-            if self._features_vec.pstFeatureValue[i].uiFeatureId == consts.ECamFeatureId.TriggerMode:
-                variant = self._features_vec.pstFeatureValue[i].stVariant
-                variant.Value.i32Value = ctypes.c_int32(trigger_mode)
-
-        methods.pDsCamDLL.CAM_SetFeatures(self.camera_handle, ctypes.byref(self._features_vec))
+        """Set the trigger mode, sending only the TriggerMode feature, see set_feature_fast."""
+        self.set_feature_fast(consts.ECamFeatureId.TriggerMode, trigger_mode)
+
+    def one_push_ae(self, timeout: float = 5.0, set_mode: bool = True) -> OnePushResult:
+        """Run the camera's auto exposure once and wait for it to settle, for as long as the camera takes.
+        Sends CAM_CMD_ONEPUSH_AE and waits for ecetAeStay, collecting the ecetFeatureChanged events meanwhile.
+        Args:
+            timeout (float): Seconds to wait for ecetAeStay at most.
+            set_mode (bool): Set ExposureMode to OnePushAE first if it is not, the command needs this mode.
+        Raises:
+            RuntimeError: If the camera reports ecetAeDisable, e.g. ExposureMode is Manual.
+        Returns:
+            OnePushResult: ExposureTime and Gain after auto exposure.
+        """
+        mode = consts.ECamExposureMode.OnePushAE
+        if set_mode and self.get_cached_feature_value(consts.ECamFeatureId.ExposureMode) != mode:
+            self.set_feature_fast(consts.ECamFeatureId.ExposureMode, mode)
+
+        def ae_done(events: list[structs.CAM_Event]) -> bool:
+            return any(event.eEventType in (consts.ECamEventType.ecetAeStay, consts.ECamEventType.ecetAeDisable)
+                       for event in events)
+
+        return self._one_push(consts.CAM_CMD_ONEPUSH_AE, (consts.ECamFeatureId.ExposureTime, consts.ECamFeatureId.Gain),
+                              ae_done, timeout)
+
+    def one_push_white_balance(self, timeout: float = 5.0, set_mode: bool = True) -> OnePushResult:
+        """Run the camera's white balance once and wait for it to finish.
+        Sends CAM_CMD_ONEPUSH_WHITEBALANCE and waits for the ecetFeatureChanged events of both WhiteBalanceRed and
+        WhiteBalanceBlue. If the camera does not change them, e.g. it is already balanced, the wait lasts until the
+        timeout and the result is not settled.
+        Args:
+            timeout (float): Seconds to wait at most.
+            set_mode (bool): Set WhiteBalance to wbOnePush first if it is not, the command needs this mode.
+        Returns:
+            OnePushResult: WhiteBalanceRed and WhiteBalanceBlue after white balance.
+        """
+        mode = consts.ECamWhiteBalance.wbOnePush
+        if set_mode and self.get_cached_feature_value(consts.ECamFeatureId.WhiteBalance) != mode:
+            self.set_feature_fast(consts.ECamFeatureId.WhiteBalance, mode)
+        feature_ids = (consts.ECamFeatureId.WhiteBalanceRed, consts.ECamFeatureId.WhiteBalanceBlue)
+
+        def wb_done(events: list[structs.CAM_Event]) -> bool:
+            changed = {event.stFeatureChanged.uiFeatureId for event in events
+                       if event.eEventType == consts.ECamEventType.ecetFeatureChanged}
+            return all(feature_id in changed for feature_id in feature_ids)
+
+        return self._one_push(consts.CAM_CMD_ONEPUSH_WHITEBALANCE, feature_ids, wb_done, timeout)
+
+    def _one_push(self, command: str, feature_ids: tuple[consts.ECamFeatureId, ...], done,
+                  timeout: float) -> OnePushResult:
+        """Send a one-push command and collect its AE state and feature change events until done(events)."""
+        event_types = (consts.ECamEventType.ecetAeRunning, consts.ECamEventType.ecetAeStay,
+                       consts.ECamEventType.ecetAeDisable, consts.ECamEventType.ecetFeatureChanged)
+        start = time.perf_counter()
+        with EventCapture(self.events, event_types) as capture:
+            with self._sdk_lock:
+                methods.send_command(self.camera_handle, command)
+            settled = capture.wait(done, timeout)
+        duration = time.perf_counter() - start
+
+        values = {}
+        for event in capture.events:
+            match event.eEventType:
+                case consts.ECamEventType.ecetAeDisable:
+                    raise RuntimeError("Auto exposure is disabled, check the ExposureMode.")
+                case consts.ECamEventType.ecetFeatureChanged:
+                    if not self.tracking_features:  # Otherwise already applied by the tracking subscriber
+                        self._on_feature_changed(event)
+                    if event.stFeatureChanged.uiFeatureId in feature_ids:
+                        feature_id = consts.ECamFeatureId(event.stFeatureChanged.uiFeatureId)
+                        values[feature_id] = methods.get_variant_value(event.stFeatureChanged.stVariant)
+        for feature_id in feature_ids:  # Features the camera did not change
+            if feature_id not in values:
+                values[feature_id] = self.get_feature_value(feature_id)
+        return OnePushResult(values, settled, duration)
 
     def set_trigger_on(self) -> None:
         """Set the trigger mode to on."""
@@ -199,67 +566,344 @@ class NikonCamera:
     def set_trigger_off(self) -> None:
         """Set the trigger mode to off."""
         # Stop frame transfer before changing trigger mode
-        cmds.stop_frame_transfer(self.camera_handle)
-        self.set_trigger_mode(consts.ECamTriggerMode.Off)
+        with self._control_lock:
+            with self._sdk_lock:
+                cmds.stop_frame_transfer(self.camera_handle)
+            self.set_trigger_mode(consts.ECamTriggerMode.Off)
 
-    def get_image(self) -> np.ndarray:
+    def enable_latency_recording(self, capacity: int = 4096) -> LatencyRecorder:
+        """Start recording the latency of each stage of get_image.
+        Args:
+            capacity (int): Number of frames kept in the ring buffer.
+        Returns:
+            LatencyRecorder: The recorder, for percentiles and histograms of each stage.
+        """
+        self.latency_recorder = LatencyRecorder(self.GET_IMAGE_STAGES, capacity)
+        return self.latency_recorder
+
+    def disable_latency_recording(self) -> None:
+        """Stop recording the latency of get_image."""
+        self.latency_recorder = None
+
+    def enable_clock_sync(self, **kwargs) -> ClockSync:
+        """Start fitting the camera clock against the host clock, pairing the tick of each ecetImageReceived event
+        with the host time it was received in get_image. See get_frame_time.
+        Args:
+            **kwargs: Arguments of ClockSync, e.g. window.
+        Returns:
+            ClockSync: The clock mapping.
+        """
+        self.clock_sync = ClockSync(**kwargs)
+        return self.clock_sync
+
+    def disable_clock_sync(self) -> None:
+        """Stop fitting the camera clock."""
+        self.clock_sync = None
+
+    def enable_feature_tracking(self, poll_interval: float = 0.05) -> None:
+        """Keep the feature map and cached values current from the camera's ecetFeatureChanged events, e.g. while
+        ContinuousAE or auto white balance change ExposureTime, Gain and WhiteBalance* on the camera. Events are
+        polled by the event dispatcher's background thread, and get_feature_value then returns the cached value
+        without an SDK call.
+        Args:
+            poll_interval (float): Interval in seconds at which events are polled, values lag the camera by up to this.
+        """
+        if self.tracking_features:
+            return
+        self.events.subscribe(consts.ECamEventType.ecetFeatureChanged, self._on_feature_changed)
+        with self._control_lock:  # Start from the current values, later changes arrive as events
+            with self._sdk_lock:
+                feature_vector = methods.get_all_features(self.camera_handle)
+            for feature_id, feature in self.feature_map.items():
+                current = self._find_feature(feature_vector, feature_id)
+                if current is not None:
+                    feature.stVariant = current.stVariant
+            self._cache_feature_values(self.feature_map)
+        self.tracking_features = True
+        self.events.start(poll_interval)
+
+    def disable_feature_tracking(self) -> None:
+        """Stop updating feature values from events, get_feature_value reads them from the camera again."""
+        if not self.tracking_features:
+            return
+        self.tracking_features = False
+        self.events.unsubscribe(consts.ECamEventType.ecetFeatureChanged, self._on_feature_changed)
+
+    def _on_feature_changed(self, event: structs.CAM_Event) -> None:
+        changed = event.stFeatureChanged
+        try:
+            feature_id = consts.ECamFeatureId(changed.uiFeatureId)
+        except ValueError:
+            return  # Not a feature known to the package
+        with self._control_lock, self._format_guard((feature_id,)):
+            feature = self.feature_map.get(feature_id)
+            if feature is None:
+                return
+            feature.stVariant = changed.stVariant  # Copied into the struct in place
+            self._cache_feature_values((feature_id,))
+            if feature_id == consts.ECamFeatureId.Format:
+                self._on_format_changed()
+
+    def enable_metrics(
+            self,
+            port: int | None = 9100,
+            host: str = "127.0.0.1",
+            server: MetricsServer | None = None,
+            trace_sdk_calls: bool = True,
+            poll_interval: float = 0.1,
+            ) -> CameraMetrics:
+        """Start collecting health and throughput metrics and serve them in the Prometheus text format.
+        Args:
+            port (int | None): Port of a new HTTP endpoint at http://host:port/metrics, None to not serve the metrics.
+            host (str): Address of the new endpoint, the default only accepts local connections.
+            server (MetricsServer | None): Existing server to add the metrics to instead, e.g. one shared by several cameras.
+            trace_sdk_calls (bool): Also record the count and duration of every SDK call.
+            poll_interval (float): Interval in seconds at which transfer error and bus reset events are polled.
+        Returns:
+            CameraMetrics: The metrics.
+        """
+        if self.metrics is not None:
+            return self.metrics
+        self.metrics = CameraMetrics(self)
+        self.metrics.attach(trace_sdk_calls)
+        self.events.start(poll_interval)
+
+        if server is not None:
+            self._metrics_server = server
+        elif port is not None:
+            self._metrics_server = MetricsServer(host=host, port=port)
+            self._owns_metrics_server = True
+        if self._metrics_server is not None:
+            self._metrics_server.add(self.metrics)
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        """Stop collecting metrics and stop the HTTP endpoint if it was created by enable_metrics."""
+        if self.metrics is None:
+            return
+        self.metrics.detach()
+        if self._metrics_server is not None:
+            self._metrics_server.remove(self.metrics)
+            if self._owns_metrics_server:
+                self._metrics_server.close()
+        self._metrics_server = None
+        self._owns_metrics_server = False
+        self.metrics = None
+
+    def get_image(self, out: np.ndarray | None = None, on_received: Callable[[], None] | None = None) -> np.ndarray:
         """
         Get an image from the camera.
+        Args:
+            out (np.ndarray | None): Optional preallocated array to copy the image into, avoiding an allocation per frame.
+                Must have the shape and type of the image, see image_shape and image_dtype.
+            on_received (Callable[[], None] | None): Called once the camera reports the frame received
+                (ecetImageReceived), before it is fetched and decoded, e.g. to start moving a stage. It runs with the
+                data lock held and must return quickly.
         Returns:
-            The image as a numpy array.
+            The image as a numpy array, (height, width, 3) for colour formats or (height, width) otherwise.
+        """
+        with self._data_lock:
+            return self._get_image(out, on_received)
+
+    def get_image_with_metadata(self, out: np.ndarray | None = None) -> tuple[np.ndarray, ImageMetadata]:
         """
+        Get an image from the camera together with its frame count, camera time and raw CAM_ImageInfo.
+        Both are read under the data lock, so another thread's get_image cannot replace the metadata in between.
+        Args:
+            out (np.ndarray | None): Optional preallocated array to copy the image into, see get_image.
+        Returns:
+            tuple[np.ndarray, ImageMetadata]: The image and its metadata.
+        """
+        with self._data_lock:
+            image = self._get_image(out)
+            size = self._stImage.uiImageSize
+            info = self._image_buffer[size:size + structs.CAM_IMG_INFO_SIZE].tobytes()
+            return image, ImageMetadata(self._stImage.uiFrameCount, self._stImage.uiEndTime64, info)
+
+    def _get_image(self, out: np.ndarray | None, on_received: Callable[[], None] | None = None) -> np.ndarray:
+        """get_image, with the data lock held. Each SDK call takes the SDK lock so feature writes can interleave."""
         if self._stImage is None:
             raise RuntimeError("Image structure not initialized")
+        if self.transfer_paused:
+            raise RuntimeError("Frame transfer is paused, see resume_transfer")
+
+        recorder = self.latency_recorder
+        if recorder is not None:
+            t_start = time.perf_counter_ns()
 
         # Start frame transfer
         # cmds.start_frame_transfer(self.camera_handle)
 
         # Trigger frame
-        methods.send_command(self.camera_handle, consts.CAM_CMD_ONEPUSH_SOFTTRIGGER)
+        with self._sdk_lock:
+            methods.send_command(self.camera_handle, consts.CAM_CMD_ONEPUSH_SOFTTRIGGER)
+        if recorder is not None:
+            t_trigger = time.perf_counter_ns()
 
         # Wait for frame ready event
         timeout = 10  # seconds
         start_time_event = time.time()
         while (time.time() - start_time_event) < timeout:
-            event_or_none: structs.CAM_Event | None = methods.poll_event(
-                self.camera_handle, consts.ECamEventType.ecetImageReceived)
+            with self._sdk_lock:
+                event_or_none: structs.CAM_Event | None = methods.poll_event(
+                    self.camera_handle, consts.ECamEventType.ecetImageReceived)
             if (event_or_none is not None) and (event_or_none.eEventType == consts.ECamEventType.ecetImageReceived):
+                if self.clock_sync is not None:
+                    self.clock_sync.add_sample(event_or_none.stImageReceived.uiTick64, time.perf_counter_ns())
+                if on_received is not None:
+                    on_received()
                 break
+        if recorder is not None:
+            t_received = time.perf_counter_ns()
 
         # Get image using reusable structure
         try:
-            methods.get_image(self.camera_handle, self._stImage)
+            with self._sdk_lock:
+                methods.get_image(self.camera_handle, self._stImage)
         except Exception as exc:
             raise Exception(f"Error getting image: {str(exc)}") from exc
+        if recorder is not None:
+            t_fetched = time.perf_counter_ns()
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.on_frame(self._stImage.uiFrameCount, self._stImage.uiImageSize)
 
-        # Reshape buffer into an RGB24 image
-        # TODO Make dynamic
-        height = self.height
-        width = self.width
-        expected_size = height * width * 3
-
-        img = np.ctypeslib.as_array(self._stImage.pDataBuffer, shape=(self._stImage.uiDataBufferSize,))
-        if img.size < expected_size:
-            raise ValueError("Image buffer is smaller than expected, cannot reshape.")
-        img = img[:expected_size].reshape((height, width, 3))[..., ::-1]  # RGB24 format
-
-        img = img.astype(np.uint8)
+        # Copy the frame out of the reusable buffer
+        img = decoding.decode_image(self._image_buffer, self.colour, self.height, self.width, out)
+        if recorder is not None:
+            t_decoded = time.perf_counter_ns()
 
         # Wait for trigger ready event
         start_time_event = time.time()
         while time.time() - start_time_event < timeout:
-            event_or_none: structs.CAM_Event | None = methods.poll_event(
-                self.camera_handle, consts.ECamEventType.ecetTriggerReady)
+            with self._sdk_lock:
+                event_or_none: structs.CAM_Event | None = methods.poll_event(
+                    self.camera_handle, consts.ECamEventType.ecetTriggerReady)
             if (event_or_none is not None) and (event_or_none.eEventType == consts.ECamEventType.ecetTriggerReady):
                 if time.time() - start_time_event > timeout:
                     print("Timeout waiting for trigger ready event")
                 break
 
+        if recorder is not None:
+            recorder.record(t_start, t_trigger, t_received, t_fetched, t_decoded, time.perf_counter_ns())
+
         # Stop frame transfer - only needed when changing trigger mode to off
         # cmds.stop_frame_transfer(self.camera_handle)
 
         return img
 
+    def capture_n(self, n: int, out: np.ndarray | None = None, buffers: int = 4, timeout: float = 10.0) -> np.ndarray:
+        """Capture n frames with soft triggers, sending each trigger as soon as the camera is ready for it.
+        Unlike calling get_image n times, the next trigger is sent on ecetTriggerReady while the previous frame is
+        still being fetched and decoded, so throughput is limited by the sensor rather than the host. Frames are
+        fetched oldest first. If the number of driver buffers differs, frame transfer is restarted with it and
+        restarted with the previous number afterwards, so get_image keeps fetching the newest frame.
+        Args:
+            n (int): Number of frames.
+            out (np.ndarray | None): Preallocated stack of shape (n, *image_shape) and type image_dtype.
+            buffers (int): Driver image buffers (1 to 128), at most this many frames are triggered but not fetched.
+            timeout (float): Seconds to wait at most for each event.
+        Raises:
+            TimeoutError: If the camera does not report a frame or trigger ready within the timeout.
+        Returns:
+            np.ndarray: The frames, out if given.
+        """
+        if n < 1:
+            raise ValueError("At least one frame must be captured.")
+        if not 1 <= buffers <= 128:
+            raise ValueError("Driver image buffers must be between 1 and 128.")
+        shape = (n, *self.image_shape)
+        if out is None:
+            out = np.empty(shape, self.image_dtype)
+        elif out.shape != shape or out.dtype != self.image_dtype:
+            raise ValueError(f"out must have shape {shape} and type {np.dtype(self.image_dtype)}.")
+
+        with self._data_lock:
+            if self._stImage is None:
+                raise RuntimeError("Image structure not initialized")
+            if self.transfer_paused:
+                raise RuntimeError("Frame transfer is paused, see resume_transfer")
+            previous_buffers = self._image_buffers
+            if buffers != previous_buffers:
+                self._restart_FrameTransfer(buffers)
+
+            try:
+                self._capture(out, buffers, timeout)
+            finally:
+                if buffers != previous_buffers:  # Leave get_image with the driver buffers it had
+                    self._restart_FrameTransfer(previous_buffers)
+        return out
+
+    def _capture(self, out: np.ndarray, buffers: int, timeout: float) -> None:
+        """capture_n, with the data lock held and frame transfer started with the driver buffers."""
+        n = len(out)
+        triggered = ready = fetched = 0
+
+        def trigger_when_ready() -> None:
+            """Count a pending trigger ready event, then trigger the next frame if the camera is ready for it."""
+            nonlocal triggered, ready
+            if ready < triggered:
+                with self._sdk_lock:
+                    event = methods.poll_event(self.camera_handle, consts.ECamEventType.ecetTriggerReady)
+                if event is not None:
+                    ready += 1
+            if triggered < n and ready == triggered and triggered - fetched < buffers:
+                with self._sdk_lock:
+                    methods.send_command(self.camera_handle, consts.CAM_CMD_ONEPUSH_SOFTTRIGGER)
+                triggered += 1
+
+        last_event = time.perf_counter()
+        while fetched < n or ready < triggered:
+            progress = triggered + ready + fetched
+            trigger_when_ready()
+
+            if fetched < triggered:
+                with self._sdk_lock:
+                    event = methods.poll_event(self.camera_handle, consts.ECamEventType.ecetImageReceived)
+                if event is not None:
+                    if self.clock_sync is not None:
+                        self.clock_sync.add_sample(event.stImageReceived.uiTick64, time.perf_counter_ns())
+                    trigger_when_ready()  # Start the next exposure before this frame is fetched and decoded
+                    try:
+                        with self._sdk_lock:
+                            methods.get_image(self.camera_handle, self._stImage, False)  # Oldest frame first
+                    except Exception as exc:
+                        raise Exception(f"Error getting image: {str(exc)}") from exc
+                    if self.metrics is not None:
+                        self.metrics.on_frame(self._stImage.uiFrameCount, self._stImage.uiImageSize)
+                    decoding.decode_image(self._image_buffer, self.colour, self.height, self.width, out[fetched])
+                    fetched += 1
+
+            if triggered + ready + fetched != progress:
+                last_event = time.perf_counter()
+            elif time.perf_counter() - last_event > timeout:
+                raise TimeoutError(f"No frame or trigger ready for {timeout} s, {fetched} of {n} frames captured.")
+
+    def get_image_info(self) -> structs.CAM_ImageInfo:
+        """Get the metadata appended to the latest image by the camera, e.g. its frame number, exposure time and gain.
+        Returns:
+            CAM_ImageInfo: A copy of the metadata of the image last returned by get_image.
+        """
+        with self._data_lock:
+            if self._stImage is None or self._stImage.uiImageSize == 0:
+                raise RuntimeError("No image has been received")
+            return structs.CAM_ImageInfo.from_buffer_copy(self._image_buffer, self._stImage.uiImageSize)
+
+    def get_frame_time(self) -> FrameTime:
+        """Get the host time at the end of the exposure of the image last returned by get_image.
+        Raises:
+            RuntimeError: If clock sync is not enabled or has too few samples yet, see enable_clock_sync.
+        Returns:
+            FrameTime: The estimated perf_counter_ns and time_ns of CAM_Image.uiEndTime64, with an error bound in ns.
+        """
+        if self.clock_sync is None:
+            raise RuntimeError("Clock sync is not enabled")
+        with self._data_lock:
+            if self._stImage is None or self._stImage.uiImageSize == 0:
+                raise RuntimeError("No image has been received")
+            end_time = self._stImage.uiEndTime64
+        return self.clock_sync.to_host(end_time)
+
     def stop_camera(self) -> None:
         """Stop the camera."""
         pass
@@ -0,0 +1,222 @@
+import time
+from typing import Callable, NamedTuple, Protocol
+
+import numpy as np
+
+
+class ChangeResult(NamedTuple):
+    active: bool  # Activity state after this frame, with hysteresis
+    fraction: float  # Fraction of the grid that differs from the background
+    started: bool  # Activity started on this frame
+    stopped: bool  # Activity stopped on this frame
+    bbox: tuple[int, int, int, int] | None  # (top, left, bottom, right) in pixels of the changed grid points
+
+
+class Segment(NamedTuple):
+    number: int
+    start_frame: int  # Frame count of the first frame written
+    end_frame: int | None  # Frame count of the last frame written, None while recording
+    start_time: float  # time.time() of the first frame
+    end_time: float | None
+    trigger_fraction: float  # Fraction of the grid changed on the frame that started the segment
+    peak_fraction: float  # Largest fraction changed during the segment
+    trigger_bbox: tuple[int, int, int, int] | None  # Where the change that started the segment was, in pixels
+    frames: int  # Frames written
+
+
+class ChangeDetector:
+    """Detects activity by comparing frames with a running background on a decimated grid.
+
+    Each frame is sampled every stride pixels (the green channel of colour formats) into integers, and compared with a
+    background kept in fixed point as an exponential moving average, 1 / 2**background_shift of the way to each new
+    frame. A grid point has changed if it differs from the background by more than threshold. Activity starts after
+    start_frames consecutive frames with at least start_fraction of the grid changed, and stops after stop_frames
+    consecutive frames below stop_fraction, so that noise does not toggle it.
+
+    Example:
+        detector = ChangeDetector(stride=16, threshold=20, start_fraction=0.01)
+        result = detector.update(camera.get_image())
+        if result.started:
+            print("Activity at", result.bbox)
+    """
+    def __init__(
+            self,
+            stride: int = 16,
+            threshold: int = 20,
+            start_fraction: float = 0.01,
+            stop_fraction: float = 0.005,
+            start_frames: int = 2,
+            stop_frames: int = 10,
+            background_shift: int = 4,
+            update_while_active: bool = False,
+            ) -> None:
+        """
+        Args:
+            stride (int): Spacing of the grid in pixels, in both directions.
+            threshold (int): Difference from the background, in pixel values, above which a grid point has changed.
+            start_fraction (float): Fraction of the grid that must change for activity to start.
+            stop_fraction (float): Fraction of the grid below which activity stops, at most start_fraction.
+            start_frames (int): Consecutive frames above start_fraction needed to start.
+            stop_frames (int): Consecutive frames below stop_fraction needed to stop.
+            background_shift (int): The background moves 1 / 2**background_shift of the way to each frame.
+            update_while_active (bool): Keep updating the background during activity, so a scene change that stays
+                (e.g. a moved object) is eventually absorbed and the activity stops.
+        """
+        if stride < 1:
+            raise ValueError("Stride must be at least 1.")
+        if not 0 <= stop_fraction <= start_fraction <= 1:
+            raise ValueError("Fractions must satisfy 0 <= stop_fraction <= start_fraction <= 1.")
+        if not 0 <= background_shift < 16:
+            raise ValueError("background_shift must be between 0 and 15.")
+        self.stride = stride
+        self.threshold = threshold
+        self.start_fraction = start_fraction
+        self.stop_fraction = stop_fraction
+        self.start_frames = start_frames
+        self.stop_frames = stop_frames
+        self.background_shift = background_shift
+        self.update_while_active = update_while_active
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the background, the next frame becomes the new background."""
+        self.active = False
+        self._above = 0
+        self._below = 0
+        self._background: np.ndarray | None = None  # Background * 2**background_shift, int64 so 16-bit frames fit
+        self._sample: np.ndarray | None = None
+        self._difference: np.ndarray | None = None
+        self._changed: np.ndarray | None = None
+
+    def _grid(self, image: np.ndarray) -> np.ndarray:
+        grid = image[::self.stride, ::self.stride]
+        if grid.ndim == 3:
+            grid = grid[..., 1 if grid.shape[2] > 1 else 0]
+        return grid
+
+    def update(self, image: np.ndarray) -> ChangeResult:
+        """Compare a frame with the background, then update the background.
+        Args:
+            image (np.ndarray): The frame, as returned by get_image.
+        Returns:
+            ChangeResult: The activity state and how much of the frame changed.
+        """
+        grid = self._grid(image)
+        if self._background is None or self._background.shape != grid.shape:
+            self._sample = np.empty(grid.shape, np.int32)
+            self._difference = np.empty(grid.shape, np.int32)
+            self._changed = np.empty(grid.shape, np.bool_)
+            np.copyto(self._sample, grid, casting="unsafe")
+            self._background = self._sample.astype(np.int64) << self.background_shift
+            return ChangeResult(self.active, 0.0, False, False, None)
+
+        sample, difference, changed = self._sample, self._difference, self._changed
+        np.copyto(sample, grid, casting="unsafe")
+        np.right_shift(self._background, self.background_shift, out=difference)
+        np.subtract(sample, difference, out=difference)
+        np.abs(difference, out=difference)
+        np.greater(difference, self.threshold, out=changed)
+        count = int(np.count_nonzero(changed))
+        fraction = count / changed.size
+
+        started = stopped = False
+        if not self.active:
+            self._above = self._above + 1 if fraction >= self.start_fraction else 0
+            if self._above >= self.start_frames:
+                self.active = started = True
+                self._below = 0
+        else:
+            self._below = self._below + 1 if fraction < self.stop_fraction else 0
+            if self._below >= self.stop_frames:
+                self.active = False
+                stopped = True
+                self._above = 0
+
+        if not self.active or self.update_while_active or stopped:
+            # background += sample - background / 2**shift, in fixed point
+            self._background += sample
+            self._background -= self._background >> self.background_shift
+
+        bbox = None
+        if count and (started or self.active):
+            rows = np.flatnonzero(changed.any(axis=1))
+            columns = np.flatnonzero(changed.any(axis=0))
+            bbox = (int(rows[0]) * self.stride, int(columns[0]) * self.stride,
+                    (int(rows[-1]) + 1) * self.stride, (int(columns[-1]) + 1) * self.stride)
+        return ChangeResult(self.active, fraction, started, stopped, bbox)
+
+
+class SegmentWriter(Protocol):
+    def write(self, image: np.ndarray, frame_count: int) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class ContentTriggeredRecorder:
+    """Writes frames only while a ChangeDetector reports activity, one writer per segment of activity.
+
+    Call process() with each frame in the acquisition loop (or use it as the last stage of a pipeline.Pipeline).
+    A writer is opened with open_writer(segment) when activity starts and closed when it stops, and every segment is
+    recorded in segments with the amount and place of the change that started it.
+
+    Example:
+        recorder = ContentTriggeredRecorder(ChangeDetector(), lambda segment: NpyWriter(f"segment_{segment.number}"))
+        while True:
+            image = camera.get_image()
+            recorder.process(image, camera.get_image_info().usFrameNo)
+    """
+    def __init__(self, detector: ChangeDetector, open_writer: Callable[[Segment], SegmentWriter]) -> None:
+        """
+        Args:
+            detector (ChangeDetector): The change detector.
+            open_writer (Callable[[Segment], SegmentWriter]): Opens the writer of a new segment, an object with
+                write(image, frame_count) and close() methods.
+        """
+        self.detector = detector
+        self.open_writer = open_writer
+        self.segments: list[Segment] = []
+        self._writer: SegmentWriter | None = None
+        self.frames = 0
+        self.frames_written = 0
+
+    @property
+    def recording(self) -> bool:
+        return self._writer is not None
+
+    def process(self, image: np.ndarray, frame_count: int | None = None) -> ChangeResult:
+        """Check a frame for activity and write it if there is any.
+        Args:
+            image (np.ndarray): The frame.
+            frame_count (int | None): The frame's number, e.g. CAM_Image.uiFrameCount, counted here if None.
+        Returns:
+            ChangeResult: The detector's result for the frame.
+        """
+        if frame_count is None:
+            frame_count = self.frames
+        self.frames += 1
+        result = self.detector.update(image)
+
+        if result.started:
+            segment = Segment(len(self.segments), frame_count, None, time.time(), None, result.fraction,
+                              result.fraction, result.bbox, 0)
+            self.segments.append(segment)
+            self._writer = self.open_writer(segment)
+
+        if self._writer is not None:
+            segment = self.segments[-1]
+            self._writer.write(image, frame_count)
+            self.frames_written += 1
+            self.segments[-1] = segment._replace(end_frame=frame_count, peak_fraction=max(segment.peak_fraction,
+                                                                                          result.fraction),
+                                                 frames=segment.frames + 1)
+            if result.stopped:
+                self.close()
+        return result
+
+    def close(self) -> None:
+        """Close the writer of the current segment, if one is open."""
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        self.segments[-1] = self.segments[-1]._replace(end_time=time.time())
+        writer.close()
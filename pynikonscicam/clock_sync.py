@@ -0,0 +1,193 @@
+import math
+import time
+from typing import NamedTuple
+
+
+class FrameTime(NamedTuple):
+    host_ns: int  # Estimated time.perf_counter_ns() at the camera tick
+    wall_ns: int  # Estimated time.time_ns() at the camera tick
+    error_ns: int  # Uncertainty of the estimate, confidence_sigma standard errors of the fitted clock mapping
+
+
+class ClockSync:
+    """Maps camera ticks (CAM_Image.uiEndTime64, the uiTick64 of events) to host time.
+
+    Pairs of (camera tick, host perf_counter_ns) are fitted online with an exponentially weighted linear regression,
+    giving the offset and drift (rate) of the camera clock relative to the host. Samples far from the fit, e.g. an
+    event received late because the thread was descheduled, are down-weighted (Huber) or rejected, and the fit is
+    restarted if the camera clock jumps. Each update and conversion is a few floating point operations.
+
+    The host times of the samples include the delay before the host sees the event, so a constant delay is absorbed
+    into the offset; pass it as latency_ns if it is known.
+
+    Example:
+        sync = ClockSync()
+        sync.add_sample(event.stImageReceived.uiTick64, time.perf_counter_ns())
+        ...
+        image, metadata = camera.get_image_with_metadata()
+        frame_time = sync.to_host(metadata.camera_time)
+    """
+    def __init__(
+            self,
+            window: int = 1000,
+            min_samples: int = 8,
+            huber: float = 2.0,
+            reject_sigma: float = 6.0,
+            max_rejects: int = 20,
+            confidence_sigma: float = 3.0,
+            latency_ns: int = 0,
+            nominal_tick_rate: float | None = None,
+            ) -> None:
+        """
+        Args:
+            window (int): Effective number of samples in the fit, older samples are forgotten exponentially so that
+                changes of drift (e.g. with temperature) are followed.
+            min_samples (int): Samples needed before times can be converted.
+            huber (float): Residuals beyond this many standard deviations are down-weighted.
+            reject_sigma (float): Residuals beyond this many standard deviations are rejected as outliers.
+            max_rejects (int): Consecutive rejected samples after which the camera clock is assumed to have jumped
+                and the fit is restarted.
+            confidence_sigma (float): Number of standard errors given as the error bound.
+            latency_ns (int): Known delay between a camera tick and the host time it is paired with.
+            nominal_tick_rate (float | None): Nominal camera tick frequency in Hz, used to report drift_ppm.
+        """
+        if window < 2 or min_samples < 2:
+            raise ValueError("window and min_samples must be at least 2.")
+        self.window = window
+        self.min_samples = min_samples
+        self.huber = huber
+        self.reject_sigma = reject_sigma
+        self.max_rejects = max_rejects
+        self.confidence_sigma = confidence_sigma
+        self.latency_ns = latency_ns
+        self.nominal_tick_rate = nominal_tick_rate
+        self._forget = 1.0 - 1.0 / window
+        self.outliers = 0
+        self.resets = 0
+        self._wall_offset_ns = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard the fit, e.g. after the camera was reopened and its clock restarted."""
+        self.samples = 0
+        self._tick0: int | None = None
+        self._host0 = 0
+        self._warmup: list[tuple[float, float]] = []
+        self._weight = 0.0  # Decayed sum of weights
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._cxx = 0.0
+        self._cxy = 0.0
+        self._slope = 0.0  # Host ns per camera tick
+        self._offset = 0.0  # Host ns (from _host0) at tick _tick0
+        self._variance = 0.0  # Robust variance of the residuals in ns^2
+        self._rejects = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether enough samples have been fitted to convert times."""
+        return self.samples >= self.min_samples
+
+    @property
+    def tick_rate(self) -> float:
+        """Estimated camera tick frequency in Hz, measured against the host clock."""
+        if not self.ready:
+            raise RuntimeError("Clock sync needs more samples.")
+        return 1e9 / self._slope
+
+    @property
+    def drift_ppm(self) -> float:
+        """Rate error of the camera clock relative to nominal_tick_rate in parts per million."""
+        if self.nominal_tick_rate is None:
+            raise RuntimeError("nominal_tick_rate is not set.")
+        return (self.tick_rate / self.nominal_tick_rate - 1.0) * 1e6
+
+    @property
+    def residual_ns(self) -> float:
+        """Robust standard deviation of the samples about the fit in ns, the jitter of the host time stamps."""
+        return math.sqrt(self._variance)
+
+    def _update(self, x: float, y: float, weight: float) -> None:
+        """Add a weighted point to the exponentially weighted least squares fit."""
+        total = self._forget * self._weight + weight
+        dx = x - self._mean_x
+        self._mean_x += weight * dx / total
+        self._mean_y += weight * (y - self._mean_y) / total
+        self._cxx = self._forget * self._cxx + weight * dx * (x - self._mean_x)
+        self._cxy = self._forget * self._cxy + weight * dx * (y - self._mean_y)
+        self._weight = total
+        if self._cxx > 0:
+            self._slope = self._cxy / self._cxx
+            self._offset = self._mean_y - self._slope * self._mean_x
+
+    def add_sample(self, camera_tick: int, host_ns: int | None = None) -> bool:
+        """Add a pair of camera tick and host time.
+        Args:
+            camera_tick (int): The camera's tick count, e.g. the uiTick64 of an event.
+            host_ns (int | None): time.perf_counter_ns() when the tick was observed, now if None.
+        Returns:
+            bool: False if the sample was rejected as an outlier.
+        """
+        wall_ns = time.time_ns()
+        if host_ns is None:
+            host_ns = time.perf_counter_ns()
+        self._wall_offset_ns = wall_ns - time.perf_counter_ns()  # Follows adjustments of the wall clock
+        if self._tick0 is None:  # Fit relative to the first sample, so floats keep ns precision
+            self._tick0 = camera_tick
+            self._host0 = host_ns
+        x = float(camera_tick - self._tick0)
+        y = float(host_ns - self.latency_ns - self._host0)
+
+        if not self.ready:
+            self._warmup.append((x, y))
+            self._update(x, y, 1.0)
+            self.samples += 1
+            if self.ready:  # Initial scale of the residuals from the warm-up samples
+                residuals = [py - (self._offset + self._slope * px) for px, py in self._warmup]
+                self._variance = max(sum(r * r for r in residuals) / (len(residuals) - 2 or 1), 1.0)
+                self._warmup = []
+            return True
+
+        residual = y - (self._offset + self._slope * x)
+        sigma = math.sqrt(self._variance)
+        if abs(residual) > self.reject_sigma * sigma:
+            self.outliers += 1
+            self._rejects += 1
+            if self._rejects >= self.max_rejects:  # The camera clock jumped, start again from this sample
+                self.resets += 1
+                self.reset()
+                self.add_sample(camera_tick, host_ns)
+            return False
+        self._rejects = 0
+
+        limit = self.huber * sigma
+        weight = 1.0 if abs(residual) <= limit else limit / abs(residual)
+        self._update(x, y, weight)
+        self._variance = self._forget * self._variance + (1.0 - self._forget) * min(residual * residual, limit * limit)
+        self._variance = max(self._variance, 1.0)
+        self.samples += 1
+        return True
+
+    def to_host(self, camera_tick: int) -> FrameTime:
+        """Convert a camera tick to host time.
+        Args:
+            camera_tick (int): The camera's tick count, e.g. CAM_Image.uiEndTime64.
+        Raises:
+            RuntimeError: If fewer than min_samples samples have been added.
+        Returns:
+            FrameTime: The estimated perf_counter_ns and time_ns of the tick, with an error bound in ns.
+        """
+        if not self.ready:
+            raise RuntimeError(f"Clock sync needs {self.min_samples} samples, has {self.samples}.")
+        x = float(camera_tick - self._tick0)
+        host_ns = self._host0 + round(self._offset + self._slope * x)
+        dx = x - self._mean_x
+        standard_error = math.sqrt(self._variance * (1.0 / self._weight + dx * dx / self._cxx))
+        return FrameTime(host_ns, host_ns + self._wall_offset_ns, math.ceil(self.confidence_sigma * standard_error))
+
+    def __repr__(self) -> str:
+        if not self.ready:
+            return f"ClockSync: {self.samples}/{self.min_samples} samples"
+        drift = f", drift {self.drift_ppm:+.2f} ppm" if self.nominal_tick_rate is not None else ""
+        return (f"ClockSync: tick rate {self.tick_rate:.3f} Hz{drift}, residual {self.residual_ns / 1e3:.1f} us, "
+                f"{self.samples} samples, {self.outliers} outliers")
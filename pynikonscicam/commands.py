@@ -25,3 +25,19 @@ def start_frame_transfer(camera_handle: int, image_buffer_num: int = 1) -> None:
 def stop_frame_transfer(camera_handle: int) -> None:
     """Stop frame transfer."""
     error_code = m.send_command(camera_handle, c.CAM_CMD_STOP_FRAMETRANSFER, None)
+
+
+def control_cis(camera_handle: int, state: int | None = None) -> int:
+    """Get or set the power state of the image sensor (CIS).
+    Args:
+        camera_handle (int): The camera handle.
+        state (int | None): 0 to power down, 1 to run, None to only get the state.
+    Returns:
+        int: The state, 0 powered down or 1 running.
+    """
+    control_cis_struct = s.CAM_CMD_ControlCis()
+    control_cis_struct.bSet = state is not None
+    if state is not None:
+        control_cis_struct.ucState = state
+    m.send_command(camera_handle, c.CAM_CMD_CONTROL_CIS, ctypes.byref(control_cis_struct))
+    return int(control_cis_struct.ucState)
@@ -0,0 +1,92 @@
+import numpy as np
+
+from . import constants as consts
+
+
+# Channels and sample type of the image data for each colour format
+FormatColorLayout: dict[int, tuple[int, np.dtype]] = {
+    consts.ECamFormatColor.ecfcRgb24: (3, np.dtype(np.uint8)),
+    consts.ECamFormatColor.ecfcYuv444: (3, np.dtype(np.uint8)),
+    consts.ECamFormatColor.ecfcMono16: (1, np.dtype("<u2")),
+    consts.ECamFormatColor.ecfcRgb48: (3, np.dtype("<u2")),
+    consts.ECamFormatColor.ecfcY16: (1, np.dtype("<u2")),
+    consts.ECamFormatColor.ecfcRaw16: (1, np.dtype("<u2")),
+}
+
+
+def image_shape(colour: consts.ECamFormatColor, height: int, width: int) -> tuple[int, ...]:
+    """Get the shape of a decoded image.
+    Args:
+        colour (ECamFormatColor): Colour format of the image.
+        height (int): Image height in pixels.
+        width (int): Image width in pixels.
+    Returns:
+        tuple[int, ...]: (height, width, 3) for colour formats, (height, width) for single channel formats.
+    """
+    channels, _ = FormatColorLayout[colour]
+    return (height, width, channels) if channels > 1 else (height, width)
+
+
+def image_dtype(colour: consts.ECamFormatColor) -> np.dtype:
+    """Get the sample type of a decoded image."""
+    return FormatColorLayout[colour][1]
+
+
+def image_nbytes(colour: consts.ECamFormatColor, height: int, width: int) -> int:
+    """Get the number of bytes of image data in a frame, excluding the image info."""
+    channels, dtype = FormatColorLayout[colour]
+    return height * width * channels * dtype.itemsize
+
+
+def image_view(buffer: np.ndarray, colour: consts.ECamFormatColor, height: int, width: int) -> np.ndarray:
+    """Get a view of a raw frame buffer as an image, without copying.
+    Args:
+        buffer (np.ndarray): The frame buffer as a 1D uint8 array, e.g. CAM_Image.pDataBuffer.
+        colour (ECamFormatColor): Colour format of the frame.
+        height (int): Image height in pixels.
+        width (int): Image width in pixels.
+    Returns:
+        np.ndarray: View of the image. RGB formats are returned in RGB order (the camera sends BGR),
+            YUV444 is returned as Y, U, V channels.
+
+    NOTE The view is only valid until the buffer is reused for the next frame.
+    """
+    if colour not in FormatColorLayout:
+        raise ValueError(f"Unsupported image format {consts.ECamFormatColor(colour).name}.")
+    expected_size = image_nbytes(colour, height, width)
+    if buffer.size < expected_size:
+        raise ValueError("Image buffer is smaller than expected, cannot reshape.")
+
+    img = buffer[:expected_size].view(image_dtype(colour)).reshape(image_shape(colour, height, width))
+    if colour in (consts.ECamFormatColor.ecfcRgb24, consts.ECamFormatColor.ecfcRgb48):
+        img = img[..., ::-1]  # BGR to RGB
+    return img
+
+
+def decode_image(
+        buffer: np.ndarray,
+        colour: consts.ECamFormatColor,
+        height: int,
+        width: int,
+        out: np.ndarray | None = None,
+        ) -> np.ndarray:
+    """Decode a raw frame buffer into an image array that is independent of the buffer.
+    Args:
+        buffer (np.ndarray): The frame buffer as a 1D uint8 array.
+        colour (ECamFormatColor): Colour format of the frame.
+        height (int): Image height in pixels.
+        width (int): Image width in pixels.
+        out (np.ndarray | None): Optional preallocated array of the image's shape and type to decode into.
+    Returns:
+        np.ndarray: The image, out if given.
+    """
+    img = image_view(buffer, colour, height, width)
+    if out is None:
+        out = np.empty(img.shape, img.dtype)
+    if colour in (consts.ECamFormatColor.ecfcRgb24, consts.ECamFormatColor.ecfcRgb48):
+        # Copying each channel is several times faster than copying the channel reversed view in one go
+        for channel in range(3):
+            out[..., channel] = img[..., channel]
+    else:
+        np.copyto(out, img)
+    return out
@@ -0,0 +1,122 @@
+import ctypes
+import threading
+from typing import NamedTuple
+
+from . import methods as methods
+from . import structures as structs
+from . import constants as consts
+
+
+class DeviceInfo(NamedTuple):
+    index: int  # Device index, as passed to CAM_Open
+    device_type: consts.ECamDeviceType | int  # int if the type is not known to the package
+    serial_number: int
+    camera_name: str
+    driver_version: str
+    fpga_version: str
+    fw_version: str
+    usb_dc_version: str
+    usb_version: str
+
+
+def _device_info(index: int, device: structs.CAM_Device) -> DeviceInfo:
+    try:
+        device_type = consts.ECamDeviceType(device.eCamDeviceType)
+    except ValueError:
+        device_type = int(device.eCamDeviceType)
+    return DeviceInfo(index, device_type, int(device.uiSerialNo), device.wszCameraName, device.wszDriverVersion,
+                      device.wszFpgaVersion, device.wszFwVersion, device.wszUsbDcVersion, device.wszUsbVersion)
+
+
+class DeviceManager:
+    """Process-wide, reference counted owner of the SDK's device list.
+
+    CAM_OpenDevices is called when the first user acquires the devices and CAM_CloseDevices when the last one releases
+    them, so several cameras in one process share a single enumeration and disconnecting one does not close the
+    devices of the others. Use DeviceManager.instance() rather than creating one.
+
+    Example:
+        manager = DeviceManager.instance()
+        with manager:
+            for device in manager.devices:
+                print(device.serial_number, device.camera_name)
+    """
+    _instance: "DeviceManager | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._references = 0
+        self._device_array: "ctypes._Pointer[structs.CAM_Device] | None" = None
+        self._devices: list[DeviceInfo] = []
+        self.enumerations = 0  # Number of CAM_OpenDevices calls
+
+    @classmethod
+    def instance(cls) -> "DeviceManager":
+        """Get the process-wide device manager."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def references(self) -> int:
+        """Number of users holding the devices open."""
+        return self._references
+
+    @property
+    def devices(self) -> list[DeviceInfo]:
+        """The enumerated devices, empty while the devices are not acquired."""
+        return list(self._devices)
+
+    def acquire(self) -> list[DeviceInfo]:
+        """Hold the devices open, enumerating them if no one else holds them. Each call needs a matching release.
+        Returns:
+            list[DeviceInfo]: The devices.
+        """
+        with self._lock:
+            if self._references == 0:
+                count, device_array = methods.open_devices()
+                self.enumerations += 1
+                self._device_array = device_array
+                self._devices = [_device_info(i, device_array[i]) for i in range(count)]
+            self._references += 1
+            return list(self._devices)
+
+    def release(self) -> None:
+        """Release a hold on the devices, closing them when the last hold is released."""
+        with self._lock:
+            if self._references == 0:
+                raise RuntimeError("Devices released more times than they were acquired.")
+            self._references -= 1
+            if self._references == 0:
+                self._device_array = None
+                self._devices = []
+                methods.close_devices()
+
+    def device(self, index: int) -> structs.CAM_Device:
+        """Get the SDK's CAM_Device struct of a device, the devices must be acquired."""
+        with self._lock:
+            if self._device_array is None:
+                raise RuntimeError("Devices are not acquired.")
+            if not 0 <= index < len(self._devices):
+                raise ConnectionError(f"Camera index unavailable. Must be between 0 and {len(self._devices) - 1}.")
+            return self._device_array[index]
+
+    def find(self, serial_number: int) -> DeviceInfo:
+        """Find a device by serial number, the devices must be acquired.
+        Raises:
+            ConnectionError: If no device has the serial number.
+        """
+        for device in self._devices:
+            if device.serial_number == serial_number:
+                return device
+        available = ", ".join(str(device.serial_number) for device in self._devices) or "none"
+        raise ConnectionError(f"No camera with serial number {serial_number}, available: {available}.")
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,210 @@
+import ctypes
+import threading
+import time
+from typing import Any, Callable, NamedTuple, TYPE_CHECKING
+
+from . import methods as methods
+from . import structures as structs
+from . import constants as consts
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+EventCallback = Callable[[structs.CAM_Event], None]
+NoticeCallback = Callable[[structs.CAM_Notice], None]
+
+
+class OnePushResult(NamedTuple):
+    values: dict[consts.ECamFeatureId, Any]  # Feature values after the command, from ecetFeatureChanged where reported
+    settled: bool  # False if the deadline passed before the camera reported it had finished
+    duration: float  # Seconds from sending the command to it settling or the deadline
+
+
+class EventDispatcher:
+    """Dispatches a camera's events and notices to subscribed callbacks.
+
+    Events are fetched with CAM_EventPolling for each subscribed event type, either by calling poll() or from a
+    background thread started with start(). Notices are delivered by the SDK's notice callback as they occur.
+
+    NOTE get_image polls ecetImageReceived and ecetTriggerReady itself, subscribing to these would take the
+    events it is waiting for.
+
+    Example:
+        camera.events.subscribe(ECamEventType.ecetBusReset, lambda event: print(event.stBusReset.eBusResetCode))
+        camera.events.start()
+    """
+    def __init__(self, camera: "NikonCamera") -> None:
+        self.camera = camera
+        self._subscribers: dict[consts.ECamEventType, list[EventCallback]] = {}
+        self._notice_subscribers: dict[consts.ECamNoticeType, list[NoticeCallback]] = {}
+        self._notice_callback: structs.FCAM_NoticeCallback | None = None  # Reference kept while set in the SDK
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def subscribe(self, event_type: consts.ECamEventType, callback: EventCallback) -> None:
+        """Call a function with each event of a type."""
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type: consts.ECamEventType, callback: EventCallback) -> None:
+        callbacks = self._subscribers.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._subscribers.pop(event_type, None)
+
+    def subscribe_notice(self, notice_type: consts.ECamNoticeType, callback: NoticeCallback) -> None:
+        """Call a function with each notice of a type. Callbacks are called from the SDK's thread."""
+        self._notice_subscribers.setdefault(notice_type, []).append(callback)
+        if self._notice_callback is None and self.camera.is_connected:
+            self.register_notice_callback()
+
+    def unsubscribe_notice(self, notice_type: consts.ECamNoticeType, callback: NoticeCallback) -> None:
+        callbacks = self._notice_subscribers.get(notice_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._notice_subscribers.pop(notice_type, None)
+
+    def register_notice_callback(self) -> None:
+        """Set the SDK notice callback for the camera's current handle, e.g. after reconnecting."""
+        if not self._notice_subscribers:
+            return
+        self._notice_callback = structs.FCAM_NoticeCallback(self._on_notice)
+        methods.set_notice_callback(self.camera.camera_handle, self._notice_callback)
+
+    def _on_notice(self, camera_handle: int, notice: "ctypes._Pointer[structs.CAM_Notice]", trans_data) -> None:
+        notice = notice.contents
+        for callback in self._notice_subscribers.get(notice.eNoticeType, ()):
+            try:
+                callback(notice)
+            except Exception as exc:  # Exceptions cannot propagate back through the SDK
+                print(f"Error in notice callback: {str(exc)}")
+
+    def poll(self) -> int:
+        """Fetch and dispatch all pending events of the subscribed types.
+        Returns:
+            int: Number of events dispatched.
+        """
+        dispatched = 0
+        for event_type, callbacks in list(self._subscribers.items()):
+            while True:
+                with self.camera._sdk_lock:
+                    event = methods.poll_event(self.camera.camera_handle, event_type)
+                if event is None:
+                    break
+                for callback in list(callbacks):
+                    callback(event)
+                dispatched += 1
+        return dispatched
+
+    def discard(self, event_type: consts.ECamEventType) -> int:
+        """Drop the pending events of a type without dispatching them.
+        Returns:
+            int: Number of events dropped.
+        """
+        discarded = 0
+        while True:
+            with self.camera._sdk_lock:
+                event = methods.poll_event(self.camera.camera_handle, event_type)
+            if event is None:
+                return discarded
+            discarded += 1
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.05) -> None:
+        """Poll for events on a background thread.
+        Args:
+            interval (float): Time between polls in seconds.
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="EventDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background polling thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def close(self) -> None:
+        """Stop polling and remove the SDK notice callback."""
+        self.stop()
+        if self._notice_callback is not None:
+            try:
+                methods.set_notice_callback(self.camera.camera_handle, None)
+            finally:
+                self._notice_callback = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            if not self.camera.is_connected:
+                continue
+            try:
+                self.poll()
+            except Exception as exc:
+                print(f"Error polling camera events: {str(exc)}")
+
+
+class EventCapture:
+    """Collects a camera's events of some types from the time it is entered, e.g. the events caused by a command.
+
+    On entry, pending events of the types are dispatched to their existing subscribers, or dropped if there are
+    none, so that only later events are collected. wait() polls the dispatcher itself, so events are collected as
+    soon as they arrive whether or not the background thread is running.
+
+    Example:
+        with EventCapture(camera.events, (ECamEventType.ecetAeStay,)) as capture:
+            methods.send_command(camera.camera_handle, CAM_CMD_ONEPUSH_AE)
+            settled = capture.wait(lambda events: len(events) > 0, timeout=5)
+    """
+    def __init__(self, dispatcher: EventDispatcher, event_types: tuple[consts.ECamEventType, ...]) -> None:
+        self.dispatcher = dispatcher
+        self.event_types = event_types
+        self.events: list[structs.CAM_Event] = []
+        self._condition = threading.Condition()
+
+    def _on_event(self, event: structs.CAM_Event) -> None:
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def wait(self, predicate: Callable[[list[structs.CAM_Event]], bool], timeout: float,
+             poll_interval: float = 0.002) -> bool:
+        """Wait until the events collected so far satisfy a condition.
+        Args:
+            predicate (Callable[[list[CAM_Event]], bool]): Called with the events collected so far, oldest first.
+            timeout (float): Seconds to wait at most.
+            poll_interval (float): Seconds between polls of the camera.
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            self.dispatcher.poll()
+            with self._condition:
+                if predicate(self.events):
+                    return True
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(poll_interval, remaining))
+
+    def __enter__(self):
+        self.dispatcher.poll()
+        for event_type in self.event_types:
+            if not self.dispatcher._subscribers.get(event_type):
+                self.dispatcher.discard(event_type)
+            self.dispatcher.subscribe(event_type, self._on_event)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for event_type in self.event_types:
+            self.dispatcher.unsubscribe(event_type, self._on_event)
@@ -0,0 +1,370 @@
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple, TYPE_CHECKING
+
+import numpy as np
+
+from . import structures as structs
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+_MAGIC = 0x4E4B5246
+_VERSION = 1
+_ALIGNMENT = 4096  # Alignment of each slot's image data
+
+_HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("slot_count", "<u4"),
+    ("ndim", "<u4"),
+    ("shape", "<u4", (3,)),
+    ("dtype", "S16"),
+    ("frame_nbytes", "<u8"),
+    ("slot_stride", "<u8"),
+    ("data_offset", "<u8"),
+    ("latest", "<u8"),  # Sequence number of the latest complete frame, 0 before the first
+    ("closed", "<u4"),  # Set when the publisher closes the ring
+], align=True)
+
+_SLOT_DTYPE = np.dtype([
+    ("sequence", "<u8"),  # 2 * frame sequence number once written, odd while being written
+    ("frame_count", "<u8"),  # CAM_Image.uiFrameCount
+    ("camera_time", "<u8"),  # CAM_Image.uiEndTime64, camera ticks at the end of the exposure
+    ("host_time_ns", "<u8"),  # time.time_ns() when the frame was published
+    ("info", "u1", (structs.CAM_IMG_INFO_SIZE,)),  # Raw CAM_ImageInfo appended to the frame by the camera
+], align=True)
+
+
+class SharedFrame(NamedTuple):
+    image: np.ndarray  # View of the frame in shared memory, valid until the slot is reused
+    sequence: int  # Publisher's sequence number, starting at 1
+    frame_count: int
+    camera_time: int
+    host_time_ns: int
+    info: structs.CAM_ImageInfo
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    if os.name != "posix":
+        return shared_memory.SharedMemory(name=name)
+
+    # Before 3.13 attaching registers the block with the resource tracker, which unlinks it when this process exits
+    # and so would remove it from under the publisher. Unregistering afterwards is not an option, as processes
+    # started by multiprocessing share the publisher's tracker and that would drop the publisher's registration.
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedFrameRing:
+    """A ring of fixed size frame slots in a multiprocessing.shared_memory block.
+
+    A single writer publishes frames with begin_write()/end_write(), each slot has a sequence number used as a seqlock:
+    it is odd while the slot is being written and 2 * the frame's sequence number once complete. Readers never
+    block the writer, instead they check the slot's sequence number before and after reading to detect a frame that
+    was overwritten. Use FramePublisher and FrameSubscriber rather than this class directly.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((), _HEADER_DTYPE, buffer=shm.buf)
+        if self._header["magic"] != _MAGIC or self._header["version"] != _VERSION:
+            self._header = None
+            raise ValueError(f"Shared memory {shm.name} is not a frame ring of version {_VERSION}.")
+        self.slot_count = int(self._header["slot_count"])
+        self.shape = tuple(int(n) for n in self._header["shape"][:self._header["ndim"]])
+        self.dtype = np.dtype(self._header["dtype"].item().decode())
+        self._slots = np.ndarray((self.slot_count,), _SLOT_DTYPE, buffer=shm.buf, offset=_HEADER_DTYPE.itemsize)
+        data_offset = int(self._header["data_offset"])
+        slot_stride = int(self._header["slot_stride"])
+        self._images = [np.ndarray(self.shape, self.dtype, buffer=shm.buf, offset=data_offset + i * slot_stride)
+                        for i in range(self.slot_count)]
+
+    @classmethod
+    def create(cls, shape: tuple[int, ...], dtype: np.dtype, slot_count: int = 4, name: str | None = None) -> "SharedFrameRing":
+        """Create a new ring.
+        Args:
+            shape (tuple[int, ...]): Shape of each frame, at most 3 dimensions.
+            dtype (np.dtype): Sample type of each frame.
+            slot_count (int): Number of frames kept, at least 2.
+            name (str | None): Name of the shared memory block, a unique name is generated if None.
+        """
+        if slot_count < 2:
+            raise ValueError("A frame ring needs at least 2 slots.")
+        if len(shape) > 3:
+            raise ValueError("Frames can have at most 3 dimensions.")
+        dtype = np.dtype(dtype)
+        frame_nbytes = int(np.prod(shape)) * dtype.itemsize
+        slot_stride = -(-frame_nbytes // _ALIGNMENT) * _ALIGNMENT
+        data_offset = -(-(_HEADER_DTYPE.itemsize + slot_count * _SLOT_DTYPE.itemsize) // _ALIGNMENT) * _ALIGNMENT
+        shm = shared_memory.SharedMemory(name=name, create=True, size=data_offset + slot_count * slot_stride)
+
+        header = np.ndarray((), _HEADER_DTYPE, buffer=shm.buf)
+        header["version"] = _VERSION
+        header["slot_count"] = slot_count
+        header["ndim"] = len(shape)
+        header["shape"][:len(shape)] = shape
+        header["dtype"] = dtype.str.encode()
+        header["frame_nbytes"] = frame_nbytes
+        header["slot_stride"] = slot_stride
+        header["data_offset"] = data_offset
+        header["magic"] = _MAGIC  # Written last, the ring is complete once attachable
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFrameRing":
+        """Attach to a ring created by another process."""
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def latest(self) -> int:
+        """Sequence number of the latest complete frame, 0 if none has been published."""
+        return int(self._header["latest"])
+
+    @property
+    def closed(self) -> bool:
+        """Whether the publisher has closed the ring."""
+        return bool(self._header["closed"])
+
+    def begin_write(self) -> tuple[int, np.ndarray]:
+        """Start writing the next frame, marking its slot as in progress.
+        Returns:
+            tuple[int, np.ndarray]: The frame's sequence number and its slot to write the image into.
+        """
+        sequence = int(self._header["latest"]) + 1
+        index = (sequence - 1) % self.slot_count
+        self._slots[index]["sequence"] = 2 * sequence - 1
+        return sequence, self._images[index]
+
+    def end_write(self, sequence: int, frame_count: int = 0, camera_time: int = 0,
+                  info: np.ndarray | bytes | None = None) -> None:
+        """Complete a frame started with begin_write, making it visible to readers."""
+        slot = self._slots[(sequence - 1) % self.slot_count]
+        slot["frame_count"] = frame_count
+        slot["camera_time"] = camera_time
+        slot["host_time_ns"] = time.time_ns()
+        if info is not None:
+            slot["info"] = np.frombuffer(info, np.uint8, structs.CAM_IMG_INFO_SIZE)
+        slot["sequence"] = 2 * sequence
+        self._header["latest"] = sequence
+
+    def write(self, image: np.ndarray, frame_count: int = 0, camera_time: int = 0,
+              info: np.ndarray | bytes | None = None) -> int:
+        """Copy an image into the next slot.
+        Returns:
+            int: The frame's sequence number.
+        """
+        sequence, slot_image = self.begin_write()
+        np.copyto(slot_image, image)
+        self.end_write(sequence, frame_count, camera_time, info)
+        return sequence
+
+    def read(self, sequence: int) -> SharedFrame | None:
+        """Get a frame by sequence number.
+        Returns:
+            SharedFrame | None: The frame, None if its slot has been or is being overwritten.
+        """
+        index = (sequence - 1) % self.slot_count
+        slot = self._slots[index]
+        if slot["sequence"] != 2 * sequence:
+            return None
+        metadata = slot.copy()
+        if slot["sequence"] != 2 * sequence:
+            return None
+        return SharedFrame(self._images[index], sequence, int(metadata["frame_count"]), int(metadata["camera_time"]),
+                           int(metadata["host_time_ns"]), structs.CAM_ImageInfo.from_buffer_copy(metadata["info"]))
+
+    def is_valid(self, frame: SharedFrame) -> bool:
+        """Whether a frame's slot still holds it, check after using the image view to detect it being overwritten."""
+        return self._slots[(frame.sequence - 1) % self.slot_count]["sequence"] == 2 * frame.sequence
+
+    def unlink(self) -> None:
+        """Remove the shared memory block, e.g. when the process that created it died without closing the ring."""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        """Close the ring, and remove the shared memory block if this process created it."""
+        if self._header is None:
+            return
+        if self.owner:
+            self._header["closed"] = 1
+        self._header = self._slots = self._images = None
+        try:
+            self._shm.close()
+        except BufferError as exc:
+            raise BufferError("Frames read from the ring are still referenced, delete them before closing.") from exc
+        if self.owner:
+            self._shm.unlink()
+
+
+class FramePublisher:
+    """Publishes frames from a NikonCamera into a shared memory ring for other processes.
+
+    Frames are decoded by get_image straight into the ring's slots, so publishing costs no more than get_image.
+    Subscribers attach with the ring's name.
+
+    Example:
+        publisher = FramePublisher(camera, slot_count=8)
+        publisher.start()
+        # In another process: subscriber = FrameSubscriber(publisher.name)
+    """
+    def __init__(self, camera: "NikonCamera", slot_count: int = 4, name: str | None = None) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera.
+            slot_count (int): Number of frames kept in the ring, subscribers that fall further behind skip frames.
+            name (str | None): Name of the shared memory block, a unique name is generated if None.
+        """
+        self.camera = camera
+        self.ring = SharedFrameRing.create(camera.image_shape, camera.image_dtype, slot_count, name)
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return self.ring.name
+
+    def publish(self) -> int:
+        """Get an image from the camera into the next slot.
+        Returns:
+            int: The frame's sequence number.
+        """
+        if self.camera.image_shape != self.ring.shape or self.camera.image_dtype != self.ring.dtype:
+            raise ValueError("The camera's image format no longer matches the frame ring.")
+        sequence, slot_image = self.ring.begin_write()
+        _, metadata = self.camera.get_image_with_metadata(out=slot_image)
+        self.ring.end_write(sequence, metadata.frame_count, metadata.camera_time, metadata.info)
+        return sequence
+
+    def start(self) -> None:
+        """Publish frames continuously from a background thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FramePublisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.publish()
+            except Exception as exc:
+                print(f"Error publishing frame: {str(exc)}")
+                self._stop_event.wait(0.1)
+
+    def close(self) -> None:
+        """Stop publishing and remove the ring."""
+        self.stop()
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FrameSubscriber:
+    """Reads frames published by a FramePublisher in another process, without copying them.
+
+    Frames are returned as views into shared memory. The publisher never waits for subscribers, so a frame's slot is
+    reused slot_count frames later. Check is_valid() after using a view, or use copy() to get a checked copy.
+
+    Example:
+        with FrameSubscriber(name) as subscriber:
+            while True:
+                frame = subscriber.read(timeout=1.0)  # Every frame in order, or read(newest=True) to skip ahead
+                if frame is None:
+                    break
+                mean = frame.image.mean()
+                if not subscriber.is_valid(frame):
+                    continue  # Overwritten while it was being used
+    """
+    def __init__(self, name: str, poll_interval: float = 0.0005) -> None:
+        """
+        Args:
+            name (str): Name of the publisher's ring.
+            poll_interval (float): Time between checks for a new frame while waiting, in seconds.
+        """
+        self.ring = SharedFrameRing.attach(name)
+        self.poll_interval = poll_interval
+        self.next_sequence = self.ring.latest + 1  # Start with the next new frame
+        self.dropped = 0  # Frames skipped because they were overwritten before being read
+
+    def read(self, timeout: float | None = None, newest: bool = False) -> SharedFrame | None:
+        """Get the next frame, waiting for it to be published.
+        Args:
+            timeout (float | None): Maximum time to wait in seconds, None to wait indefinitely.
+            newest (bool): Skip to the newest frame rather than reading every frame in order.
+        Returns:
+            SharedFrame | None: The frame, None if the timeout passed or the publisher closed the ring.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        ring = self.ring
+        while True:
+            latest = ring.latest
+            if latest >= self.next_sequence:
+                target = latest if newest else max(self.next_sequence, latest - ring.slot_count + 2)
+                frame = ring.read(target)
+                if frame is not None:
+                    if not newest:
+                        self.dropped += target - self.next_sequence
+                    self.next_sequence = target + 1
+                    return frame
+                continue  # Overwritten before it could be read, try again from the latest frame
+            if ring.closed:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def is_valid(self, frame: SharedFrame) -> bool:
+        """Whether the frame's image view has not been overwritten since it was read."""
+        return self.ring.is_valid(frame)
+
+    def copy(self, frame: SharedFrame, out: np.ndarray | None = None) -> np.ndarray | None:
+        """Copy a frame's image out of shared memory.
+        Returns:
+            np.ndarray | None: The copy, out if given, or None if the frame was overwritten during the copy.
+        """
+        if out is None:
+            out = np.empty(frame.image.shape, frame.image.dtype)
+        np.copyto(out, frame.image)
+        return out if self.ring.is_valid(frame) else None
+
+    def close(self) -> None:
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
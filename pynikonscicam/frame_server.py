@@ -0,0 +1,361 @@
+import collections
+import socket
+import struct
+import threading
+import time
+from typing import NamedTuple, TYPE_CHECKING
+
+import numpy as np
+
+from . import structures as structs
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+# Frame header: magic, version, sequence, frame count, camera time (ticks), host time (ns), height, width,
+# channels, sample dtype string, metadata size, image size. Followed by the metadata (raw CAM_ImageInfo) and the image.
+_FRAME_HEADER = struct.Struct("<4sIQQQQIII8sIQ")
+_MAGIC = b"NKFR"
+_VERSION = 1
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+class ReceivedFrame(NamedTuple):
+    image: np.ndarray
+    sequence: int
+    frame_count: int
+    camera_time: int
+    host_time_ns: int
+    info: structs.CAM_ImageInfo | None
+
+
+class _QueuedFrame(NamedTuple):
+    header: bytes
+    info: bytes
+    image: np.ndarray
+
+
+def _send_buffers(sock: socket.socket, buffers: list[memoryview]) -> None:
+    """Send several buffers without joining them, using sendmsg where available."""
+    if not hasattr(sock, "sendmsg"):  # Windows
+        for buffer in buffers:
+            sock.sendall(buffer)
+        return
+    buffers = [buffer for buffer in buffers if buffer.nbytes]
+    while buffers:
+        sent = sock.sendmsg(buffers)
+        while sent:  # Drop the buffers that were sent completely and trim a partially sent one
+            if sent >= buffers[0].nbytes:
+                sent -= buffers[0].nbytes
+                buffers.pop(0)
+            else:
+                buffers[0] = buffers[0][sent:]
+                sent = 0
+
+
+def _recv_into(sock: socket.socket, view: memoryview) -> None:
+    """Fill a buffer from a socket."""
+    while view.nbytes:
+        received = sock.recv_into(view)
+        if received == 0:
+            raise ConnectionError("Connection closed by the frame server.")
+        view = view[received:]
+
+
+class _ClientConnection:
+    """A connected client with its own bounded queue of frames and sender thread."""
+    def __init__(self, sock: socket.socket, address, queue_size: int, policy: str) -> None:
+        self.sock = sock
+        self.address = address
+        self.policy = policy
+        self.queue: collections.deque[_QueuedFrame] = collections.deque()
+        self.queue_size = queue_size
+        self.condition = threading.Condition()
+        self.closed = False
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.thread = threading.Thread(target=self._run, name=f"FrameServerClient-{address}", daemon=True)
+        self.thread.start()
+
+    def put(self, frame: _QueuedFrame, timeout: float | None) -> bool:
+        """Queue a frame, dropping the oldest or waiting for space depending on the policy.
+        Returns:
+            bool: Whether the frame was queued.
+        """
+        with self.condition:
+            if self.policy == BLOCK:
+                if not self.condition.wait_for(lambda: len(self.queue) < self.queue_size or self.closed, timeout):
+                    self.frames_dropped += 1
+                    return False
+            elif len(self.queue) >= self.queue_size:
+                self.queue.popleft()
+                self.frames_dropped += 1
+            if self.closed:
+                return False
+            self.queue.append(frame)
+            self.condition.notify_all()
+            return True
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.queue or self.closed)
+                    if self.closed:
+                        return
+                    frame = self.queue.popleft()
+                    self.condition.notify_all()
+                image = memoryview(frame.image).cast("B")
+                _send_buffers(self.sock, [memoryview(frame.header), memoryview(frame.info), image])
+                self.frames_sent += 1
+                self.bytes_sent += len(frame.header) + len(frame.info) + image.nbytes
+        except OSError:
+            pass  # Client disconnected
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.queue.clear()
+            self.condition.notify_all()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class FrameServer:
+    """Serves frames to clients over TCP.
+
+    Each client has a bounded queue served by its own thread. When a client falls behind, either its oldest queued
+    frame is dropped (drop_oldest) or publishing waits for it (block). Frames are sent as a fixed header, the raw
+    CAM_ImageInfo and the image bytes, straight from the image array with sendmsg and no intermediate copies. With
+    block, a client that has not made room for a frame within block_timeout is disconnected, so a stalled client
+    cannot stall publishing.
+
+    Example:
+        server = FrameServer(camera, host="0.0.0.0", port=5555)
+        server.start()  # Publish frames from the camera continuously
+        # On the analysis machine: client = FrameClient("acquisition-pc", 5555)
+    """
+    def __init__(
+            self,
+            camera: "NikonCamera | None" = None,
+            host: str = "127.0.0.1",
+            port: int = 5555,
+            queue_size: int = 4,
+            policy: str = DROP_OLDEST,
+            block_timeout: float | None = 1.0,
+            send_buffer_size: int = 8 * 1024 * 1024,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera | None): Camera published by start(), frames can also be published with publish().
+            host (str): Address to listen on, the default only accepts local connections.
+            port (int): Port to listen on, 0 picks a free port.
+            queue_size (int): Maximum number of frames queued for each client.
+            policy (str): "drop_oldest" to drop a slow client's oldest frame, or "block" to wait for it.
+            block_timeout (float | None): With "block", maximum time to wait for a client to make room for a frame
+                before disconnecting it, None to wait indefinitely.
+            send_buffer_size (int): Socket send buffer size of each connection.
+        """
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown policy {policy!r}, must be {DROP_OLDEST!r} or {BLOCK!r}.")
+        self.camera = camera
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.send_buffer_size = send_buffer_size
+        self.clients: list[_ClientConnection] = []
+        self._clients_lock = threading.Lock()
+        self._publish_lock = threading.Lock()  # Frames are queued for the clients in the order of their sequence
+        self._sequence = 0
+
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(0.2)  # Closing the socket does not interrupt accept on every platform
+        self._closing = threading.Event()
+        self._accept_thread = threading.Thread(target=self._accept, name="FrameServer", daemon=True)
+        self._accept_thread.start()
+        self._publish_thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._listener.getsockname()[:2]
+
+    def _accept(self) -> None:
+        while not self._closing.is_set():
+            try:
+                sock, address = self._listener.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                return  # Listener closed
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_size)
+            with self._clients_lock:
+                self.clients.append(_ClientConnection(sock, address, self.queue_size, self.policy))
+
+    def publish(self, image: np.ndarray, frame_count: int = 0, camera_time: int = 0,
+                info: bytes | np.ndarray | None = None) -> int:
+        """Queue a frame for every connected client.
+        The image is sent from the array itself, it must not be modified until sent, e.g. pass a new array from get_image().
+        Returns:
+            int: The frame's sequence number.
+        """
+        image = np.ascontiguousarray(image)
+        info_bytes = b"" if info is None else bytes(info)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+
+        with self._publish_lock:
+            with self._clients_lock:
+                self._sequence += 1
+                sequence = self._sequence
+                self.clients = [client for client in self.clients if not client.closed]
+                clients = list(self.clients)
+            header = _FRAME_HEADER.pack(_MAGIC, _VERSION, sequence, frame_count, camera_time, time.time_ns(), height,
+                                        width, channels, image.dtype.str.encode(), len(info_bytes), image.nbytes)
+            frame = _QueuedFrame(header, info_bytes, image)
+            for client in clients:
+                if not client.put(frame, self.block_timeout) and self.policy == BLOCK:
+                    client.close()  # Stalled for block_timeout
+        return sequence
+
+    def publish_from_camera(self) -> int:
+        """Get an image from the camera and queue it for every client.
+        Returns:
+            int: The frame's sequence number.
+        """
+        image, metadata = self.camera.get_image_with_metadata()
+        return self.publish(image, metadata.frame_count, metadata.camera_time, metadata.info)
+
+    def start(self) -> None:
+        """Publish frames from the camera continuously on a background thread."""
+        if self.camera is None:
+            raise RuntimeError("The frame server has no camera to publish.")
+        if self._publish_thread is not None:
+            return
+        self._stop_event.clear()
+        self._publish_thread = threading.Thread(target=self._run, name="FrameServerPublisher", daemon=True)
+        self._publish_thread.start()
+
+    def stop(self) -> None:
+        """Stop publishing frames from the camera."""
+        if self._publish_thread is None:
+            return
+        self._stop_event.set()
+        self._publish_thread.join()
+        self._publish_thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.publish_from_camera()
+            except Exception as exc:
+                print(f"Error publishing frame: {str(exc)}")
+                self._stop_event.wait(0.1)
+
+    def stats(self) -> list[dict]:
+        """Get the address, frames sent, frames dropped and bytes sent of each connected client."""
+        with self._clients_lock:
+            return [{"address": client.address, "frames_sent": client.frames_sent,
+                     "frames_dropped": client.frames_dropped, "bytes_sent": client.bytes_sent,
+                     "queued": len(client.queue)} for client in self.clients if not client.closed]
+
+    def close(self) -> None:
+        """Stop publishing, disconnect all clients and stop listening."""
+        self.stop()
+        self._closing.set()
+        self._accept_thread.join()
+        self._listener.close()
+        with self._clients_lock:
+            clients, self.clients = self.clients, []
+        for client in clients:
+            client.close()
+            client.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FrameClient:
+    """Receives frames from a FrameServer, reading the image bytes straight into NumPy arrays.
+
+    Example:
+        with FrameClient("acquisition-pc", 5555) as client:
+            out = None
+            while True:
+                frame = client.read(out)
+                out = frame.image  # Reuse the array for the next frame
+    """
+    def __init__(self, host: str, port: int = 5555, timeout: float | None = None,
+                 receive_buffer_size: int = 8 * 1024 * 1024) -> None:
+        """
+        Args:
+            host (str): Address of the frame server.
+            port (int): Port of the frame server.
+            timeout (float | None): Socket timeout in seconds, None to wait indefinitely.
+            receive_buffer_size (int): Socket receive buffer size.
+        """
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_size)
+        self._header = bytearray(_FRAME_HEADER.size)
+        self._info = bytearray(structs.CAM_IMG_INFO_SIZE)
+        self.last_sequence = 0
+        self.missed = 0  # Frames dropped by the server for this client, from gaps in the sequence numbers
+
+    def read(self, out: np.ndarray | None = None) -> ReceivedFrame:
+        """Receive the next frame.
+        Args:
+            out (np.ndarray | None): Array to receive the image into, used if it has the frame's shape and type,
+                otherwise a new array is allocated.
+        Raises:
+            ConnectionError: If the server closed the connection.
+        Returns:
+            ReceivedFrame: The frame.
+        """
+        _recv_into(self.sock, memoryview(self._header))
+        (magic, version, sequence, frame_count, camera_time, host_time_ns, height, width, channels, dtype,
+         info_size, image_size) = _FRAME_HEADER.unpack(self._header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ConnectionError(f"Unexpected frame header {magic!r} version {version}.")
+
+        info = None
+        if info_size:
+            if info_size != len(self._info):
+                self._info = bytearray(info_size)
+            _recv_into(self.sock, memoryview(self._info))
+            if info_size == structs.CAM_IMG_INFO_SIZE:
+                info = structs.CAM_ImageInfo.from_buffer_copy(self._info)
+
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        if out is None or out.shape != shape or out.dtype != dtype or not out.flags.c_contiguous:
+            out = np.empty(shape, dtype)
+        if out.nbytes != image_size:
+            raise ConnectionError(f"Frame size {image_size} does not match its shape {shape} and type {dtype}.")
+        _recv_into(self.sock, memoryview(out).cast("B"))
+
+        if self.last_sequence and sequence > self.last_sequence + 1:
+            self.missed += sequence - self.last_sequence - 1
+        self.last_sequence = sequence
+        return ReceivedFrame(out, sequence, frame_count, camera_time, host_time_ns, info)
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
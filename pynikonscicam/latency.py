@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class LatencyRecorder:
+    """Fixed-size ring buffer of per-stage timestamps for an acquisition path.
+
+    Each record holds len(stages) + 1 monotonic timestamps from time.perf_counter_ns(), marking the start of the
+    first stage and the end of each stage. Recording a frame is a single row write into a preallocated array,
+    the durations, percentiles and histograms are only computed when requested.
+
+    Example:
+        recorder = camera.enable_latency_recording(capacity=4096)
+        for _ in range(1000):
+            camera.get_image()
+        print(recorder)
+    """
+    def __init__(self, stages: tuple[str, ...], capacity: int = 4096) -> None:
+        """
+        Args:
+            stages (tuple[str, ...]): Names of the stages, in order.
+            capacity (int): Number of records kept, the oldest are overwritten once full.
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.stages = tuple(stages)
+        self.capacity = capacity
+        self._timestamps = np.zeros((capacity, len(self.stages) + 1), dtype=np.int64)
+        self._count = 0  # Total number of records made, including overwritten ones
+
+    def record(self, *timestamps: int) -> None:
+        """Record the timestamps of one pass through the stages.
+        Args:
+            *timestamps (int): len(stages) + 1 timestamps in nanoseconds, from time.perf_counter_ns().
+        """
+        self._timestamps[self._count % self.capacity] = timestamps
+        self._count += 1
+
+    def clear(self) -> None:
+        """Discard all records."""
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self) -> int:
+        """Total number of records made since creation or the last clear, including overwritten ones."""
+        return self._count
+
+    def durations(self) -> np.ndarray:
+        """Get the duration of each stage for the stored records, oldest first.
+        Returns:
+            np.ndarray: Array of shape (records, stages) of durations in nanoseconds.
+        """
+        n = len(self)
+        if self._count > self.capacity:
+            start = self._count % self.capacity
+            timestamps = np.roll(self._timestamps, -start, axis=0)
+        else:
+            timestamps = self._timestamps[:n]
+        return np.diff(timestamps, axis=1)
+
+    def summary(self, percentiles: tuple[float, ...] = (50.0, 90.0, 99.0, 99.9)) -> dict[str, dict[str, float]]:
+        """Get statistics of each stage and of the total, in microseconds.
+        Args:
+            percentiles (tuple[float, ...]): Percentiles to calculate.
+        Returns:
+            dict[str, dict[str, float]]: Maps stage name (and "total") to its mean, min, max and percentiles,
+                e.g. summary["get_image"]["p99"].
+        """
+        durations = self.durations()
+        if durations.shape[0] == 0:
+            return {}
+        durations = np.column_stack((durations, durations.sum(axis=1))) / 1e3
+
+        result = {}
+        for i, name in enumerate(self.stages + ("total",)):
+            column = durations[:, i]
+            stats = {"mean": float(column.mean()), "min": float(column.min()), "max": float(column.max())}
+            for p, value in zip(percentiles, np.percentile(column, percentiles)):
+                stats[f"p{p:g}"] = float(value)
+            result[name] = stats
+        return result
+
+    def histogram(self, stage: str, bins: int | np.ndarray = 50) -> tuple[np.ndarray, np.ndarray]:
+        """Get a histogram of the durations of a stage, in microseconds.
+        Args:
+            stage (str): Stage name, or "total".
+            bins (int | np.ndarray): Number of logarithmically spaced bins, or the bin edges in microseconds.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The counts and the bin edges, as from np.histogram.
+        """
+        durations = self.durations()
+        if stage == "total":
+            column = durations.sum(axis=1) / 1e3
+        elif stage in self.stages:
+            column = durations[:, self.stages.index(stage)] / 1e3
+        else:
+            raise ValueError(f"Unknown stage {stage}, must be one of {', '.join(self.stages)} or total.")
+
+        if np.isscalar(bins) and column.size:
+            low = max(float(column.min()), 1e-3)
+            high = max(float(column.max()), low * 1.001)
+            bins = np.geomspace(low, high, int(bins) + 1)
+        return np.histogram(column, bins=bins)
+
+    def __repr__(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return "LatencyRecorder: no records"
+        columns = list(next(iter(summary.values())))
+        name_width = max(len(name) for name in summary)
+        lines = [f"Latency (us) over {len(self)} records", " " * name_width + "".join(f"{c:>12}" for c in columns)]
+        for name, stats in summary.items():
+            lines.append(f"{name:<{name_width}}" + "".join(f"{stats[c]:>12.1f}" for c in columns))
+        return "\n".join(lines)
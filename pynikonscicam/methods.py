@@ -144,21 +144,21 @@ def set_feature_value(camera_handle: int, feature: s.CAM_FeatureValue, value) ->
     features.uiCountUsed = 1
     features.pstFeatureValue = ctypes.pointer(feature)
 
-    match feature_id:
-        case c.ECamFeatureId.Format:
-            value: tuple[c.ECamFormatColor, c.ECamFormatSize] = value
-            setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], value)
-        case _:
-            setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], int(value))
+    previous = s.CAM_Variant.from_buffer_copy(feature.stVariant)  # Restored if the value is not accepted
+    try:
+        set_variant_value(feature.stVariant, value)
 
-    # setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], value)
-    # setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], int(value))
+        # setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], value)
+        # setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], int(value))
 
-    result = pDsCamDLL.CAM_SetFeatures(camera_handle, ctypes.byref(features))
+        result = pDsCamDLL.CAM_SetFeatures(camera_handle, ctypes.byref(features))
 
-    # features is updated above, TODO Add check for updated value?
-    if result != ErrorCodes.OK:
-        raise Exception(f"Failed to set feature {feature_id}. Error code: {ErrorCodes(result).name}")
+        # features is updated above, TODO Add check for updated value?
+        if result != ErrorCodes.OK:
+            raise Exception(f"Failed to set feature {feature_id}. Error code: {ErrorCodes(result).name}")
+    except Exception:
+        feature.stVariant = previous
+        raise
 
 
 def set_feature_values(camera_handle: int, features: dict[s.CAM_FeatureValue, Any]) -> None:
@@ -168,7 +168,7 @@ def set_feature_values(camera_handle: int, features: dict[s.CAM_FeatureValue, An
         features (dict[CAM_FeatureValue, Any]): Dictionary of features and their values
 
     Raises:
-        Exception: If setting the features fails for any reason
+        Exception: If setting the features fails for any reason, the features keep their previous values
 
     Example:
         set_feature_values(camera_handle, features={feature1: value1, feature2: value2})
@@ -179,17 +179,23 @@ def set_feature_values(camera_handle: int, features: dict[s.CAM_FeatureValue, An
     features_vector.uiCountUsed = len(features)
     features_vector.pstFeatureValue = (s.CAM_FeatureValue * len(features))()
 
-    for i, (feature, value) in enumerate(features.items()):
-        # feature_id = feature.uiFeatureId
-        features_vector.pstFeatureValue[i] = feature
-        setattr(feature.stVariant.Value, c.VarTypeAttrMap[feature.stVariant.eVarType], int(value))
+    previous = [s.CAM_Variant.from_buffer_copy(feature.stVariant) for feature in features]  # Restored on failure
+    try:
+        for i, (feature, value) in enumerate(features.items()):
+            # Set the value before copying the feature into the vector, assigning copies the struct
+            set_variant_value(feature.stVariant, value)
+            features_vector.pstFeatureValue[i] = feature
 
-    result = pDsCamDLL.CAM_SetFeatures(camera_handle, ctypes.byref(features_vector))
+        result = pDsCamDLL.CAM_SetFeatures(camera_handle, ctypes.byref(features_vector))
 
-    # features is updated above, TODO Add check for updated value?
-    if result != ErrorCodes.OK:
-        failed_features = [feature.uiFeatureId for feature in features.items()]
-        raise Exception(f"Failed to set features {failed_features}. Error code: {ErrorCodes(result).name}")
+        # features is updated above, TODO Add check for updated value?
+        if result != ErrorCodes.OK:
+            failed_features = [feature.uiFeatureId for feature in features]
+            raise Exception(f"Failed to set features {failed_features}. Error code: {ErrorCodes(result).name}")
+    except Exception:
+        for feature, variant in zip(features, previous):
+            feature.stVariant = variant
+        raise
 
 
 def set_features(camera_handle: int, features: s.Vector_CAM_FeatureValue) -> None:
@@ -268,15 +274,27 @@ def get_feature_value(feature: s.CAM_FeatureValue):
          | MultiExposureTimeFeature | FormatFeature | SizeFeature
         ): The value of the feature converted to a Python object.
     """
-    variant_value: s.CAM_Variant = feature.stVariant.Value
-    variant_type: c.ECamVariantRunType = feature.stVariant.eVarType
+    return get_variant_value(feature.stVariant)
+
+
+def get_variant_value(variant: s.CAM_Variant):
+    """
+    Get the value held by a variant, e.g. a feature value or a feature description range limit.
+    Args:
+        variant (CAM_Variant): Variant
+
+    Returns:
+        The value of the variant converted to a Python object, see get_feature_value.
+    """
+    variant_value: s.CAM_Variant.VariantUnion = variant.Value
+    variant_type: c.ECamVariantRunType = variant.eVarType
     match variant_type:
         # TODO - Add guard and more cases to match e.g. exposure mode, returning the enum instead
         case (c.ECamVariantRunType.evrt_int32
               | c.ECamVariantRunType.evrt_uint32
               | c.ECamVariantRunType.evrt_int64
               | c.ECamVariantRunType.evrt_uint64):
-            return int(variant_value.i64Value)
+            return int(getattr(variant_value, c.VarTypeAttrMap[variant_type]))
 
         case c.ECamVariantRunType.evrt_double:
             return float(variant_value.dValue)
@@ -337,6 +355,63 @@ def get_feature_value(feature: s.CAM_FeatureValue):
             raise RuntimeError("Unknown feature value type.")
 
 
+def set_variant_value(variant: s.CAM_Variant, value) -> None:
+    """
+    Set the value held by a variant from a Python object, the inverse of get_variant_value.
+    Args:
+        variant (CAM_Variant): Variant, its eVarType must already be set.
+        value: int, float or bool for scalar variants, the matching NamedTuple (e.g. FormatFeature) or a plain
+            tuple in the same field order for structured variants.
+
+    Raises:
+        ValueError: If the variant type cannot be set.
+    """
+    variant_value: s.CAM_Variant.VariantUnion = variant.Value
+    variant_type: c.ECamVariantRunType = variant.eVarType
+    match variant_type:
+        case (c.ECamVariantRunType.evrt_int32
+              | c.ECamVariantRunType.evrt_uint32
+              | c.ECamVariantRunType.evrt_int64
+              | c.ECamVariantRunType.evrt_uint64):
+            setattr(variant_value, c.VarTypeAttrMap[variant_type], int(value))
+
+        case c.ECamVariantRunType.evrt_double:
+            variant_value.dValue = float(value)
+
+        case c.ECamVariantRunType.evrt_bool:
+            variant_value.bValue = bool(value)
+
+        case c.ECamVariantRunType.evrt_Area:
+            area = c.AreaFeature(*value)
+            variant_value.stArea = s.CAM_Area(uiLeft=area.left, uiTop=area.top, uiWidth=area.width, uiHeight=area.height)
+
+        case c.ECamVariantRunType.evrt_Position:
+            position = c.PositionFeature(*value)
+            variant_value.stPosition = s.CAM_Position(uiX=position.x, uiY=position.y)
+
+        case c.ECamVariantRunType.evrt_TriggerOption:
+            option = c.TriggerOptionFeature(*value)
+            variant_value.stTriggerOption = s.CAM_TriggerOption(uiFrameCount=option.frame_count, iDelayTime=option.delay_time)
+
+        case c.ECamVariantRunType.evrt_MultiExposureTime:
+            multi_exposure = c.MultiExposureTimeFeature(*value)
+            stMultiExposureTime = s.CAM_MultiExposureTime(uiNum=multi_exposure.num_exposures)
+            for i, exposure_time in enumerate(multi_exposure.exposure_times):
+                stMultiExposureTime.uiExposureTime[i] = exposure_time
+            variant_value.stMultiExposureTime = stMultiExposureTime
+
+        case c.ECamVariantRunType.evrt_Format:
+            image_format = c.FormatFeature(*value)
+            variant_value.stFormat = s.CAM_Format(eColor=image_format.colour, eMode=image_format.mode)
+
+        case c.ECamVariantRunType.evrt_Size:
+            size = c.SizeFeature(*value)
+            variant_value.stSize = s.CAM_Size(uiWidth=size.width, uiHeight=size.height)
+
+        case _:
+            raise ValueError(f"Cannot set a value of variant type {c.ECamVariantRunType(variant_type).name}.")
+
+
 # CAM_GetImage
 pDsCamDLL.CAM_GetImage.argtypes = [
     ctypes.c_uint32,  # IN const lx_uint32 uiCameraHandle
@@ -406,13 +481,28 @@ def poll_event(camera_handle: int, e_event_type: c.ECamEventType) -> s.CAM_Event
 
     return pstEvent
 
-# # CAM_SetNoticeCallback
-# pDsCamDLL.CAM_SetNoticeCallback.argtypes = [
-#     ctypes.c_uint32,  # IN const lx_uint32 uiCameraHandle
-#     s.FCAM_NoticeCallback,  # IN FCAM_NoticeCallback fCAM_NoticeCallback
-#     ctypes.c_void_p  # IN void* pTransData
-# ]
-# pDsCamDLL.CAM_SetNoticeCallback.restype = ErrorCodes
+# CAM_SetNoticeCallback
+pDsCamDLL.CAM_SetNoticeCallback.argtypes = [
+    ctypes.c_uint32,  # IN const lx_uint32 uiCameraHandle
+    s.FCAM_NoticeCallback,  # IN FCAM_NoticeCallback fCAM_NoticeCallback
+    ctypes.c_void_p  # IN void* pTransData
+]
+pDsCamDLL.CAM_SetNoticeCallback.restype = ErrorCodes
+
+
+def set_notice_callback(camera_handle: int, callback: s.FCAM_NoticeCallback | None) -> None:
+    """Set the function called by the SDK when a notice occurs, e.g. a temperature update.
+    NOTE The caller must keep a reference to the callback for as long as it is set.
+    Args:
+        uiCameraHandle (int): Camera handle
+        fCAM_NoticeCallback (FCAM_NoticeCallback | None): Callback, or None to remove it
+    """
+    if callback is None:
+        callback = ctypes.cast(None, s.FCAM_NoticeCallback)
+    result = pDsCamDLL.CAM_SetNoticeCallback(camera_handle, callback, None)
+
+    if result != ErrorCodes.OK:
+        raise Exception(f"Failed to set notice callback. Error code: {ErrorCodes(result).name}")
 
 # # CAM_SetEventCallback
 # pDsCamDLL.CAM_SetEventCallback.argtypes = [
@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, TYPE_CHECKING
+
+from . import structures as structs
+from . import constants as consts
+from . import tracing as tracing
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+
+class _SdkCallCounters:
+    """Trace sink keeping a call count, cumulative duration and error count per SDK entry point, counting only the
+    calls made with one camera's handle."""
+    def __init__(self, camera: "NikonCamera") -> None:
+        self.camera = camera  # Its handle is read on each call, as recovery may reopen the camera
+        self.calls: dict[str, list[int]] = {}  # name -> [count, total ns, errors]
+
+    def bind_args(self, name: str) -> Callable[[int, int, int, tuple], None]:
+        counters = self.calls.setdefault(name, [0, 0, 0])
+        camera = self.camera
+
+        def record(start: int, end: int, result: int, args: tuple) -> None:
+            if not args or args[0] != camera.camera_handle:
+                return
+            counters[0] += 1
+            counters[1] += end - start
+            if result:
+                counters[2] += 1
+        return record
+
+
+class CameraMetrics:
+    """Health and throughput counters of a NikonCamera, exported in the Prometheus text format.
+
+    The counters are plain attributes updated by a single writer each (get_image, the event dispatcher thread or the
+    SDK notice callback) without locks, reading them for export only needs a consistent enough snapshot.
+
+    Example:
+        metrics = camera.enable_metrics(port=9100)
+        # curl http://127.0.0.1:9100/metrics
+    """
+    def __init__(self, camera: "NikonCamera", fps_smoothing: float = 0.1) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera the metrics belong to.
+            fps_smoothing (float): Weight of the latest frame interval in the smoothed frame rate.
+        """
+        self.camera = camera
+        self.fps_smoothing = fps_smoothing
+        camera_name = camera.camera_name.replace("\\", "\\\\").replace('"', '\\"')
+        self.labels = f'serial="{camera.serial_number}",camera="{camera_name}"'
+
+        self.frames_total = 0
+        self.bytes_total = 0
+        self.frame_gaps_total = 0  # Occurrences of the frame counter skipping
+        self.frames_dropped_total = 0  # Frames skipped over by the frame counter
+        self.trans_errors_total = 0
+        self.bus_resets_total = 0
+        self.temperature_celsius = math.nan
+        self.last_frame_time = math.nan  # Unix time of the latest frame
+        self._frame_interval = math.nan  # Smoothed frame interval in seconds
+        self._last_frame_count = -1
+        self._last_frame_perf = 0.0
+
+        self.sdk_calls = _SdkCallCounters(camera)
+        self._tracer: tracing.SdkTracer | None = None
+
+    def on_frame(self, frame_count: int, nbytes: int) -> None:
+        """Record a frame received by get_image.
+        Args:
+            frame_count (int): The camera's frame counter, CAM_Image.uiFrameCount.
+            nbytes (int): Size of the image data.
+        """
+        now = time.perf_counter()
+        if self._last_frame_count >= 0:
+            skipped = frame_count - self._last_frame_count - 1
+            if skipped > 0:
+                self.frame_gaps_total += 1
+                self.frames_dropped_total += skipped
+            interval = now - self._last_frame_perf
+            if math.isnan(self._frame_interval):
+                self._frame_interval = interval
+            else:
+                self._frame_interval += self.fps_smoothing * (interval - self._frame_interval)
+        self._last_frame_count = frame_count
+        self._last_frame_perf = now
+        self.last_frame_time = time.time()
+        self.frames_total += 1
+        self.bytes_total += nbytes
+
+    @property
+    def fps(self) -> float:
+        """Smoothed frame rate, 0 if fewer than two frames have been received."""
+        if math.isnan(self._frame_interval) or self._frame_interval <= 0:
+            return 0.0
+        return 1.0 / self._frame_interval
+
+    def _on_trans_error(self, event: structs.CAM_Event) -> None:
+        self.trans_errors_total += 1
+
+    def _on_bus_reset(self, event: structs.CAM_Event) -> None:
+        if event.stBusReset.eBusResetCode == consts.ECamEventBusResetCode.ecebrcHappened:
+            self.bus_resets_total += 1
+
+    def _on_info_notice(self, notice: structs.CAM_Notice) -> None:
+        if notice.stInfo.eCode == consts.ECamNoticeInfoCode.ecnicTemperature:
+            self.temperature_celsius = float(notice.stInfo.dValue)  # A double, 0.0 is a valid temperature
+
+    def attach(self, trace_sdk_calls: bool = True) -> None:
+        """Subscribe to the camera's error events and notices, and optionally trace SDK call latencies."""
+        events = self.camera.events
+        events.subscribe(consts.ECamEventType.ecetTransError, self._on_trans_error)
+        events.subscribe(consts.ECamEventType.ecetBusReset, self._on_bus_reset)
+        events.subscribe_notice(consts.ECamNoticeType.ecntInfo, self._on_info_notice)
+        if trace_sdk_calls and self._tracer is None:
+            self._tracer = tracing.SdkTracer(self.sdk_calls)
+            self._tracer.enable()
+
+    def detach(self) -> None:
+        events = self.camera.events
+        events.unsubscribe(consts.ECamEventType.ecetTransError, self._on_trans_error)
+        events.unsubscribe(consts.ECamEventType.ecetBusReset, self._on_bus_reset)
+        events.unsubscribe_notice(consts.ECamNoticeType.ecntInfo, self._on_info_notice)
+        if self._tracer is not None:
+            self._tracer.disable()
+            self._tracer = None
+
+    def samples(self) -> list[tuple[str, str, str, str, str, float]]:
+        """Get the current values as (family, type, help, sample name, labels, value)."""
+        samples = []
+        for name, metric_type, help_text, value in (
+                ("pynikonscicam_frames_total", "counter", "Frames received.", self.frames_total),
+                ("pynikonscicam_bytes_total", "counter", "Image bytes received.", self.bytes_total),
+                ("pynikonscicam_fps", "gauge", "Smoothed frame rate.", self.fps),
+                ("pynikonscicam_frame_gaps_total", "counter", "Times the camera frame counter skipped.",
+                 self.frame_gaps_total),
+                ("pynikonscicam_frames_dropped_total", "counter", "Frames missing from the camera frame counter.",
+                 self.frames_dropped_total),
+                ("pynikonscicam_last_frame_timestamp_seconds", "gauge", "Unix time of the latest frame.",
+                 self.last_frame_time),
+                ("pynikonscicam_trans_errors_total", "counter", "Transfer error events (ecetTransError).",
+                 self.trans_errors_total),
+                ("pynikonscicam_bus_resets_total", "counter", "Bus reset events (ecetBusReset).", self.bus_resets_total),
+                ("pynikonscicam_temperature_celsius", "gauge", "Sensor temperature from ecnicTemperature notices.",
+                 self.temperature_celsius)):
+            samples.append((name, metric_type, help_text, name, self.labels, value))
+
+        for name, (count, total_ns, errors) in list(self.sdk_calls.calls.items()):
+            labels = f'{self.labels},entry_point="{name}"'
+            family, help_text = "pynikonscicam_sdk_call_seconds", "Duration of SDK calls."
+            samples.append((family, "summary", help_text, family + "_count", labels, count))
+            samples.append((family, "summary", help_text, family + "_sum", labels, total_ns / 1e9))
+            samples.append(("pynikonscicam_sdk_call_errors_total", "counter",
+                            "SDK calls returning an error code, CAM_EventPolling returns ERR_ACCESSDENIED when there is no event.",
+                            "pynikonscicam_sdk_call_errors_total", labels, errors))
+        return samples
+
+
+def render_prometheus(metrics: list[CameraMetrics]) -> str:
+    """Render the metrics of several cameras in the Prometheus text exposition format."""
+    families: dict[str, tuple[str, str, list[str]]] = {}
+    for camera_metrics in metrics:
+        for family, metric_type, help_text, name, labels, value in camera_metrics.samples():
+            samples = families.setdefault(family, (metric_type, help_text, []))[2]
+            samples.append(f"{name}{{{labels}}} {_format_value(value)}")
+
+    lines = []
+    for family, (metric_type, help_text, samples) in families.items():
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+
+class MetricsServer:
+    """Serves the metrics of one or more cameras at http://host:port/metrics from a background thread."""
+    def __init__(self, metrics: list[CameraMetrics] | None = None, host: str = "127.0.0.1", port: int = 9100) -> None:
+        """
+        Args:
+            metrics (list[CameraMetrics] | None): The metrics to serve, more can be added with add().
+            host (str): Address to listen on, the default only accepts local connections.
+            port (int): Port to listen on, 0 picks a free port.
+        """
+        self.metrics: list[CameraMetrics] = list(metrics or [])
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render_prometheus(server.metrics).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def add(self, metrics: CameraMetrics) -> None:
+        self.metrics.append(metrics)
+
+    def remove(self, metrics: CameraMetrics) -> None:
+        if metrics in self.metrics:
+            self.metrics.remove(metrics)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
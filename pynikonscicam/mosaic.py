@@ -0,0 +1,289 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from .camera_class_nikon import NikonCamera
+
+
+class Tile(NamedTuple):
+    index: int  # Order of acquisition
+    row: int
+    column: int
+    y: int  # Top of the tile in the canvas, in pixels
+    x: int  # Left of the tile in the canvas, in pixels
+    stage_position: tuple[float, float]  # (x, y) passed to the stage, in the stage's units
+
+
+class MosaicReport(NamedTuple):
+    tiles: int
+    duration: float  # Seconds for the whole mosaic
+    stage_wait: float  # Seconds spent waiting for the stage after a tile was acquired, not hidden behind writing
+    acquire: float  # Seconds in get_image
+    write: float  # Seconds writing (and blending) tiles into the canvas, overlapped with the stage and acquisition
+
+
+def plan_grid(
+        rows: int,
+        columns: int,
+        tile_shape: tuple[int, ...],
+        overlap: float = 0.1,
+        pixel_size: float = 1.0,
+        origin: tuple[float, float] = (0.0, 0.0),
+        serpentine: bool = True,
+        ) -> list[Tile]:
+    """Plan a regular grid of tiles.
+    Args:
+        rows (int): Rows of tiles.
+        columns (int): Columns of tiles.
+        tile_shape (tuple[int, ...]): Shape of each image, e.g. camera.image_shape.
+        overlap (float): Fraction of a tile that overlaps its neighbours, in each direction.
+        pixel_size (float): Size of a pixel in the stage's units, at the sample.
+        origin (tuple[float, float]): (x, y) stage position of the first tile.
+        serpentine (bool): Acquire every other row backwards, so the stage never returns to the start of a row.
+    Returns:
+        list[Tile]: The tiles, in acquisition order.
+    """
+    if rows < 1 or columns < 1:
+        raise ValueError("A mosaic needs at least one row and one column.")
+    if not 0 <= overlap < 0.5:
+        raise ValueError("Overlap must be at least 0 and less than 0.5.")
+    height, width = tile_shape[:2]
+    step_y = round(height * (1 - overlap))
+    step_x = round(width * (1 - overlap))
+    tiles = []
+    for row in range(rows):
+        order = range(columns - 1, -1, -1) if serpentine and row % 2 else range(columns)
+        for column in order:
+            y, x = row * step_y, column * step_x
+            tiles.append(Tile(len(tiles), row, column, y, x,
+                              (origin[0] + x * pixel_size, origin[1] + y * pixel_size)))
+    return tiles
+
+
+def _ramp(length: int, rising: bool) -> np.ndarray:
+    """Weights of a new tile across an overlap, from near 0 at the tile's edge to near 1 inside."""
+    ramp = (np.arange(length, dtype=np.float32) + 0.5) / length
+    return ramp if rising else ramp[::-1]
+
+
+class MosaicAcquirer:
+    """Acquires a mosaic of tiles straight into a canvas on disk, a .npy file opened as a numpy.memmap.
+
+    For each tile the stage is moved with move_stage and an image is taken with get_image. The move to the next tile
+    starts as soon as the camera has received the image, while it is still fetched and decoded, and a writer thread
+    copies it into the canvas. The stage move is thus hidden behind fetching the image and writing (and blending) it,
+    and memory use is two tiles whatever the size of the mosaic.
+
+    With blend, overlaps with tiles already written are blended linearly, the new tile's weight rising from 0 at its
+    edge to 1 across the overlap. Edges are blended where a tile already written in a neighbouring row or column of
+    the grid overlaps them along their whole length, as in a regular grid (see plan_grid); elsewhere the new tile
+    overwrites the canvas.
+
+    Example:
+        tiles = plan_grid(20, 30, camera.image_shape, overlap=0.1, pixel_size=0.65)
+        mosaic = MosaicAcquirer(camera, tiles, lambda tile: stage.move_to(*tile.stage_position), "slide.npy")
+        report = mosaic.run()
+        canvas = np.load("slide.npy", mmap_mode="r")
+    """
+    def __init__(
+            self,
+            camera: NikonCamera,
+            tiles: list[Tile],
+            move_stage: Callable[[Tile], None],
+            path: str | os.PathLike,
+            blend: bool = True,
+            settle: float = 0.0,
+            flush_every: int = 16,
+            on_tile: Callable[[Tile, np.ndarray], None] | None = None,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera, its image format must not change during the mosaic.
+            tiles (list[Tile]): The tiles, in acquisition order.
+            move_stage (Callable[[Tile], None]): Moves the stage to a tile, returning once it has arrived. Called from
+                a background thread.
+            path (str | os.PathLike): The canvas file, created or overwritten.
+            blend (bool): Blend the overlaps of neighbouring tiles.
+            settle (float): Seconds to wait after each move before acquiring.
+            flush_every (int): Tiles between flushes of the canvas to disk, which bounds the unwritten pages in memory.
+            on_tile (Callable[[Tile, np.ndarray], None] | None): Called with each tile's image from the writer thread,
+                e.g. for a preview. The image must be copied to be kept.
+        """
+        if not tiles:
+            raise ValueError("The mosaic has no tiles.")
+        self.camera = camera
+        self.tiles = tiles
+        self.move_stage = move_stage
+        self.path = path
+        self.blend = blend
+        self.settle = settle
+        self.flush_every = flush_every
+        self.on_tile = on_tile
+        self.tile_shape = tuple(camera.image_shape)
+        self.dtype = np.dtype(camera.image_dtype)
+        height, width = self.tile_shape[:2]
+        self.canvas_shape = (max(tile.y for tile in tiles) + height, max(tile.x for tile in tiles) + width,
+                             *self.tile_shape[2:])
+        self.canvas: np.memmap | None = None
+        # (top, left, bottom, right) of the tiles written, by (row, column)
+        self._written: dict[tuple[int, int], list[tuple[int, int, int, int]]] = {}
+        self._move_error: BaseException | None = None
+        self._write_error: BaseException | None = None
+        self._write_time = 0.0
+
+    def _move(self, tile: Tile) -> None:
+        try:
+            self.move_stage(tile)
+        except BaseException as exc:
+            self._move_error = exc
+
+    def _start_move(self, tile: Tile) -> threading.Thread:
+        thread = threading.Thread(target=self._move, args=(tile,), name="MosaicStage", daemon=True)
+        thread.start()
+        return thread
+
+    def _overlaps(self, tile: Tile) -> tuple[int, int, int, int]:
+        """Widths of the overlaps of the (top, bottom, left, right) edges with tiles already written."""
+        height, width = self.tile_shape[:2]
+        top, left, bottom, right = tile.y, tile.x, tile.y + height, tile.x + width
+        overlaps = [0, 0, 0, 0]
+        neighbours = (rect for row in range(tile.row - 1, tile.row + 2)
+                      for column in range(tile.column - 1, tile.column + 2)
+                      for rect in self._written.get((row, column), ()))
+        for written_top, written_left, written_bottom, written_right in neighbours:
+            if written_left <= left and written_right >= right:  # Spans the tile's width
+                if written_top < top < written_bottom:
+                    overlaps[0] = max(overlaps[0], min(written_bottom, bottom) - top)
+                if written_top < bottom < written_bottom:
+                    overlaps[1] = max(overlaps[1], bottom - max(written_top, top))
+            if written_top <= top and written_bottom >= bottom:  # Spans the tile's height
+                if written_left < left < written_right:
+                    overlaps[2] = max(overlaps[2], min(written_right, right) - left)
+                if written_left < right < written_right:
+                    overlaps[3] = max(overlaps[3], right - max(written_left, left))
+        # Each overlap is kept within its half of the tile
+        return (min(overlaps[0], height // 2), min(overlaps[1], height // 2),
+                min(overlaps[2], width // 2), min(overlaps[3], width // 2))
+
+    def _write(self, tile: Tile, image: np.ndarray) -> None:
+        """Write a tile into the canvas, blending its edges that overlap tiles already written."""
+        canvas = self.canvas
+        height, width = self.tile_shape[:2]
+        top_overlap, bottom_overlap, left_overlap, right_overlap = self._overlaps(tile) if self.blend else (0, 0, 0, 0)
+        row_bands = [(0, top_overlap, _ramp(top_overlap, True)), (top_overlap, height - bottom_overlap, None),
+                     (height - bottom_overlap, height, _ramp(bottom_overlap, False))]
+        column_bands = [(0, left_overlap, _ramp(left_overlap, True)), (left_overlap, width - right_overlap, None),
+                        (width - right_overlap, width, _ramp(right_overlap, False))]
+        extra_axes = (1,) * (image.ndim - 2)
+        for row_start, row_end, row_weights in row_bands:
+            for column_start, column_end, column_weights in column_bands:
+                if row_start == row_end or column_start == column_end:
+                    continue
+                new = image[row_start:row_end, column_start:column_end]
+                target = canvas[tile.y + row_start:tile.y + row_end, tile.x + column_start:tile.x + column_end]
+                if row_weights is None and column_weights is None:
+                    target[...] = new
+                    continue
+                weights = np.ones((row_end - row_start, column_end - column_start), np.float32)
+                if row_weights is not None:
+                    weights *= row_weights[:, None]
+                if column_weights is not None:
+                    weights *= column_weights[None, :]
+                weights = weights.reshape(weights.shape + extra_axes)
+                existing = target.astype(np.float32)
+                blended = existing + weights * (new.astype(np.float32) - existing)
+                np.rint(blended, out=blended)
+                target[...] = blended.astype(self.dtype)
+        self._written.setdefault((tile.row, tile.column), []).append((tile.y, tile.x, tile.y + height, tile.x + width))
+
+    def _run_writer(self, pending: queue.Queue, buffers: list[np.ndarray], free: queue.Queue) -> None:
+        written = 0
+        while True:
+            job = pending.get()
+            if job is None:
+                return
+            tile, index = job
+            try:
+                if self._write_error is None:
+                    start = time.perf_counter()
+                    self._write(tile, buffers[index])
+                    written += 1
+                    if self.flush_every and written % self.flush_every == 0:
+                        self.canvas.flush()
+                    self._write_time += time.perf_counter() - start
+                    if self.on_tile is not None:
+                        self.on_tile(tile, buffers[index])
+            except BaseException as exc:
+                self._write_error = exc
+            finally:
+                free.put(index)
+
+    def run(self) -> MosaicReport:
+        """Acquire every tile into the canvas, which is left open in canvas.
+        Raises:
+            Exception: The first error of the stage, the camera or writing the canvas.
+        Returns:
+            MosaicReport: Timings of the mosaic.
+        """
+        self.canvas = np.lib.format.open_memmap(self.path, mode="w+", dtype=self.dtype, shape=self.canvas_shape)
+        self._written = {}
+        self._move_error = self._write_error = None
+        self._write_time = 0.0
+        buffers = [np.empty(self.tile_shape, self.dtype) for _ in range(2)]
+        free: queue.Queue[int] = queue.Queue()
+        for index in range(len(buffers)):
+            free.put(index)
+        pending: queue.Queue[tuple[Tile, int] | None] = queue.Queue()
+        writer = threading.Thread(target=self._run_writer, args=(pending, buffers, free), name="MosaicWriter",
+                                  daemon=True)
+        writer.start()
+
+        start = time.perf_counter()
+        stage_wait = acquire = 0.0
+        next_moves: list[threading.Thread] = []
+
+        def start_next_move() -> None:  # Move on once the image is received, while it is fetched and written
+            next_moves.append(self._start_move(self.tiles[i + 1]))
+
+        move = self._start_move(self.tiles[0])
+        try:
+            for i, tile in enumerate(self.tiles):
+                waited = time.perf_counter()
+                move.join()
+                stage_wait += time.perf_counter() - waited
+                if self._move_error is not None:
+                    raise self._move_error
+                if self._write_error is not None:
+                    raise self._write_error
+                if self.settle:
+                    time.sleep(self.settle)
+
+                index = free.get()  # Waits for the writer if it is two tiles behind
+                next_moves.clear()
+                acquired = time.perf_counter()
+                self.camera.get_image(out=buffers[index],
+                                      on_received=start_next_move if i + 1 < len(self.tiles) else None)
+                acquire += time.perf_counter() - acquired
+                if next_moves:
+                    move = next_moves[0]
+                pending.put((tile, index))
+        finally:
+            move.join()
+            for thread in next_moves:  # Started before get_image failed
+                thread.join()
+            pending.put(None)
+            writer.join()
+            self.canvas.flush()
+        if self._write_error is not None:
+            raise self._write_error
+        return MosaicReport(len(self.tiles), time.perf_counter() - start, stage_wait, acquire, self._write_time)
+
+    def close(self) -> None:
+        """Flush and close the canvas."""
+        if self.canvas is not None:
+            self.canvas.flush()
+            self.canvas = None
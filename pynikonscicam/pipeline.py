@@ -0,0 +1,609 @@
+import multiprocessing
+import multiprocessing.connection
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, NamedTuple, TYPE_CHECKING
+
+import numpy as np
+
+from .frame_ring import _attach
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+_ALIGNMENT = 64  # Alignment of each buffer in a shared pool
+_WAIT = 0.1  # Interval at which blocked workers check whether the pipeline was stopped
+
+
+class _End:
+    """Marks the end of the stream in a stage's input queue."""
+
+
+_END = _End()
+
+
+class _Item(NamedTuple):
+    sequence: int  # Order in which the source produced the item
+    value: Any
+    release: Callable[[], None] | None  # Returns the value's buffer to its pool once it is no longer used
+    ref: tuple | None  # (pool name, index, shape, dtype, offset) if the value is a buffer in a shared pool
+
+
+class StageReport(NamedTuple):
+    name: str
+    items: int
+    throughput: float  # Items per second since the pipeline started
+    busy: float  # Seconds spent in the stage's function, summed over its workers
+    stall: float  # Seconds spent waiting for a free buffer or for space in the next stage's queue
+    starve: float  # Seconds spent waiting for input
+    queue_depth: int  # Items waiting in the stage's input queue
+    max_queue_depth: int
+    errors: int
+
+
+class BufferPool:
+    """A fixed set of preallocated arrays, handed out with acquire() and returned with release().
+    A shared pool keeps its arrays in a multiprocessing.shared_memory block, so process workers can use them in place.
+    """
+    def __init__(self, shape: tuple[int, ...], dtype: np.dtype, count: int, shared: bool = False) -> None:
+        """
+        Args:
+            shape (tuple[int, ...]): Shape of each buffer.
+            dtype (np.dtype): Data type of each buffer.
+            count (int): Number of buffers.
+            shared (bool): Allocate the buffers in shared memory.
+        """
+        if count < 1:
+            raise ValueError("A buffer pool needs at least one buffer.")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.stride = -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+        self._shm: shared_memory.SharedMemory | None = None
+        if shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(self.stride * count, 1))
+            memory = self._shm.buf
+        else:
+            memory = bytearray(self.stride * count)
+        self.buffers = [np.ndarray(self.shape, self.dtype, memory, offset=i * self.stride) for i in range(count)]
+        self._free: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for index in range(count):
+            self._free.put(index)
+
+    @property
+    def name(self) -> str | None:
+        """Name of the shared memory block, None if the pool is not shared."""
+        return None if self._shm is None else self._shm.name
+
+    def ref(self, index: int) -> tuple | None:
+        """Reference from which a process worker can view a buffer of a shared pool."""
+        if self._shm is None:
+            return None
+        return self._shm.name, index, self.shape, self.dtype.str, index * self.stride
+
+    def acquire(self, stop: threading.Event | None = None) -> int | None:
+        """Wait for a free buffer.
+        Returns:
+            int | None: Index of the buffer in buffers, None if stop was set while waiting.
+        """
+        while True:
+            try:
+                return self._free.get(timeout=_WAIT)
+            except queue.Empty:
+                if stop is not None and stop.is_set():
+                    return None
+
+    def release(self, index: int) -> None:
+        self._free.put(index)
+
+    def close(self) -> None:
+        """Free the buffers, arrays from the pool must not be used afterwards."""
+        self.buffers = []
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class Source:
+    """Produces the items fed into a pipeline, from a single thread.
+
+    func is called as func(out) with a free buffer from the source's pool if buffer_shape is given, otherwise as
+    func(). It returns the item, or None at the end of the stream.
+    """
+    def __init__(
+            self,
+            func: Callable[..., Any],
+            count: int | None = None,
+            buffer_shape: tuple[int, ...] | None = None,
+            buffer_dtype: np.dtype = np.uint8,
+            pool_size: int | None = None,
+            name: str = "source",
+            ) -> None:
+        """
+        Args:
+            func (Callable): Produces each item.
+            count (int | None): Number of items to produce, until func returns None if None.
+            buffer_shape (tuple[int, ...] | None): Shape of the buffers passed to func, None to call func without one.
+            buffer_dtype (np.dtype): Data type of the buffers.
+            pool_size (int | None): Number of buffers, enough to fill the first stage's queue and workers if None.
+            name (str): Name shown in the pipeline's statistics.
+        """
+        self.func = func
+        self.count = count
+        self.buffer_shape = buffer_shape
+        self.buffer_dtype = buffer_dtype
+        self.pool_size = pool_size
+        self.name = name
+        self.workers = 1
+        self.mode = "thread"
+
+
+class CameraSource(Source):
+    """Source of images from NikonCamera.get_image, decoded straight into the pool's buffers."""
+    def __init__(self, camera: "NikonCamera", count: int | None = None, pool_size: int | None = None,
+                 name: str = "camera") -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera, its image format must not change while the pipeline runs.
+            count (int | None): Number of images to acquire, until the pipeline is stopped if None.
+            pool_size (int | None): Number of image buffers.
+            name (str): Name shown in the pipeline's statistics.
+        """
+        super().__init__(camera.get_image, count, camera.image_shape, camera.image_dtype, pool_size, name)
+
+
+class Stage:
+    """A processing step run by one or more workers, in threads or in child processes.
+
+    func is called as func(item, out) with a free buffer from the stage's pool if buffer_shape is given, otherwise as
+    func(item). Its return value is passed to the next stage. Returning the input array (processing in place) passes
+    the input's buffer on without a copy. The last stage of a pipeline is its sink, its return value is discarded.
+
+    Process workers need func to be picklable (a module level function) and receive input arrays from shared pools
+    as views, other values are pickled. A pickled input processed in place is sent back as a new value. With more than one worker, items may reach the next stage out of order.
+    """
+    def __init__(
+            self,
+            func: Callable[..., Any],
+            workers: int = 1,
+            mode: str = "thread",
+            queue_size: int = 4,
+            buffer_shape: tuple[int, ...] | None = None,
+            buffer_dtype: np.dtype = np.uint8,
+            pool_size: int | None = None,
+            name: str | None = None,
+            initializer: Callable[[], Any] | None = None,
+            ) -> None:
+        """
+        Args:
+            func (Callable): The processing function.
+            workers (int): Number of workers.
+            mode (str): "thread" or "process".
+            queue_size (int): Maximum number of items waiting for the stage, the previous stage stalls when it is full.
+            buffer_shape (tuple[int, ...] | None): Shape of the output buffers passed to func, None for no pool.
+            buffer_dtype (np.dtype): Data type of the output buffers.
+            pool_size (int | None): Number of output buffers, enough to fill the next stage's queue and workers if None.
+            name (str | None): Name shown in the pipeline's statistics, the function's name if None.
+            initializer (Callable[[], Any] | None): Picklable function run in each worker process before it starts.
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Stage mode must be 'thread' or 'process', not {mode!r}.")
+        if workers < 1:
+            raise ValueError("A stage needs at least one worker.")
+        self.func = func
+        self.workers = workers
+        self.mode = mode
+        self.queue_size = queue_size
+        self.buffer_shape = buffer_shape
+        self.buffer_dtype = buffer_dtype
+        self.pool_size = pool_size
+        self.name = name or getattr(func, "__name__", type(func).__name__)
+        self.initializer = initializer
+
+
+def _view(refs: dict[str, shared_memory.SharedMemory], ref: tuple) -> np.ndarray:
+    name, _, shape, dtype, offset = ref
+    if name not in refs:
+        refs[name] = _attach(name)
+    return np.ndarray(shape, np.dtype(dtype), refs[name].buf, offset=offset)
+
+
+def _process_worker(conn: multiprocessing.connection.Connection, func: Callable[..., Any],
+                    initializer: Callable[[], Any] | None) -> None:
+    """Run a stage's function in a child process for each (input ref, input value, output ref) from the pipe."""
+    if initializer is not None:
+        initializer()
+    pools: dict[str, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            input_ref, value, out_ref = message
+            if input_ref is not None:
+                value = _view(pools, input_ref)
+            out = None if out_ref is None else _view(pools, out_ref)
+            try:
+                result = func(value) if out is None else func(value, out)
+            except Exception as exc:
+                conn.send(("error", exc))
+                continue
+            if result is value and input_ref is not None:  # Edited in place in shared memory
+                conn.send(("input", None))
+            elif out is not None and result is out:
+                conn.send(("out", None))
+            else:
+                try:
+                    conn.send(("value", result))
+                except Exception as exc:  # The result could not be pickled
+                    conn.send(("error", RuntimeError(f"Result of {func} could not be sent from the worker: {exc}")))
+    finally:
+        for shm in pools.values():
+            shm.close()
+
+
+class _StageRuntime:
+    """State of a source or stage while the pipeline runs."""
+    def __init__(self, stage: Source | Stage, input_queue: queue.Queue | None) -> None:
+        self.stage = stage
+        self.input_queue = input_queue
+        self.output_queue: queue.Queue | None = None
+        self.pool: BufferPool | None = None
+        self.lock = threading.Lock()
+        self.finished_workers = 0
+        self.items = 0
+        self.busy = 0.0
+        self.stall = 0.0
+        self.starve = 0.0
+        self.max_queue_depth = 0
+        self.errors = 0
+        self.end_time: float | None = None
+
+    def add(self, busy: float, stall: float, starve: float) -> None:
+        with self.lock:
+            self.items += 1
+            self.busy += busy
+            self.stall += stall
+            self.starve += starve
+
+
+class Pipeline:
+    """Runs a source and a chain of stages concurrently, connected by bounded queues.
+
+    Each stage works on a different item at the same time, so the pipeline's throughput is that of its slowest stage
+    rather than the sum of all stages. A full queue or an exhausted buffer pool holds up the stages before it
+    (backpressure) instead of growing memory; the time each stage spends held up is reported as stall time by stats().
+
+    Example:
+        pipeline = Pipeline(CameraSource(camera, count=1000), [
+            Stage(flat_field_correct, workers=2),  # Corrects in place
+            Stage(bin_2x2, buffer_shape=(1024, 1024), buffer_dtype=np.uint16),
+            Stage(write_to_disk),
+        ])
+        pipeline.run()
+        print(pipeline)
+    """
+    def __init__(self, source: Source, stages: list[Stage]) -> None:
+        """
+        Args:
+            source (Source): Produces the items, e.g. a CameraSource.
+            stages (list[Stage]): The processing stages in order, the last is the sink.
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.source = source
+        self.stages = list(stages)
+        self._runtimes: list[_StageRuntime] = []
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+        self._start_time: float | None = None
+        self._context = multiprocessing.get_context("spawn")
+
+    def _build(self) -> None:
+        runtimes = [_StageRuntime(self.source, None)]
+        for stage in self.stages:
+            stage_queue: queue.Queue = queue.Queue(maxsize=stage.queue_size)
+            runtimes[-1].output_queue = stage_queue
+            runtimes.append(_StageRuntime(stage, stage_queue))
+
+        # Pools are shared when the stage producing or consuming their buffers runs in processes
+        for i, runtime in enumerate(runtimes):
+            stage = runtime.stage
+            if stage.buffer_shape is None:
+                continue
+            next_stage = runtimes[i + 1].stage if i + 1 < len(runtimes) else None
+            pool_size = stage.pool_size
+            if pool_size is None:
+                pool_size = stage.workers + 1 + (next_stage.queue_size + next_stage.workers if next_stage else 0)
+            shared = stage.mode == "process" or (next_stage is not None and next_stage.mode == "process")
+            runtime.pool = BufferPool(stage.buffer_shape, stage.buffer_dtype, pool_size, shared)
+        self._runtimes = runtimes
+
+    def start(self) -> None:
+        """Start the source and stage workers."""
+        if self._threads:
+            raise RuntimeError("Pipeline already started.")
+        self._build()
+        self._stop.clear()
+        self._error = None
+        self._start_time = time.perf_counter()
+
+        source_runtime = self._runtimes[0]
+        self._threads.append(threading.Thread(target=self._run_source, args=(source_runtime,),
+                                              name=f"Pipeline-{self.source.name}", daemon=True))
+        for runtime in self._runtimes[1:]:
+            for worker in range(runtime.stage.workers):
+                self._threads.append(threading.Thread(target=self._run_worker, args=(runtime,),
+                                                      name=f"Pipeline-{runtime.stage.name}-{worker}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _fail(self, runtime: _StageRuntime, exc: BaseException) -> None:
+        with runtime.lock:
+            runtime.errors += 1
+        if self._error is None:
+            self._error = exc
+        self._stop.set()
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        """Put an item in a queue, waiting for space. Returns False if the pipeline was stopped while waiting."""
+        while True:
+            try:
+                target.put(item, timeout=_WAIT)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get an item from a queue, waiting for one. Returns _END if the pipeline was stopped while waiting."""
+        while True:
+            try:
+                return source.get(timeout=_WAIT)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _END
+
+    def _finish(self, runtime: _StageRuntime) -> None:
+        """Pass the end of the stream on once every worker of the stage has finished."""
+        with runtime.lock:
+            runtime.finished_workers += 1
+            last = runtime.finished_workers == runtime.stage.workers
+            if last:
+                runtime.end_time = time.perf_counter()
+        target = runtime.output_queue
+        if not last:
+            target = runtime.input_queue  # For the stage's other workers
+        if target is not None:
+            self._put(target, _END)
+
+    def _run_source(self, runtime: _StageRuntime) -> None:
+        source = runtime.stage
+        pool = runtime.pool
+        sequence = 0
+        try:
+            while not self._stop.is_set() and (source.count is None or sequence < source.count):
+                start = time.perf_counter()
+                index = None
+                if pool is not None:
+                    index = pool.acquire(self._stop)
+                    if index is None:
+                        break
+                acquired = time.perf_counter()
+                try:
+                    value = source.func() if pool is None else source.func(pool.buffers[index])
+                except BaseException:
+                    if index is not None:
+                        pool.release(index)
+                    raise
+                if value is None:
+                    if index is not None:
+                        pool.release(index)
+                    break
+                produced = time.perf_counter()
+                item = self._make_item(sequence, value, pool, index)
+                if not self._put(runtime.output_queue, item):
+                    if item.release is not None:
+                        item.release()
+                    break
+                runtime.add(produced - acquired, acquired - start + time.perf_counter() - produced, 0.0)
+                sequence += 1
+        except BaseException as exc:
+            self._fail(runtime, exc)
+        finally:
+            self._finish(runtime)
+
+    @staticmethod
+    def _make_item(sequence: int, value: Any, pool: BufferPool | None, index: int | None) -> _Item:
+        if index is None:
+            return _Item(sequence, value, None, None)
+        if value is pool.buffers[index]:
+            return _Item(sequence, value, lambda: pool.release(index), pool.ref(index))
+        pool.release(index)  # The function returned something other than the buffer
+        return _Item(sequence, value, None, None)
+
+    def _run_worker(self, runtime: _StageRuntime) -> None:
+        stage = runtime.stage
+        pool = runtime.pool
+        conn = process = None
+        try:
+            if stage.mode == "process":
+                conn, child_conn = self._context.Pipe()
+                process = self._context.Process(target=_process_worker, args=(child_conn, stage.func, stage.initializer),
+                                                name=f"Pipeline-{stage.name}", daemon=True)
+                process.start()
+                child_conn.close()
+
+            while True:
+                start = time.perf_counter()
+                depth = runtime.input_queue.qsize()
+                item = self._get(runtime.input_queue)
+                if item is _END:
+                    break
+                received = time.perf_counter()
+                index = None
+                if pool is not None:
+                    index = pool.acquire(self._stop)
+                    if index is None:
+                        if item.release is not None:
+                            item.release()
+                        break
+                acquired = time.perf_counter()
+
+                try:
+                    if conn is not None:
+                        result = self._call_process(conn, item, pool, index)
+                    elif pool is None:
+                        result = stage.func(item.value)
+                    else:
+                        result = stage.func(item.value, pool.buffers[index])
+                except BaseException:
+                    if index is not None:
+                        pool.release(index)
+                    if item.release is not None:
+                        item.release()
+                    raise
+                processed = time.perf_counter()
+
+                if result is item.value:  # Processed in place, the input's buffer moves on
+                    if index is not None:
+                        pool.release(index)
+                    output = item
+                else:
+                    if item.release is not None:
+                        item.release()
+                    output = self._make_item(item.sequence, result, pool, index)
+
+                put = True
+                if runtime.output_queue is None:  # Sink
+                    if output.release is not None:
+                        output.release()
+                else:
+                    put = self._put(runtime.output_queue, output)
+                    if not put and output.release is not None:
+                        output.release()
+                with runtime.lock:
+                    runtime.max_queue_depth = max(runtime.max_queue_depth, depth)
+                runtime.add(processed - acquired, acquired - received + time.perf_counter() - processed,
+                            received - start)
+                if not put:
+                    break
+        except BaseException as exc:
+            self._fail(runtime, exc)
+        finally:
+            if conn is not None:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.kill()
+                conn.close()
+            self._finish(runtime)
+
+    @staticmethod
+    def _call_process(conn: multiprocessing.connection.Connection, item: _Item, pool: BufferPool | None,
+                      index: int | None) -> Any:
+        """Run the stage's function on an item in the worker's child process."""
+        out_ref = None if index is None else pool.ref(index)
+        conn.send((item.ref, None if item.ref is not None else item.value, out_ref))
+        try:
+            status, value = conn.recv()
+        except EOFError:
+            raise RuntimeError("Pipeline worker process died.") from None
+        match status:
+            case "input":
+                return item.value
+            case "out":
+                return pool.buffers[index]
+            case "error":
+                raise value
+            case _:
+                return value
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for the pipeline to finish processing.
+        Args:
+            timeout (float | None): Maximum time to wait in seconds, no limit if None.
+        Raises:
+            Exception: The first exception raised by the source or a stage, which stops the pipeline.
+        Returns:
+            bool: True if the pipeline finished, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.perf_counter(), 0))
+            if thread.is_alive():
+                return False
+        self._threads = []
+        for runtime in self._runtimes:
+            if runtime.pool is not None:
+                runtime.pool.close()
+                runtime.pool = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return True
+
+    def run(self) -> list[StageReport]:
+        """Run the pipeline until the source ends.
+        Returns:
+            list[StageReport]: Statistics of the source and each stage.
+        """
+        self.start()
+        self.join()
+        return self.stats()
+
+    def stop(self, timeout: float | None = 10) -> None:
+        """Stop the source and workers, discarding items still in the queues."""
+        self._stop.set()
+        self.join(timeout)
+
+    def stats(self) -> list[StageReport]:
+        """Get the statistics of the source and each stage, which can be called while the pipeline runs."""
+        now = time.perf_counter()
+        reports = []
+        for runtime in self._runtimes:
+            with runtime.lock:
+                elapsed = (runtime.end_time or now) - self._start_time
+                reports.append(StageReport(
+                    name=runtime.stage.name,
+                    items=runtime.items,
+                    throughput=runtime.items / elapsed if elapsed > 0 else 0.0,
+                    busy=runtime.busy,
+                    stall=runtime.stall,
+                    starve=runtime.starve,
+                    queue_depth=0 if runtime.input_queue is None else runtime.input_queue.qsize(),
+                    max_queue_depth=runtime.max_queue_depth,
+                    errors=runtime.errors,
+                ))
+        return reports
+
+    def __repr__(self) -> str:
+        reports = self.stats()
+        if not reports:
+            return "Pipeline: not started"
+        name_width = max(len(report.name) for report in reports)
+        columns = ("items", "items/s", "busy s", "stall s", "starve s", "queue", "max queue")
+        lines = [" " * name_width + "".join(f"{c:>11}" for c in columns)]
+        for r in reports:
+            lines.append(f"{r.name:<{name_width}}{r.items:>11}{r.throughput:>11.1f}{r.busy:>11.3f}{r.stall:>11.3f}"
+                         f"{r.starve:>11.3f}{r.queue_depth:>11}{r.max_queue_depth:>11}")
+        return "\n".join(lines)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self._stop.set()
+        self.join()
@@ -0,0 +1,235 @@
+import collections
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+
+class RecordedFrame(NamedTuple):
+    image: np.ndarray  # View of a pool buffer, only valid during the writer call
+    frame_count: int  # CAM_Image.uiFrameCount
+    camera_time: int  # CAM_Image.uiEndTime64
+    host_time_ns: int  # time.perf_counter_ns() when the frame was received
+
+
+class TriggeredEvent(NamedTuple):
+    number: int  # Events recorded before this one
+    trigger_time_ns: int  # time.perf_counter_ns() of the trigger() call
+    pre: list[RecordedFrame]  # Frames before the trigger, oldest first
+    post: list[RecordedFrame]  # Frames after the trigger
+
+
+class _Event:
+    def __init__(self, number: int, trigger_time_ns: int, pre: list[int], post_count: int) -> None:
+        self.number = number
+        self.trigger_time_ns = trigger_time_ns
+        self.pre = pre
+        self.post: list[int] = []
+        self.post_remaining = post_count
+
+
+class PreTriggerRecorder:
+    """Streams frames into a fixed ring of preallocated buffers so that the frames before an event can be kept.
+
+    Acquisition runs in a background thread, keeping the latest pre_frames frames. trigger() freezes those frames,
+    records post_frames more and passes them all to the writer on another thread. Acquisition carries on into the
+    buffers not held by the event, so the memory used is fixed at (2 * pre_frames + post_frames + 1) frames and
+    nothing is allocated per frame. If the writer falls behind, the pre-trigger window of the next event is shortened
+    rather than memory grown.
+
+    Example:
+        def write(event):
+            np.save(f"event_{event.number}.npy", np.stack([frame.image for frame in event.pre + event.post]))
+
+        with PreTriggerRecorder(camera, write, pre_frames=100, post_frames=20) as recorder:
+            while not rare_event_detected():
+                time.sleep(0.01)
+            recorder.trigger()
+    """
+    def __init__(
+            self,
+            camera: "NikonCamera",
+            writer: Callable[[TriggeredEvent], None],
+            pre_frames: int | None = None,
+            post_frames: int = 0,
+            pre_bytes: int | None = None,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera, its image format must not change while recording.
+            writer (Callable[[TriggeredEvent], None]): Called with each event from a background thread. The images are
+                returned to the ring when it returns, so it must copy any it keeps.
+            pre_frames (int | None): Frames kept before a trigger.
+            post_frames (int): Frames recorded after a trigger.
+            pre_bytes (int | None): Memory budget of the frames kept before a trigger, instead of pre_frames.
+        """
+        frame_nbytes = int(np.prod(camera.image_shape)) * np.dtype(camera.image_dtype).itemsize
+        if pre_bytes is not None:
+            pre_frames = pre_bytes // frame_nbytes
+        if pre_frames is None or pre_frames < 1:
+            raise ValueError("At least one pre-trigger frame is needed, set pre_frames or a larger pre_bytes.")
+        if post_frames < 0:
+            raise ValueError("post_frames cannot be negative.")
+        self.camera = camera
+        self.writer = writer
+        self.pre_frames = pre_frames
+        self.post_frames = post_frames
+
+        count = 2 * pre_frames + post_frames + 1  # + 1 for the frame being acquired
+        self._buffers = [np.empty(camera.image_shape, camera.image_dtype) for _ in range(count)]
+        self._frame_counts = np.zeros(count, np.uint64)
+        self._camera_times = np.zeros(count, np.uint64)
+        self._host_times = np.zeros(count, np.int64)
+
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._free: collections.deque[int] = collections.deque(range(count))
+        self._live: collections.deque[int] = collections.deque()  # The pre-trigger window, oldest first
+        self._event: _Event | None = None  # Event recording post-trigger frames
+        self._events: queue.Queue[_Event | None] = queue.Queue()
+        self._stop = threading.Event()
+        self._acquire_thread: threading.Thread | None = None
+        self._writer_thread: threading.Thread | None = None
+
+        self.frames = 0
+        self.events = 0
+        self.writer_errors = 0
+        self.error: BaseException | None = None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the frame buffers."""
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+    @property
+    def recording(self) -> bool:
+        return self._acquire_thread is not None and self._acquire_thread.is_alive()
+
+    def _take(self) -> int | None:
+        """Get a buffer for the next frame, reusing the oldest pre-trigger frame if none are free."""
+        if self._free:
+            return self._free.popleft()
+        if self._live:
+            return self._live.popleft()
+        return None
+
+    def _acquire(self) -> None:
+        camera = self.camera
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    index = self._take()
+                    while index is None:  # Every buffer is held by events waiting to be written
+                        self._released.wait(0.1)
+                        if self._stop.is_set():
+                            return
+                        index = self._take()
+
+                _, metadata = camera.get_image_with_metadata(out=self._buffers[index])
+                self._host_times[index] = time.perf_counter_ns()
+                self._frame_counts[index] = metadata.frame_count
+                self._camera_times[index] = metadata.camera_time
+
+                with self._lock:
+                    self.frames += 1
+                    event = self._event
+                    if event is None:
+                        self._live.append(index)
+                        if len(self._live) > self.pre_frames:
+                            self._free.append(self._live.popleft())
+                        continue
+                    event.post.append(index)
+                    event.post_remaining -= 1
+                    if event.post_remaining == 0:
+                        self._event = None
+                        self._events.put(event)
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            with self._lock:
+                if self._event is not None:  # Stopped during the post-trigger frames, write what was recorded
+                    self._events.put(self._event)
+                    self._event = None
+
+    def _frame(self, index: int) -> RecordedFrame:
+        return RecordedFrame(self._buffers[index], int(self._frame_counts[index]), int(self._camera_times[index]),
+                             int(self._host_times[index]))
+
+    def _write(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            try:
+                self.writer(TriggeredEvent(event.number, event.trigger_time_ns,
+                                           [self._frame(index) for index in event.pre],
+                                           [self._frame(index) for index in event.post]))
+            except Exception as exc:
+                self.writer_errors += 1
+                print(f"Error writing pre-trigger event {event.number}: {str(exc)}")
+            finally:
+                with self._lock:
+                    self._free.extend(event.pre)
+                    self._free.extend(event.post)
+                    self._released.notify_all()
+
+    def start(self) -> None:
+        """Start acquiring frames into the ring."""
+        if self.recording:
+            return
+        self._stop.clear()
+        self.error = None
+        self._writer_thread = threading.Thread(target=self._write, name="PreTriggerWriter", daemon=True)
+        self._writer_thread.start()
+        self._acquire_thread = threading.Thread(target=self._acquire, name="PreTriggerAcquisition", daemon=True)
+        self._acquire_thread.start()
+
+    def trigger(self) -> bool:
+        """Keep the frames before now and record post_frames more, then pass them to the writer.
+        Returns:
+            bool: False if the previous event is still recording its post-trigger frames, the trigger is ignored.
+        """
+        trigger_time_ns = time.perf_counter_ns()
+        with self._lock:
+            if self._event is not None:
+                return False
+            event = _Event(self.events, trigger_time_ns, list(self._live), self.post_frames)
+            self.events += 1
+            self._live.clear()
+            if self.post_frames == 0:
+                self._events.put(event)
+            else:
+                self._event = event
+        return True
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop acquiring and wait for the events already triggered to be written.
+        Raises:
+            Exception: The exception that stopped acquisition, if any.
+        """
+        self._stop.set()
+        if self._acquire_thread is not None:
+            self._acquire_thread.join(timeout)
+            self._acquire_thread = None
+        if self._writer_thread is not None:
+            self._events.put(None)
+            self._writer_thread.join(timeout)
+            self._writer_thread = None
+        with self._lock:
+            self._free.extend(self._live)
+            self._live.clear()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
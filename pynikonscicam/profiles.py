@@ -0,0 +1,230 @@
+import json
+import os
+from typing import Any, TYPE_CHECKING
+
+from . import methods as methods
+from . import structures as structs
+from . import constants as consts
+
+if TYPE_CHECKING:
+    from .camera_class_nikon import NikonCamera
+
+
+class FeatureProfile:
+    """A named set of feature values applied to a camera with a single CAM_SetFeatures call.
+
+    The values are compiled once per camera into a ready Vector_CAM_FeatureValue, copied from the camera's feature
+    structs so that every field other than the value is as the SDK reported it. Applying compares the compiled values
+    with the camera's feature map and only sends the features that differ.
+
+    Example:
+        fluorescence = FeatureProfile("fluorescence", {
+            ECamFeatureId.ExposureMode: 0,
+            ECamFeatureId.ExposureTime: 200_000,
+            ECamFeatureId.Gain: 400,
+        })
+        fluorescence.save("fluorescence.json")
+        camera.apply_profile(FeatureProfile.load("fluorescence.json"))
+    """
+    def __init__(self, name: str, values: dict[consts.ECamFeatureId, Any]) -> None:
+        """
+        Args:
+            name (str): Name of the profile.
+            values (dict[ECamFeatureId, Any]): Feature values, in the forms accepted by NikonCamera.set_feature_value.
+        """
+        self.name = name
+        self.values: dict[consts.ECamFeatureId, Any] = {consts.ECamFeatureId(i): v for i, v in values.items()}
+        self._compiled_camera: "NikonCamera | None" = None
+        self._compiled: dict[consts.ECamFeatureId, structs.CAM_FeatureValue] = {}
+        self._compiled_vector: structs.Vector_CAM_FeatureValue | None = None
+
+    def __repr__(self) -> str:
+        return f"FeatureProfile({self.name!r}, {self.values!r})"
+
+    @classmethod
+    def from_camera(cls, camera: "NikonCamera", name: str,
+                    feature_ids: list[consts.ECamFeatureId] | None = None) -> "FeatureProfile":
+        """Create a profile from the camera's current feature values.
+        Args:
+            camera (NikonCamera): The camera.
+            name (str): Name of the profile.
+            feature_ids (list[ECamFeatureId] | None): Features to include, all settable features if None.
+        """
+        if feature_ids is None:
+            feature_ids = [feature_id for feature_id, feature in camera.feature_map.items() if _is_settable(feature)]
+        return cls(name, {feature_id: methods.get_feature_value(camera.feature_map[feature_id])
+                          for feature_id in feature_ids})
+
+    def compile(self, camera: "NikonCamera") -> structs.Vector_CAM_FeatureValue:
+        """Check the values against the camera's feature descriptions and build the vector sent by apply_profile.
+        The result is kept until the profile is compiled for another camera.
+        Raises:
+            ValueError: If a feature is not available or not settable on the camera, or a value is not valid for it.
+        Returns:
+            Vector_CAM_FeatureValue: The compiled features, in the camera's feature order.
+        """
+        missing = [feature_id.name for feature_id in self.values if feature_id not in camera.feature_map]
+        if missing:
+            raise ValueError(f"Profile {self.name!r}: features {', '.join(missing)} are not available for this camera.")
+
+        compiled: dict[consts.ECamFeatureId, structs.CAM_FeatureValue] = {}
+        for feature_id, feature in camera.feature_map.items():  # The camera's order, e.g. ExposureMode before ExposureTime
+            if feature_id not in self.values:
+                continue
+            if not _is_settable(feature):
+                raise ValueError(f"Profile {self.name!r}: feature {feature_id.name} cannot be set.")
+            compiled_feature = structs.CAM_FeatureValue.from_buffer_copy(feature)
+            try:
+                value = camera.validator.validate(feature_id, self.values[feature_id])
+            except ValueError as exc:
+                raise ValueError(f"Profile {self.name!r}: {str(exc)}") from exc
+            except TypeError as exc:
+                raise ValueError(f"Profile {self.name!r}: invalid value {self.values[feature_id]!r} for "
+                                 f"{feature_id.name}: {str(exc)}") from exc
+            try:
+                methods.set_variant_value(compiled_feature.stVariant, value)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Profile {self.name!r}: invalid value {self.values[feature_id]!r} for "
+                                 f"{feature_id.name}: {str(exc)}") from exc
+            compiled[feature_id] = compiled_feature
+
+        self._compiled = compiled
+        self._compiled_vector = _to_vector(list(compiled.values()))
+        self._compiled_camera = camera
+        return self._compiled_vector
+
+    def _ensure_compiled(self, camera: "NikonCamera") -> None:
+        if self._compiled_camera is not camera:
+            self.compile(camera)
+
+    def diff(self, camera: "NikonCamera", refresh: bool = False) -> dict[consts.ECamFeatureId, tuple[Any, Any]]:
+        """Compare the profile with the camera's current values.
+        Args:
+            camera (NikonCamera): The camera.
+            refresh (bool): Fetch the current values from the camera rather than using its cached feature map.
+        Returns:
+            dict[ECamFeatureId, tuple[Any, Any]]: Maps each differing feature to (current value, profile value).
+        """
+        self._ensure_compiled(camera)
+        if refresh:
+            camera.update_feature_map()
+        differences = {}
+        for feature_id, compiled_feature in self._compiled.items():
+            current = methods.get_feature_value(camera.feature_map[feature_id])
+            target = methods.get_feature_value(compiled_feature)
+            if current != target:
+                differences[feature_id] = (current, target)
+        return differences
+
+    def _apply(self, camera: "NikonCamera", only_changed: bool = True) -> list[consts.ECamFeatureId]:
+        """Set the profile's values on the camera with a single CAM_SetFeatures call. Called by
+        NikonCamera.apply_profile, which holds the camera's control lock and refreshes its cached values.
+        Args:
+            camera (NikonCamera): The camera.
+            only_changed (bool): Only send the features whose cached value differs from the profile.
+        Raises:
+            Exception: If the SDK rejects the values.
+        Returns:
+            list[ECamFeatureId]: The features that were sent.
+        """
+        self._ensure_compiled(camera)
+        if only_changed:
+            changed = self.diff(camera)
+            feature_ids = [feature_id for feature_id in self._compiled if feature_id in changed]
+        else:
+            feature_ids = list(self._compiled)
+        if not feature_ids:
+            return []
+
+        if len(feature_ids) == len(self._compiled):
+            vector = self._compiled_vector
+        else:
+            vector = _to_vector([self._compiled[feature_id] for feature_id in feature_ids])
+        with camera._format_guard(feature_ids):
+            with camera._sdk_lock:
+                methods.set_features(camera.camera_handle, vector)
+
+            # Update the cached feature structs in place with the values sent
+            for feature_id in feature_ids:
+                camera.feature_map[feature_id].stVariant = self._compiled[feature_id].stVariant
+            if consts.ECamFeatureId.Format in feature_ids:
+                camera._on_format_changed()
+        return feature_ids
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the profile as JSON serialisable types, features and enum values are stored by name."""
+        return {"name": self.name, "features": {feature_id.name: _encode_value(feature_id, value)
+                                                for feature_id, value in self.values.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FeatureProfile":
+        """Create a profile from the output of to_dict."""
+        values = {}
+        for name, value in data["features"].items():
+            feature_id = consts.ECamFeatureId[name]
+            values[feature_id] = _decode_value(feature_id, value)
+        return cls(data["name"], values)
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save the profile to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "FeatureProfile":
+        """Load a profile from a JSON file written by save."""
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+
+def _is_settable(feature: structs.CAM_FeatureValue) -> bool:
+    """Whether a feature holds a value, rather than being a command such as OnePushSoftTrigger."""
+    return feature.stVariant.eVarType not in (consts.ECamVariantRunType.evrt_voidptr,
+                                              consts.ECamVariantRunType.evrt_unknown)
+
+
+def _to_vector(features: list[structs.CAM_FeatureValue]) -> structs.Vector_CAM_FeatureValue:
+    vector = structs.Vector_CAM_FeatureValue()
+    vector.uiCapacity = len(features)
+    vector.uiCountUsed = len(features)
+    vector.pstFeatureValue = (structs.CAM_FeatureValue * len(features))(*features)
+    return vector
+
+
+def _encode_value(feature_id: consts.ECamFeatureId, value: Any) -> Any:
+    value = _decode_value(feature_id, value)  # Plain tuples to the feature's NamedTuple
+    if isinstance(value, consts.FormatFeature):
+        return {"colour": consts.ECamFormatColor(value.colour).name, "mode": consts.ECamFormatSize(value.mode).name}
+    if hasattr(value, "_asdict"):
+        return {key: list(field) if isinstance(field, list) else field for key, field in value._asdict().items()}
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, bool | float):
+        return value
+    return int(value)
+
+
+def _decode_value(feature_id: consts.ECamFeatureId, value: Any) -> Any:
+    """Convert a value loaded from JSON, or a plain tuple, to the form returned by get_feature_value."""
+    match consts.FeatureIDVarTypeMap.get(feature_id):
+        case consts.ECamVariantRunType.evrt_Format:
+            if isinstance(value, dict):
+                return consts.FormatFeature(consts.ECamFormatColor[value["colour"]], consts.ECamFormatSize[value["mode"]])
+            if not isinstance(value, tuple | list):
+                return value  # Rejected when compiled
+            return consts.FormatFeature(consts.ECamFormatColor(value[0]), consts.ECamFormatSize(value[1]))
+        case consts.ECamVariantRunType.evrt_Area:
+            feature_type = consts.AreaFeature
+        case consts.ECamVariantRunType.evrt_Position:
+            feature_type = consts.PositionFeature
+        case consts.ECamVariantRunType.evrt_TriggerOption:
+            feature_type = consts.TriggerOptionFeature
+        case consts.ECamVariantRunType.evrt_MultiExposureTime:
+            feature_type = consts.MultiExposureTimeFeature
+        case consts.ECamVariantRunType.evrt_Size:
+            feature_type = consts.SizeFeature
+        case _:
+            return value
+    if isinstance(value, dict):
+        return feature_type(**value)
+    return feature_type(*value) if not isinstance(value, feature_type) else value
@@ -0,0 +1,145 @@
+import csv
+import os
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+
+class FrameStats(NamedTuple):
+    frame: int  # Frame number passed to measure, or the count of frames measured
+    mean: float  # Mean over all channels, in pixel values
+    channel_means: tuple[float, ...]  # Mean of each channel, one value for mono formats
+    saturated_fraction: float  # Fraction of samples at or above the saturation level, over all channels
+    histogram: np.ndarray  # (channels, bins) counts of the samples, bins spaced evenly over the full scale
+
+
+class FrameQC:
+    """Per-frame quality statistics, cheap enough to compute on every frame as it is recorded.
+
+    Frames are sampled every stride pixels in both directions. Each channel of the sample is copied into a scratch
+    buffer (shifted down to at most fine_bits bits for 16-bit data) and counted with np.bincount, and the means,
+    saturated fraction and coarse histogram are all derived from those counts. Means are exact for 8-bit data and
+    within half a fine bin for 16-bit data, whose saturation level is also rounded down to a fine bin. At the default
+    stride this takes about 1 ms per 2880x2048 RGB frame.
+
+    Calling the object measures a frame, keeps the statistics in records and returns the frame unchanged, so it can
+    be used as an in place pipeline.Stage.
+
+    Example:
+        qc = FrameQC(stride=8, bins=32)
+        Pipeline(CameraSource(camera, count=1000), [Stage(qc), Stage(write)]).run()
+        qc.save_csv("frames_qc.csv")
+        dark = [stats.frame for stats in qc.records if stats.mean < 10]
+    """
+    def __init__(
+            self,
+            stride: int = 8,
+            bins: int = 32,
+            saturation: int | None = None,
+            fine_bits: int = 12,
+            keep_records: bool = True,
+            on_stats: Callable[[FrameStats], None] | None = None,
+            ) -> None:
+        """
+        Args:
+            stride (int): Spacing of the sampled pixels, in both directions.
+            bins (int): Bins of the coarse histogram, a power of two.
+            saturation (int | None): Pixel value at or above which a sample is saturated, the full scale if None.
+            fine_bits (int): Bits kept of 16-bit data when counting, 12 gives 4096 fine bins.
+            keep_records (bool): Keep the statistics of every frame in records.
+            on_stats (Callable[[FrameStats], None] | None): Called with the statistics of each frame, e.g. to attach
+                them to the frame's metadata.
+        """
+        if stride < 1:
+            raise ValueError("Stride must be at least 1.")
+        if bins < 1 or bins & (bins - 1):
+            raise ValueError("The number of histogram bins must be a power of two.")
+        if not 8 <= fine_bits <= 16:
+            raise ValueError("fine_bits must be between 8 and 16.")
+        self.stride = stride
+        self.bins = bins
+        self.saturation = saturation
+        self.fine_bits = fine_bits
+        self.keep_records = keep_records
+        self.on_stats = on_stats
+        self.records: list[FrameStats] = []
+        self.frames = 0
+        self._scratch: np.ndarray | None = None  # One channel of the sample
+        self._fine: np.ndarray | None = None  # (channels, fine bins) counts of the sample
+        self._key: tuple | None = None  # (shape, dtype) of the frames the scratch buffers are for
+
+    def _prepare(self, grid: np.ndarray) -> None:
+        """Allocate the scratch buffer and bin tables for frames like this one."""
+        dtype = grid.dtype
+        if dtype not in (np.uint8, np.uint16):
+            raise ValueError(f"Frames must be uint8 or uint16, not {dtype}.")
+        bits = dtype.itemsize * 8
+        self._shift = max(bits - self.fine_bits, 0)
+        fine_bins = 1 << (bits - self._shift)
+        if self.bins > fine_bins:
+            raise ValueError(f"At most {fine_bins} histogram bins for {dtype} frames.")
+        self._fine_bins = fine_bins
+        self._scratch = np.empty(grid.shape[:2], dtype)
+        self._fine = np.empty((grid.shape[2], fine_bins), np.int64)
+        self._centres = (np.arange(fine_bins, dtype=np.float64) + (0.5 if self._shift else 0.0)) * (1 << self._shift)
+        saturation = np.iinfo(dtype).max if self.saturation is None else self.saturation
+        self._saturated_bin = saturation >> self._shift  # Fine bins from this one up are saturated
+        self._key = (grid.shape, dtype)
+
+    def measure(self, image: np.ndarray, frame: int | None = None) -> FrameStats:
+        """Compute the statistics of a frame.
+        Args:
+            image (np.ndarray): The frame, (height, width) or (height, width, channels) as returned by get_image.
+            frame (int | None): The frame's number, e.g. CAM_ImageInfo.usFrameNo, counted here if None.
+        Returns:
+            FrameStats: The statistics.
+        """
+        grid = image[::self.stride, ::self.stride]
+        if grid.ndim == 2:
+            grid = grid[..., np.newaxis]
+        if self._key != (grid.shape, grid.dtype):
+            self._prepare(grid)
+        scratch = self._scratch
+        channels = grid.shape[2]
+
+        fine = self._fine
+        for channel in range(channels):
+            if self._shift:
+                np.right_shift(grid[..., channel], self._shift, out=scratch)
+            else:
+                np.copyto(scratch, grid[..., channel])
+            fine[channel] = np.bincount(scratch.ravel(), minlength=self._fine_bins)
+
+        samples = scratch.size
+        channel_means = tuple(float(mean) for mean in (fine @ self._centres) / samples)
+        saturated = int(fine[:, self._saturated_bin:].sum())
+        histogram = fine.reshape(channels, self.bins, -1).sum(axis=2, dtype=np.uint32)
+
+        if frame is None:
+            frame = self.frames
+        self.frames += 1
+        stats = FrameStats(frame, sum(channel_means) / channels, channel_means, saturated / (samples * channels),
+                           histogram)
+        if self.keep_records:
+            self.records.append(stats)
+        if self.on_stats is not None:
+            self.on_stats(stats)
+        return stats
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        """Measure a frame and return it unchanged, for use as a pipeline stage."""
+        self.measure(image)
+        return image
+
+    def save_csv(self, path: str | os.PathLike) -> None:
+        """Save the statistics of the recorded frames, one row per frame with a column per mean and histogram bin."""
+        if not self.records:
+            raise ValueError("No frames have been measured.")
+        channels, bins = self.records[0].histogram.shape
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "mean", *(f"mean_{c}" for c in range(channels)), "saturated_fraction",
+                             *(f"hist_{c}_{b}" for c in range(channels) for b in range(bins))])
+            for stats in self.records:
+                writer.writerow([stats.frame, stats.mean, *stats.channel_means, stats.saturated_fraction,
+                                 *stats.histogram.ravel().tolist()])
@@ -0,0 +1,210 @@
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from . import methods as methods
+from . import structures as structs
+from . import constants as consts
+from . import commands as cmds
+from .camera_class_nikon import NikonCamera
+
+
+class RecoveryReport(NamedTuple):
+    reason: str  # Event that caused the outage
+    reopened: bool  # Whether the camera handle was reopened
+    attempts: int  # Number of recovery attempts made
+    outage: float  # Time from detecting the outage to streaming again (or giving up), in seconds
+    success: bool
+    error: str  # Error of the last failed attempt, empty on success
+
+
+class RecoverySupervisor:
+    """Recovers a NikonCamera from transfer errors and bus resets without losing its settings.
+
+    On ecetTransError, or ecetBusReset with ecebrcRestored, frame transfer is stopped, the last known feature values
+    are replayed in one CAM_SetFeatures call, the image buffer is reallocated and frame transfer is restarted.
+    On ecebrcFailed, or when a bus reset is not restored within restore_timeout, the camera handle is also reopened.
+    Attempts are retried until recovery_timeout has passed since the outage was detected. A failed recovery is
+    reported and then started over, reopening the handle, until the camera streams again or stop() is called.
+
+    Recovery runs on the supervisor's thread. Acquisition loops can call wait_recovered() after get_image fails.
+
+    Example:
+        supervisor = RecoverySupervisor(camera, on_recovered=print)
+        supervisor.start()
+        while running:
+            try:
+                img = camera.get_image()
+            except Exception:
+                if not supervisor.wait_recovered(timeout=30):
+                    raise
+    """
+    def __init__(
+            self,
+            camera: NikonCamera,
+            restore_timeout: float = 5.0,
+            recovery_timeout: float = 30.0,
+            retry_interval: float = 0.5,
+            poll_interval: float = 0.05,
+            on_recovered: Callable[[RecoveryReport], None] | None = None,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera to supervise.
+            restore_timeout (float): Time to wait for the SDK to restore a bus reset before reopening the handle, in seconds.
+            recovery_timeout (float): Time after detecting an outage after which recovery is abandoned, in seconds.
+            retry_interval (float): Time between recovery attempts, in seconds.
+            poll_interval (float): Interval at which the camera's events are polled, in seconds.
+            on_recovered (Callable[[RecoveryReport], None] | None): Called after each recovery, successful or not.
+        """
+        self.camera = camera
+        self.restore_timeout = restore_timeout
+        self.recovery_timeout = recovery_timeout
+        self.retry_interval = retry_interval
+        self.poll_interval = poll_interval
+        self.on_recovered = on_recovered
+        self.reports: list[RecoveryReport] = []
+
+        self._lock = threading.Lock()
+        self._pending: tuple[str, bool, bool, float] | None = None  # (reason, reopen, ready, detected time)
+        self._wake = threading.Event()
+        self._healthy = threading.Event()
+        self._healthy.set()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def healthy(self) -> bool:
+        """False from detecting an outage until recovery succeeds."""
+        return self._healthy.is_set()
+
+    def wait_recovered(self, timeout: float | None = None) -> bool:
+        """Wait until the camera is streaming again.
+        Returns:
+            bool: True if the camera is healthy, False if the timeout passed first.
+        """
+        return self._healthy.wait(timeout)
+
+    def start(self) -> None:
+        """Start watching the camera's events."""
+        if self._thread is not None:
+            return
+        events = self.camera.events
+        events.subscribe(consts.ECamEventType.ecetTransError, self._on_trans_error)
+        events.subscribe(consts.ECamEventType.ecetBusReset, self._on_bus_reset)
+        events.start(self.poll_interval)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="RecoverySupervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the camera's events."""
+        if self._thread is None:
+            return
+        events = self.camera.events
+        events.unsubscribe(consts.ECamEventType.ecetTransError, self._on_trans_error)
+        events.unsubscribe(consts.ECamEventType.ecetBusReset, self._on_bus_reset)
+        self._stop_event.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _on_trans_error(self, event: structs.CAM_Event) -> None:
+        self._report_outage("ecetTransError", reopen=False, ready=True)
+
+    def _on_bus_reset(self, event: structs.CAM_Event) -> None:
+        match event.stBusReset.eBusResetCode:
+            case consts.ECamEventBusResetCode.ecebrcHappened:
+                self._report_outage("ecetBusReset", reopen=False, ready=False)
+            case consts.ECamEventBusResetCode.ecebrcRestored:
+                self._report_outage("ecetBusReset", reopen=False, ready=True)
+            case consts.ECamEventBusResetCode.ecebrcFailed:
+                self._report_outage("ecetBusReset", reopen=True, ready=True)
+
+    def _report_outage(self, reason: str, reopen: bool, ready: bool) -> None:
+        """Record an outage, keeping the time it was first detected if one is already pending."""
+        with self._lock:
+            if self._pending is not None:
+                pending_reason, pending_reopen, _, detected = self._pending
+                self._pending = (pending_reason, pending_reopen or reopen, ready, detected)
+            else:
+                self._pending = (reason, reopen, ready, time.perf_counter())
+        self._healthy.clear()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:  # Claim the outage in the same critical section it is read in
+                if self._pending is None:
+                    continue
+                reason, reopen, ready, detected = self._pending
+                if not ready:
+                    if time.perf_counter() - detected < self.restore_timeout:
+                        continue  # Wait for the SDK to restore the bus
+                    reopen = True
+                self._pending = None
+            self.recover(reason, reopen, detected)
+
+    def recover(self, reason: str = "manual", reopen: bool = False, detected: float | None = None) -> RecoveryReport:
+        """Restore streaming with the last known settings, retrying until recovery_timeout. An outage still pending is
+        recovered along with this one. If recovery fails it is pending again, so the supervisor's thread retries it.
+        Args:
+            reason (str): Description of the outage for the report.
+            reopen (bool): Reopen the camera handle on the first attempt, otherwise only on retries.
+            detected (float | None): time.perf_counter() time the outage was detected, now if None.
+        Returns:
+            RecoveryReport: The outcome and duration of the outage.
+        """
+        detected = time.perf_counter() if detected is None else detected
+        with self._lock:
+            if self._pending is not None:  # E.g. ecebrcFailed reported since the outage was claimed, needing a reopen
+                reopen = reopen or self._pending[1]
+                self._pending = None  # An outage reported from here on needs another recovery
+        self._healthy.clear()
+        snapshot = self.camera.get_feature_snapshot()
+        attempts = 0
+        reopened = False
+        error = ""
+        while True:
+            attempts += 1
+            try:
+                self._restart(snapshot, reopen=reopen or attempts > 1)
+                reopened = reopened or reopen or attempts > 1
+                success = True
+                error = ""
+                break
+            except Exception as exc:
+                error = str(exc)
+                if time.perf_counter() - detected + self.retry_interval > self.recovery_timeout:
+                    success = False
+                    break
+                time.sleep(self.retry_interval)
+
+        with self._lock:
+            down_again = self._pending is not None  # Reported while restarting, e.g. another bus reset
+            if not success and self._pending is None:  # Try again, reopening the handle, with a new recovery_timeout
+                self._pending = (reason, True, True, time.perf_counter())
+        report = RecoveryReport(reason, reopened, attempts, time.perf_counter() - detected, success, error)
+        self.reports.append(report)
+        if success and not down_again:
+            self._healthy.set()
+        if self.on_recovered is not None:
+            self.on_recovered(report)
+        return report
+
+    def _restart(self, snapshot: structs.Vector_CAM_FeatureValue, reopen: bool) -> None:
+        camera = self.camera
+        with camera._control_lock, camera._data_lock:  # Waits for a get_image in progress to fail or finish
+            try:
+                with camera._sdk_lock:
+                    cmds.stop_frame_transfer(camera.camera_handle)
+            except Exception:
+                pass  # Transfer may already be stopped, or the handle invalid
+            if reopen:
+                camera.reconnect()
+            with camera._sdk_lock:
+                methods.set_features(camera.camera_handle, snapshot)
+            camera._initialize_image_structure()
+            camera._start_FrameTransfer()
@@ -0,0 +1,276 @@
+import multiprocessing
+import multiprocessing.connection
+from typing import Any, Callable
+
+import numpy as np
+
+from . import constants as consts
+from .camera_class_nikon import ImageMetadata
+from .frame_ring import FramePublisher, SharedFrameRing
+
+_CALLABLE = "__callable__"  # Reply to getattr for a method, which is then called remotely
+_READ_ATTEMPTS = 3  # Frames requested by get_image before giving up on reading one from the ring
+
+
+def _reply(conn: multiprocessing.connection.Connection, status: str, value: Any) -> None:
+    try:
+        conn.send((status, value))
+    except Exception as exc:  # The result or exception could not be pickled
+        conn.send(("error", RuntimeError(f"{type(value).__name__} could not be sent from the camera process: {exc}")))
+
+
+def _worker_main(conn: multiprocessing.connection.Connection, camera_args: tuple, camera_kwargs: dict,
+                 slot_count: int, initializer: Callable[[], Any] | None) -> None:
+    """Run a NikonCamera in the child process, serving requests from the pipe until closed."""
+    if initializer is not None:
+        initializer()
+    from .camera_class_nikon import NikonCamera
+
+    try:
+        camera = NikonCamera(*camera_args, **camera_kwargs)
+        publisher = FramePublisher(camera, slot_count)
+    except Exception as exc:
+        _reply(conn, "error", exc)
+        return
+    _reply(conn, "ok", publisher.name)
+
+    try:
+        while True:
+            try:
+                command, name, args, kwargs = conn.recv()
+            except EOFError:
+                return  # Parent exited
+            try:
+                match command:
+                    case "get_image":
+                        if camera.image_shape != publisher.ring.shape or camera.image_dtype != publisher.ring.dtype:
+                            publisher.close()  # Format changed, subscribers reattach by the new name
+                            publisher = FramePublisher(camera, slot_count)
+                        result = (publisher.name, publisher.publish())
+                    case "getattr":
+                        value = getattr(camera, name)
+                        result = _CALLABLE if callable(value) else value
+                    case "call":
+                        result = getattr(camera, name)(*args, **kwargs)
+                    case "close":
+                        # Reply once the ring is removed, so the parent does not kill the process while unlinking it
+                        publisher.close()
+                        camera.disconnect()
+                        _reply(conn, "ok", None)
+                        return
+                    case _:
+                        raise ValueError(f"Unknown command {command!r}")
+            except Exception as exc:
+                _reply(conn, "error", exc)
+            else:
+                _reply(conn, "ok", result)
+    finally:
+        publisher.close()
+        if camera.is_connected:
+            camera.disconnect()
+
+
+class RemoteNikonCamera:
+    """A NikonCamera running in a child process, so that a crash in the SDK does not take down this process and
+    frame handling in the camera process does not compete for this interpreter's GIL.
+
+    Methods and attributes of NikonCamera are forwarded to the child over a pipe, images are returned through a
+    shared memory frame ring. If the child process dies it is restarted, the feature values set through this proxy
+    are restored and the failed call is retried once. If a call does not complete within the timeout the child is
+    restarted and TimeoutError is raised.
+
+    Example:
+        with RemoteNikonCamera(0) as camera:
+            camera.set_feature_value(ECamFeatureId.ExposureTime, 20_000)
+            img = camera.get_image()
+    """
+    def __init__(
+            self,
+            camera_index: int = 0,
+            set_defaults: bool = True,
+            trigger_mode: consts.ECamTriggerMode = consts.ECamTriggerMode.Soft,
+            serial_number: int | None = None,
+            *,
+            slot_count: int = 3,
+            timeout: float = 30.0,
+            max_restarts: int = 3,
+            initializer: Callable[[], Any] | None = None,
+            ) -> None:
+        """
+        Args:
+            camera_index (int): Index of the camera, as for NikonCamera.
+            set_defaults (bool): Set the default settings, as for NikonCamera.
+            trigger_mode (ECamTriggerMode): Trigger mode, as for NikonCamera.
+            serial_number (int | None): Serial number of the camera, overrides camera_index, as for NikonCamera.
+            slot_count (int): Number of frames in the shared memory ring.
+            timeout (float): Maximum time for a call to complete in the child process, in seconds.
+            max_restarts (int): Number of times the child process is restarted before giving up.
+            initializer (Callable[[], Any] | None): Picklable function run in the child before the camera is created.
+        """
+        self._camera_args = (camera_index, set_defaults, trigger_mode, serial_number)
+        self._slot_count = slot_count
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self._initializer = initializer
+        self._context = multiprocessing.get_context("spawn")
+        self._process: multiprocessing.process.BaseProcess | None = None
+        self._conn: multiprocessing.connection.Connection | None = None
+        self._ring: SharedFrameRing | None = None
+        self._settings: dict[consts.ECamFeatureId, Any] = {}  # Feature values restored after a restart
+        self._trigger_mode: consts.ECamTriggerMode | None = None
+        self._start()
+
+    @property
+    def pid(self) -> int | None:
+        """Process ID of the camera process."""
+        return None if self._process is None else self._process.pid
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _start(self) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_worker_main, name="NikonCameraProcess", daemon=True,
+            args=(child_conn, self._camera_args, {}, self._slot_count, self._initializer))
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        ring_name = self._receive(self.timeout)
+        self._attach(ring_name)
+
+    def _attach(self, ring_name: str) -> None:
+        if self._ring is not None:
+            if self._ring.name == ring_name:
+                return
+            self._ring.close()
+        self._ring = SharedFrameRing.attach(ring_name)
+
+    def _stop_process(self, timeout: float = 0.0) -> None:
+        """Stop the camera process, killing it if it has not exited by itself within timeout seconds."""
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        if self._ring is not None:
+            if self._process is not None and self._process.exitcode != 0:
+                self._ring.unlink()  # The camera process died before removing it
+            self._ring.close()
+        self._process = self._conn = self._ring = None
+
+    def _restart(self) -> None:
+        """Start a new camera process and restore the settings made through this proxy."""
+        if self.restarts >= self.max_restarts:
+            self._stop_process()
+            raise ConnectionError(f"Camera process failed {self.restarts + 1} times, not restarting.")
+        self.restarts += 1
+        self._stop_process()
+        self._start()
+        if self._settings:
+            self._request("call", "set_feature_values", (dict(self._settings),), {})
+        if self._trigger_mode is not None:
+            self._request("call", "set_trigger_mode", (self._trigger_mode,), {})
+
+    def _receive(self, timeout: float) -> Any:
+        if not self._conn.poll(timeout):
+            raise TimeoutError(f"Camera process did not respond within {timeout} s.")
+        status, value = self._conn.recv()
+        if status == "error":
+            raise value
+        return value
+
+    def _request(self, command: str, name: str | None = None, args: tuple = (), kwargs: dict | None = None) -> Any:
+        """Send a request to the camera process, restarting it and retrying once if it has died."""
+        for attempt in range(2):
+            if self._conn is None:
+                raise ConnectionError("Camera process is closed.")
+            try:
+                self._conn.send((command, name, args, kwargs or {}))
+                return self._receive(self.timeout)
+            except TimeoutError:
+                self._restart()
+                raise
+            except (EOFError, OSError):  # The process died
+                if attempt:
+                    raise
+                self._restart()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = self._request("getattr", name)
+        if not (isinstance(value, str) and value == _CALLABLE):
+            return value
+
+        def remote_method(*args, **kwargs):
+            return self._request("call", name, args, kwargs)
+        remote_method.__name__ = name
+        return remote_method
+
+    def get_image(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Get an image from the camera, see NikonCamera.get_image."""
+        return self.get_image_with_metadata(out)[0]
+
+    def get_image_with_metadata(self, out: np.ndarray | None = None) -> tuple[np.ndarray, ImageMetadata]:
+        """Get an image from the camera with its metadata, see NikonCamera.get_image_with_metadata."""
+        for _ in range(_READ_ATTEMPTS):
+            ring_name, sequence = self._request("get_image")
+            self._attach(ring_name)
+            frame = self._ring.read(sequence)
+            if frame is None:  # Overwritten by frames published since, e.g. from another thread
+                continue
+            if out is None:
+                out = np.empty(frame.image.shape, frame.image.dtype)
+            np.copyto(out, frame.image)
+            metadata = ImageMetadata(frame.frame_count, frame.camera_time, bytes(frame.info))
+            valid = self._ring.is_valid(frame)
+            del frame  # The ring cannot be closed while its views are referenced
+            if valid:
+                return out, metadata
+        raise RuntimeError(f"Frames were overwritten in the shared memory ring before they could be read, "
+                           f"{_READ_ATTEMPTS} times. Use more slots (slot_count) or fewer threads getting images.")
+
+    def set_feature_value(self, feature_id: consts.ECamFeatureId, value, clamp: bool = False, snap: bool = False) -> None:
+        """Set the value of a feature, see NikonCamera.set_feature_value."""
+        self._request("call", "set_feature_value", (feature_id, value, clamp, snap))
+        if clamp or snap:  # Restore the value the camera actually took
+            value = self._request("call", "get_feature_value", (feature_id,))
+        self._settings[feature_id] = value
+
+    def set_feature_values(self, features: dict[consts.ECamFeatureId, Any], clamp: bool = False, snap: bool = False) -> None:
+        """Set multiple feature values at once, see NikonCamera.set_feature_values."""
+        self._request("call", "set_feature_values", (features, clamp, snap))
+        for feature_id, value in features.items():
+            if clamp or snap:
+                value = self._request("call", "get_feature_value", (feature_id,))
+            self._settings[feature_id] = value
+
+    def set_trigger_mode(self, trigger_mode: consts.ECamTriggerMode) -> None:
+        """Set the trigger mode, see NikonCamera.set_trigger_mode."""
+        self._request("call", "set_trigger_mode", (trigger_mode,))
+        self._trigger_mode = trigger_mode
+
+    def disconnect(self) -> None:
+        """Disconnect from the camera and stop the camera process."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.send(("close", None, (), {}))
+            self._receive(self.timeout)
+        except Exception:
+            self._stop_process()  # Killed, the ring is removed here
+            return
+        self._stop_process(self.timeout)  # The process has removed the ring and is exiting
+
+    close = disconnect
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
@@ -569,3 +569,8 @@ class CAM_Notice(ctypes.Structure):
         ("eNoticeType", ctypes.c_int),
         ("_noticeUnion", _NoticeUnion),
     ]
+
+
+# Notice callback, called by the SDK from its own thread: void (const lx_uint32 uiCameraHandle, CAM_Notice* pstNotice, void* pTransData)
+FCAM_NoticeCallback = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)(
+    None, ctypes.c_uint32, ctypes.POINTER(CAM_Notice), ctypes.c_void_p)
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from .camera_class_nikon import NikonCamera
+
+SKIP = "skip"  # Missed slots are dropped, the next acquisition is at the next slot in the future
+CATCH_UP = "catch_up"  # Missed slots are acquired straight away, one after another
+
+IDLE_NONE = "none"  # Leave the camera streaming between acquisitions
+IDLE_STOP_TRANSFER = "stop_transfer"  # Stop frame transfer between acquisitions
+IDLE_CIS_OFF = "cis_off"  # Stop frame transfer and power down the image sensor between acquisitions
+
+
+class TimelapseFrame(NamedTuple):
+    index: int  # Slot on the time grid, slot 0 is at the start time
+    scheduled: float  # time.perf_counter() of the slot
+    lateness: float  # Seconds between the slot and the acquisition starting
+    wall_time: float  # time.time() when the acquisition started
+    image: np.ndarray
+
+
+class TimelapseReport(NamedTuple):
+    frames: int
+    skipped: int  # Slots dropped under the skip policy
+    mean_lateness: float  # Seconds
+    std_lateness: float
+    max_lateness: float
+    idle_cycles: int  # Times the camera was idled between acquisitions
+
+
+class TimelapseScheduler:
+    """Acquires images on an absolute time grid, start + index * interval, so that intervals do not drift.
+
+    Waits between acquisitions sleep on an event rather than polling, so stop() ends them at once. An acquisition that
+    starts late is recorded with its lateness; slots missed entirely (e.g. because the callback took too long) are
+    either skipped or caught up. Between long intervals frame transfer can be stopped and the image sensor powered
+    down, and they are restarted wake_lead seconds before the next slot.
+
+    Example:
+        def save(frame):
+            np.save(f"frame_{frame.index:05d}.npy", frame.image)
+
+        scheduler = TimelapseScheduler(camera, interval=60, count=600, on_frame=save, idle="cis_off")
+        report = scheduler.run()
+    """
+    def __init__(
+            self,
+            camera: NikonCamera,
+            interval: float,
+            on_frame: Callable[[TimelapseFrame], None],
+            count: int | None = None,
+            duration: float | None = None,
+            policy: str = SKIP,
+            idle: str = IDLE_NONE,
+            idle_threshold: float = 5.0,
+            wake_lead: float = 1.0,
+            ) -> None:
+        """
+        Args:
+            camera (NikonCamera): The camera, in soft trigger mode.
+            interval (float): Seconds between slots.
+            on_frame (Callable[[TimelapseFrame], None]): Called with each frame, from the scheduler's thread.
+            count (int | None): Number of slots, unlimited if None and duration is None.
+            duration (float | None): Seconds from the start after which no more slots are acquired.
+            policy (str): "skip" or "catch_up", what to do with slots that were missed entirely.
+            idle (str): "none", "stop_transfer" or "cis_off", how the camera is idled between acquisitions.
+            idle_threshold (float): Minimum wait in seconds before the camera is idled.
+            wake_lead (float): Seconds before a slot at which an idled camera is restarted.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError(f"Policy must be {SKIP!r} or {CATCH_UP!r}, not {policy!r}.")
+        if idle not in (IDLE_NONE, IDLE_STOP_TRANSFER, IDLE_CIS_OFF):
+            raise ValueError(f"Idle mode must be {IDLE_NONE!r}, {IDLE_STOP_TRANSFER!r} or {IDLE_CIS_OFF!r}, not {idle!r}.")
+        self.camera = camera
+        self.interval = interval
+        self.on_frame = on_frame
+        self.count = count
+        self.duration = duration
+        self.policy = policy
+        self.idle = idle
+        self.idle_threshold = max(idle_threshold, wake_lead)
+        self.wake_lead = wake_lead
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._idled = False
+        self._reset_stats()
+        self.report: TimelapseReport | None = None
+        self.error: BaseException | None = None
+
+    def _reset_stats(self) -> None:
+        self._frames = 0
+        self._skipped = 0
+        self._lateness_sum = 0.0
+        self._lateness_sq_sum = 0.0
+        self._max_lateness = 0.0
+        self._idle_cycles = 0
+
+    def _wait_until(self, deadline: float) -> bool:
+        """Sleep until a time.perf_counter() deadline. Returns False if stopped first."""
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            return not self._stop.wait(remaining)
+        return not self._stop.is_set()
+
+    def _sleep_camera(self) -> None:
+        self.camera.pause_transfer(cis_off=self.idle == IDLE_CIS_OFF)
+        self._idled = True
+        self._idle_cycles += 1
+
+    def _wake_camera(self) -> None:
+        self.camera.resume_transfer()
+        self._idled = False
+
+    def _wait_for_slot(self, scheduled: float) -> bool:
+        """Wait for a slot, idling the camera meanwhile if the wait is long enough. Returns False if stopped."""
+        if self.idle != IDLE_NONE and scheduled - time.perf_counter() >= self.idle_threshold:
+            self._sleep_camera()
+            if not self._wait_until(scheduled - self.wake_lead):
+                return False
+            self._wake_camera()
+        return self._wait_until(scheduled)
+
+    def _summary(self) -> TimelapseReport:
+        frames = self._frames
+        mean = self._lateness_sum / frames if frames else 0.0
+        variance = self._lateness_sq_sum / frames - mean * mean if frames else 0.0
+        return TimelapseReport(frames, self._skipped, mean, math.sqrt(max(variance, 0.0)), self._max_lateness,
+                               self._idle_cycles)
+
+    def stats(self) -> TimelapseReport:
+        """Statistics so far, which can be called while the time-lapse runs."""
+        return self._summary()
+
+    def run(self) -> TimelapseReport:
+        """Run the time-lapse in this thread until all slots are acquired or stop() is called.
+        Returns:
+            TimelapseReport: Frame counts and the lateness of the acquisitions.
+        """
+        self._stop.clear()
+        return self._run()
+
+    def _run(self) -> TimelapseReport:
+        self._reset_stats()
+        start = time.perf_counter()
+        end = None if self.duration is None else start + self.duration
+        index = 0
+        try:
+            while not self._stop.is_set() and (self.count is None or index < self.count):
+                scheduled = start + index * self.interval
+                if end is not None and scheduled > end:
+                    break
+                if not self._wait_for_slot(scheduled):
+                    break
+
+                acquired = time.perf_counter()
+                lateness = acquired - scheduled
+                if self.policy == SKIP and lateness >= self.interval:  # Missed whole slots, move to the next one
+                    missed = int(lateness // self.interval)
+                    if self.count is not None:
+                        missed = min(missed, self.count - index)
+                    self._skipped += missed
+                    index += missed
+                    continue
+
+                wall_time = time.time()
+                image = self.camera.get_image()
+                self._frames += 1
+                self._lateness_sum += lateness
+                self._lateness_sq_sum += lateness * lateness
+                self._max_lateness = max(self._max_lateness, lateness)
+                self.on_frame(TimelapseFrame(index, scheduled, lateness, wall_time, image))
+                index += 1
+        finally:
+            if self._idled:
+                self._wake_camera()  # Leave the camera as it was found
+            self.report = self._summary()
+        return self.report
+
+    def _run_thread(self) -> None:
+        try:
+            self._run()
+        except BaseException as exc:
+            self.error = exc
+
+    def start(self) -> None:
+        """Run the time-lapse in a background thread, see run."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run_thread, name="TimelapseScheduler", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> TimelapseReport | None:
+        """Wait for a time-lapse started with start() to finish.
+        Raises:
+            Exception: The exception that ended the time-lapse, if any.
+        Returns:
+            TimelapseReport | None: The report, None if the timeout expired first.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return None
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return self.report
+
+    def stop(self, timeout: float | None = None) -> TimelapseReport | None:
+        """Stop the time-lapse, waiting for an acquisition in progress to finish."""
+        self._stop.set()
+        return self.join(timeout)
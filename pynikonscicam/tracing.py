@@ -0,0 +1,289 @@
+import array
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from . import methods as methods
+from .error_codes import ErrorCodes
+
+# A sink is called after every traced SDK call with (entry point name, start ns, end ns, result).
+# Sinks may also define bind(name) returning a faster callable of (start ns, end ns, result) for one entry point, or
+# bind_args(name) returning a callable of (start ns, end ns, result, args) if they need the call's arguments, e.g. to
+# keep only the calls made with one camera handle.
+TraceSink = Callable[[str, int, int, int], None]
+
+_lock = threading.Lock()
+_enabled: list["SdkTracer"] = []  # Enabled tracers, whose sinks all receive the calls through one DLL proxy
+_proxy: "_TracedDLL | None" = None
+
+
+def _bind(sink: TraceSink, name: str) -> Callable[[int, int, int], None]:
+    """Get a recorder of (start ns, end ns, result) for one entry point, using the sink's fast path if it has one."""
+    bind = getattr(sink, "bind", None)
+    if bind is not None:
+        return bind(name)
+    return functools.partial(sink, name)
+
+
+class _TracedDLL:
+    """Stand-in for the DsCam DLL object that times each CAM_* entry point and forwards the timings to the sinks.
+
+    Wrapped entry points are stored as instance attributes, so that after the first call they are found by normal
+    attribute lookup rather than through __getattr__.
+    """
+    def __init__(self, dll) -> None:
+        self._dll = dll
+
+    def __getattr__(self, name: str):
+        if not name.startswith("CAM_"):
+            return getattr(self._dll, name)
+        entry_point = self._trace(name, getattr(self._dll, name))
+        setattr(self, name, entry_point)
+        return entry_point
+
+    def _reset(self) -> None:
+        """Discard the wrapped entry points, so that they are rewrapped with the current sinks."""
+        for name in [name for name in vars(self) if name.startswith("CAM_")]:
+            delattr(self, name)
+
+    def _trace(self, name: str, func: Callable) -> Callable:
+        recorders = []
+        argument_recorders = []
+        for sink in [sink for tracer in _enabled for sink in tracer.sinks]:
+            bind_args = getattr(sink, "bind_args", None)
+            if bind_args is not None:
+                argument_recorders.append(bind_args(name))
+            else:
+                recorders.append(_bind(sink, name))
+        perf_counter_ns = time.perf_counter_ns
+
+        if len(recorders) == 1 and not argument_recorders:
+            record = recorders[0]
+
+            def traced(*args):
+                start = perf_counter_ns()
+                result = func(*args)
+                record(start, perf_counter_ns(), result)
+                return result
+        else:
+            def traced(*args):
+                start = perf_counter_ns()
+                result = func(*args)
+                end = perf_counter_ns()
+                for record in recorders:
+                    record(start, end, result)
+                for record in argument_recorders:
+                    record(start, end, result, args)
+                return result
+        traced.__name__ = name
+        return traced
+
+
+class SdkTracer:
+    """Opt-in tracing of every DsCam SDK call made by the package.
+
+    While any tracer is enabled, the DLL object used by methods is replaced with a proxy that times each CAM_* call
+    with time.perf_counter_ns() and passes the name, start, end and error code to the sinks of every enabled tracer.
+    The proxy is removed when the last tracer is disabled, so nothing is traced, and there is no overhead, while none
+    is enabled.
+
+    Example:
+        summary = SummarySink()
+        with SdkTracer(summary, ChromeTraceSink("trace.json")):
+            for _ in range(100):
+                camera.get_image()
+        print(summary)
+    """
+    def __init__(self, *sinks: TraceSink) -> None:
+        """
+        Args:
+            *sinks (TraceSink): Callables called with (entry point name, start ns, end ns, result) after each call,
+                e.g. SummarySink, ChromeTraceSink or a user function.
+        """
+        self.sinks: tuple[TraceSink, ...] = tuple(sinks)
+
+    def add_sink(self, sink: TraceSink) -> None:
+        with _lock:
+            self.sinks = self.sinks + (sink,)
+            if self in _enabled:
+                _proxy._reset()
+
+    def remove_sink(self, sink: TraceSink) -> None:
+        with _lock:
+            self.sinks = tuple(s for s in self.sinks if s is not sink)
+            if self in _enabled:
+                _proxy._reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self in _enabled
+
+    def enable(self) -> None:
+        """Start tracing SDK calls. Several tracers can be enabled at once, each receiving every call."""
+        global _proxy
+        with _lock:
+            if self in _enabled:
+                return
+            if _proxy is None:
+                _proxy = _TracedDLL(methods.pDsCamDLL)
+                methods.pDsCamDLL = _proxy
+            _enabled.append(self)
+            _proxy._reset()
+
+    def disable(self) -> None:
+        """Stop passing SDK calls to this tracer's sinks, restoring the original DLL object if no tracer is left."""
+        global _proxy
+        with _lock:
+            if self not in _enabled:
+                return
+            _enabled.remove(self)
+            if _enabled:
+                _proxy._reset()
+            else:
+                methods.pDsCamDLL = _proxy._dll
+                _proxy = None
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+
+class _CallStats:
+    __slots__ = ("count", "total_ns", "durations", "errors")
+
+    def __init__(self, capacity: int) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.durations = array.array("q", bytes(8 * capacity))  # Ring buffer of the latest durations
+        self.errors: dict[int, int] = {}
+
+
+class SummarySink:
+    """In-memory summary of SDK calls: call counts, cumulative durations, duration percentiles and error codes."""
+    def __init__(self, capacity: int = 8192) -> None:
+        """
+        Args:
+            capacity (int): Number of the latest durations kept per entry point for percentiles.
+        """
+        self.capacity = capacity
+        self._stats: dict[str, _CallStats] = {}
+
+    def __call__(self, name: str, start: int, end: int, result: int) -> None:
+        self.bind(name)(start, end, result)
+
+    def bind(self, name: str) -> Callable[[int, int, int], None]:
+        """Get a recorder for one entry point, avoiding a lookup by name on every call."""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _CallStats(self.capacity)
+        durations = stats.durations
+        errors = stats.errors
+        capacity = self.capacity
+
+        def record(start: int, end: int, result: int) -> None:
+            duration = end - start
+            count = stats.count
+            durations[count % capacity] = duration
+            stats.count = count + 1
+            stats.total_ns += duration
+            if result:
+                errors[result] = errors.get(result, 0) + 1
+        return record
+
+    def clear(self) -> None:
+        for stats in self._stats.values():
+            stats.count = 0
+            stats.total_ns = 0
+            stats.errors.clear()
+
+    def summary(self, percentiles: tuple[float, ...] = (50.0, 90.0, 99.0)) -> dict[str, dict]:
+        """Get the statistics of each entry point, sorted by cumulative duration.
+        Returns:
+            dict[str, dict]: Maps entry point name to its call count, total duration (ms), mean and percentile
+                durations (us) and a count of each non-OK error code.
+        """
+        result = {}
+        for name, stats in sorted(self._stats.items(), key=lambda item: item[1].total_ns, reverse=True):
+            if stats.count == 0:
+                continue
+            durations = np.frombuffer(stats.durations, dtype=np.int64)[:min(stats.count, self.capacity)] / 1e3
+            entry = {"calls": stats.count, "total_ms": stats.total_ns / 1e6, "mean_us": stats.total_ns / stats.count / 1e3}
+            for p, value in zip(percentiles, np.percentile(durations, percentiles)):
+                entry[f"p{p:g}_us"] = float(value)
+            entry["errors"] = {_error_name(code): count for code, count in stats.errors.items()}
+            result[name] = entry
+        return result
+
+    def __repr__(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return "SummarySink: no calls"
+        name_width = max(len(name) for name in summary)
+        lines = [f"{'':<{name_width}}{'calls':>10}{'total ms':>12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}  errors"]
+        for name, entry in summary.items():
+            errors = ", ".join(f"{code}: {count}" for code, count in entry["errors"].items())
+            lines.append(f"{name:<{name_width}}{entry['calls']:>10}{entry['total_ms']:>12.2f}{entry['mean_us']:>10.1f}"
+                         f"{entry['p50_us']:>10.1f}{entry['p99_us']:>10.1f}  {errors}")
+        return "\n".join(lines)
+
+
+class ChromeTraceSink:
+    """Collects SDK calls as Chrome trace events, written as JSON when the tracer is disabled or on write().
+
+    The file can be opened in chrome://tracing or https://ui.perfetto.dev.
+    """
+    def __init__(self, path: str | os.PathLike, max_events: int = 1_000_000) -> None:
+        """
+        Args:
+            path (str | os.PathLike): Path of the JSON file to write.
+            max_events (int): Maximum number of calls kept, later calls are dropped.
+        """
+        self.path = path
+        self.max_events = max_events
+        self._events: list[tuple[str, int, int, int, int]] = []
+
+    def __call__(self, name: str, start: int, end: int, result: int) -> None:
+        self.bind(name)(start, end, result)
+
+    def bind(self, name: str) -> Callable[[int, int, int], None]:
+        events = self._events
+        max_events = self.max_events
+        get_ident = threading.get_ident
+
+        def record(start: int, end: int, result: int) -> None:
+            if len(events) < max_events:
+                events.append((name, start, end, result, get_ident()))
+        return record
+
+    def write(self) -> None:
+        """Write the collected calls to the JSON file."""
+        pid = os.getpid()
+        trace_events = [
+            {"name": name, "cat": "DsCam", "ph": "X", "ts": start / 1e3, "dur": (end - start) / 1e3,
+             "pid": pid, "tid": tid, "args": {"result": _error_name(result)}}
+            for name, start, end, result, tid in self._events
+        ]
+        with open(self.path, "w") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ns"}, file)
+
+    def close(self) -> None:
+        self.write()
+
+
+def _error_name(code: int) -> str:
+    try:
+        return ErrorCodes(code).name
+    except ValueError:
+        return str(code)
@@ -0,0 +1,205 @@
+import math
+from typing import Any, NamedTuple
+
+from . import methods as methods
+from . import structures as structs
+from . import constants as consts
+
+
+class RangeLimits(NamedTuple):
+    minimum: int | float
+    maximum: int | float
+    resolution: int | float  # Step between valid values from the minimum, 0 if any value in range is valid
+    default: int | float
+
+
+class FeatureLimits(NamedTuple):
+    desc_type: consts.ECamFeatureDescType
+    # Limits of each field of the value, by the field name of its NamedTuple (e.g. "width"), "" for scalar values
+    ranges: dict[str, RangeLimits]
+    # Allowed values of element and format lists, mapped to the SDK's comment for each
+    allowed: dict[Any, str] | None = None
+
+
+# NamedTuple of the values of each structured description type, with the struct field of each NamedTuple field
+_DescValueTypes: dict[int, tuple[type, dict[str, str]]] = {
+    consts.ECamFeatureDescType.edesc_Area: (
+        consts.AreaFeature, {"height": "uiHeight", "left": "uiLeft", "top": "uiTop", "width": "uiWidth"}),
+    consts.ECamFeatureDescType.edesc_Position: (consts.PositionFeature, {"x": "uiX", "y": "uiY"}),
+    consts.ECamFeatureDescType.edesc_Size: (consts.SizeFeature, {"height": "uiHeight", "width": "uiWidth"}),
+}
+
+
+def _range_limits(desc_range: structs.CAM_FeatureDescRange) -> RangeLimits:
+    return RangeLimits(*(methods.get_variant_value(variant) for variant in
+                         (desc_range.stMin, desc_range.stMax, desc_range.stRes, desc_range.stDef)))
+
+
+def _struct_limits(desc, fields: dict[str, str]) -> dict[str, RangeLimits]:
+    """Limits of each field of an area, position or size description."""
+    ranges = {}
+    for name, struct_field in fields.items():
+        limits = RangeLimits(*(int(getattr(getattr(desc, part), struct_field))
+                               for part in ("stMin", "stMax", "stRes", "stDef")))
+        if limits.minimum == 0 and limits.maximum == 0:
+            continue  # Not described by the SDK
+        ranges[name] = limits
+    return ranges
+
+
+def compile_limits(description: structs.CAM_FeatureDesc) -> FeatureLimits | None:
+    """Convert a feature description into limits that can be checked without the SDK.
+    Returns:
+        FeatureLimits | None: The limits, None if the description type is unknown.
+    """
+    desc_type = description.eFeatureDescType
+    feature_desc = description.FeatureDesc
+    match desc_type:
+        case consts.ECamFeatureDescType.edesc_Range:
+            return FeatureLimits(desc_type, {"": _range_limits(feature_desc.stRange)})
+
+        case consts.ECamFeatureDescType.edesc_ElementList:
+            allowed = {}
+            for i in range(description.uiListCount):
+                element = feature_desc.stElementList[i]
+                allowed[methods.get_variant_value(element.varValue)] = element.wszComment
+            return FeatureLimits(desc_type, {}, allowed)
+
+        case consts.ECamFeatureDescType.edesc_FormatList:
+            allowed = {}
+            for i in range(description.uiListCount):
+                format_desc = feature_desc.stFormatList[i]
+                image_format = consts.FormatFeature(format_desc.stFormat.eColor, format_desc.stFormat.eMode)
+                allowed[image_format] = format_desc.wszComment
+            return FeatureLimits(desc_type, {}, allowed)
+
+        case consts.ECamFeatureDescType.edesc_Area:
+            return FeatureLimits(desc_type, _struct_limits(feature_desc.stArea, _DescValueTypes[desc_type][1]))
+
+        case consts.ECamFeatureDescType.edesc_Position:
+            return FeatureLimits(desc_type, _struct_limits(feature_desc.stPosition, _DescValueTypes[desc_type][1]))
+
+        case consts.ECamFeatureDescType.edesc_Size:
+            return FeatureLimits(desc_type, _struct_limits(feature_desc.stSize, _DescValueTypes[desc_type][1]))
+
+        case consts.ECamFeatureDescType.edesc_TriggerOption:
+            trigger_option = feature_desc.stTriggerOption
+            return FeatureLimits(desc_type, {"frame_count": _range_limits(trigger_option.stRangeFrameCount),
+                                             "delay_time": _range_limits(trigger_option.stRangeDelayTime)})
+
+        case _:
+            return None
+
+
+def _check_range(name: str, value: int | float, limits: RangeLimits, clamp: bool, snap: bool) -> int | float:
+    """Check a number against its limits, optionally snapping it to the resolution and clamping it into range."""
+    minimum, maximum, resolution, _ = limits
+    is_float = isinstance(minimum, float)
+    if not is_float and value != int(value) and not snap:
+        raise ValueError(f"{name} value {value} must be an integer.")
+
+    if snap and resolution:
+        value = minimum + round((value - minimum) / resolution) * resolution
+    if clamp:
+        if resolution and not is_float:  # Largest value on the resolution grid
+            maximum = minimum + (maximum - minimum) // resolution * resolution
+        value = min(max(value, minimum), maximum)
+    if not is_float:
+        value = int(value)
+
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} value {value} is out of range [{minimum}, {maximum}].")
+    if resolution:
+        steps = (value - minimum) / resolution
+        if not math.isclose(steps, round(steps), abs_tol=1e-9):
+            raise ValueError(f"{name} value {value} is not {minimum} plus a multiple of the resolution {resolution}.")
+    return value
+
+
+def _describe(value: Any) -> str:
+    """Readable form of a value for error messages, formats are shown by their enum names."""
+    if isinstance(value, consts.FormatFeature):
+        try:
+            return f"{consts.ECamFormatColor(value.colour).name}/{consts.ECamFormatSize(value.mode).name}"
+        except ValueError:
+            return f"{int(value.colour)}/{int(value.mode)}"
+    return str(value)
+
+
+class FeatureValidator:
+    """Checks feature values against the camera's feature descriptions before they are sent to the SDK.
+
+    The descriptions are compiled once into per-feature limits, so each check is a dictionary lookup and a few
+    comparisons. Range values can be snapped to the resolution and clamped into range instead of being rejected.
+
+    Example:
+        validator = FeatureValidator(camera._feature_descriptions)
+        exposure = validator.validate(ECamFeatureId.ExposureTime, 12_345.6, clamp=True, snap=True)
+    """
+    def __init__(self, descriptions: list[structs.CAM_FeatureDesc]) -> None:
+        """
+        Args:
+            descriptions (list[CAM_FeatureDesc]): The camera's feature descriptions.
+        """
+        self.limits: dict[consts.ECamFeatureId, FeatureLimits] = {}
+        for description in descriptions:
+            try:
+                feature_id = consts.ECamFeatureId(description.uiFeatureId)
+            except ValueError:
+                continue  # Feature not known to the package
+            limits = compile_limits(description)
+            if limits is not None:
+                self.limits[feature_id] = limits
+
+    def range(self, feature_id: consts.ECamFeatureId) -> RangeLimits | None:
+        """Get the (minimum, maximum, resolution, default) of a range feature, None if it is not a range feature."""
+        limits = self.limits.get(feature_id)
+        if limits is None:
+            return None
+        return limits.ranges.get("")
+
+    def validate(self, feature_id: consts.ECamFeatureId, value: Any, clamp: bool = False, snap: bool = False) -> Any:
+        """Check a value for a feature.
+        Args:
+            feature_id (ECamFeatureId): The feature.
+            value: The value, in the forms accepted by NikonCamera.set_feature_value.
+            clamp (bool): Clamp range values into range instead of rejecting them.
+            snap (bool): Round range values to the nearest multiple of the resolution instead of rejecting them.
+        Raises:
+            ValueError: If the value is not valid for the feature.
+        Returns:
+            The value, snapped and clamped if requested. Values of features without a description are returned as is.
+        """
+        limits = self.limits.get(feature_id)
+        if limits is None:
+            return value
+        name = consts.ECamFeatureId(feature_id).name
+
+        match limits.desc_type:
+            case consts.ECamFeatureDescType.edesc_Range:
+                return _check_range(name, value, limits.ranges[""], clamp, snap)
+
+            case consts.ECamFeatureDescType.edesc_ElementList | consts.ECamFeatureDescType.edesc_FormatList:
+                if limits.desc_type == consts.ECamFeatureDescType.edesc_FormatList:
+                    value = consts.FormatFeature(*value)
+                if value not in limits.allowed:
+                    allowed = ", ".join(f"{comment} ({_describe(allowed_value)})" if comment else _describe(allowed_value)
+                                        for allowed_value, comment in limits.allowed.items())
+                    raise ValueError(f"{name} value {_describe(value)} is not one of: {allowed}.")
+                return value
+
+            case consts.ECamFeatureDescType.edesc_TriggerOption:
+                value = consts.TriggerOptionFeature(*value)
+                return consts.TriggerOptionFeature(
+                    delay_time=_check_range(f"{name} delay_time", value.delay_time,
+                                            limits.ranges["delay_time"], clamp, snap),
+                    frame_count=_check_range(f"{name} frame_count", value.frame_count,
+                                             limits.ranges["frame_count"], clamp, snap))
+
+            case _:
+                value_type = _DescValueTypes[limits.desc_type][0]
+                value = value_type(*value)
+                fields = {field: (_check_range(f"{name} {field}", field_value, limits.ranges[field], clamp, snap)
+                                  if field in limits.ranges else field_value)
+                          for field, field_value in value._asdict().items()}
+                return value_type(**fields)
@@ -0,0 +1,15 @@
+"""Runs the tests against the DsCam stand-in in benchmarks/fake_dscam.py, without a camera or Windows."""
+import os
+import sys
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS = os.path.join(os.path.dirname(TESTS), "benchmarks")
+
+sys.path.insert(0, BENCHMARKS)
+
+import fake_dscam  # noqa: E402,F401  Must be imported before pynikonscicam
+
+# Pipeline worker processes are spawned and import pynikonscicam before anything else, spawn/sitecustomize.py imports
+# the stand-in first in them
+os.environ["PYTHONPATH"] = os.pathsep.join(
+    [os.path.join(TESTS, "spawn"), BENCHMARKS, *filter(None, [os.environ.get("PYTHONPATH")])])
@@ -0,0 +1 @@
+import fake_dscam  # noqa: F401  Patches ctypes.WinDLL before a worker process imports pynikonscicam
@@ -0,0 +1,58 @@
+import fake_dscam
+import numpy as np
+import pytest
+
+from pynikonscicam import AutoExposureController, NikonCamera
+from pynikonscicam import constants as consts
+
+
+def test_defaults_from_the_camera():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        controller = AutoExposureController(camera)
+        assert controller.gain_unity == 100  # Minimum of the stand-in's Gain range
+        assert controller.gain_min == 100
+        assert controller.measure(np.full((64, 64, 3), 255, np.uint8)) == 1.0
+
+        camera.set_feature_value(consts.ECamFeatureId.Format,
+                                 (consts.ECamFormatColor.ecfcMono16, consts.ECamFormatSize.ecfsH1440x1024))
+        assert controller.measure(np.full((64, 64), 65535 // 2, np.uint16)) == pytest.approx(0.5, abs=1e-4)
+
+
+def test_converges_on_the_camera():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        controller = AutoExposureController(camera, target=0.3)
+        controller.start()
+        for _ in range(10):
+            result = controller.update(camera.get_image())
+            if result.converged:
+                break
+        assert result.converged
+        assert result.level == pytest.approx(0.3, rel=0.05)
+        assert result.gain == 100  # Exposure alone was enough
+        assert camera.get_feature_value(consts.ECamFeatureId.ExposureTime) == result.exposure
+
+
+def test_gain_only_extends_the_exposure_range():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        camera.set_feature_value(consts.ECamFeatureId.ExposureTimeLimit, 20_000)
+        controller = AutoExposureController(camera, target=0.5, max_step=8.0)
+        assert controller.exposure_max == 20_000
+        assert controller.predict(0.5 / 2) == (20_000, 100)
+        assert controller.predict(0.5 / 4) == (20_000, 200)
+
+        controller.adjust_gain = False
+        assert controller.predict(0.5 / 4) == (20_000, 100)
+        controller.gain = 200
+        assert controller.predict(0.8) == (6_250, 200)  # The gain is left where it is
+
+
+def test_gain_without_a_unity_value():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        with pytest.raises(ValueError, match="gain_unity"):
+            AutoExposureController(camera, gain_unity=0)
+        controller = AutoExposureController(camera, gain_unity=0, adjust_gain=False)
+        assert controller.predict(0.25) == (20_000, 100)
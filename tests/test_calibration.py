@@ -0,0 +1,35 @@
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam.calibration import PTCSweep
+
+
+def test_settle_waits_for_gain_only_change():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        # The camera reports the previous gain in the image info of the first two frames after a gain change
+        lag = {"gain": None, "frames": 0}
+        set_feature_values, get_image_info = camera.set_feature_values, camera.get_image_info
+
+        def lagging_set_feature_values(values):
+            gain = camera.get_feature_value(consts.ECamFeatureId.Gain)
+            if values.get(consts.ECamFeatureId.Gain, gain) != gain:
+                lag["gain"], lag["frames"] = gain, 2
+            set_feature_values(values)
+
+        def lagging_get_image_info():
+            info = get_image_info()
+            if lag["frames"]:
+                lag["frames"] -= 1
+                info.usGain = lag["gain"]
+            return info
+
+        camera.set_feature_values = lagging_set_feature_values
+        camera.get_image_info = lagging_get_image_info
+        camera.set_feature_values({consts.ECamFeatureId.Gain: 100})
+        lag["frames"] = 0
+
+        # The exposure time stays the same between the two points, only the gain changes
+        result = PTCSweep(camera, [1_000], gains=[100, 200], pairs=1).run()
+        assert [(point.gain, point.settle_frames) for point in result.points] == [(100, 0), (200, 2)]
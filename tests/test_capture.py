@@ -0,0 +1,87 @@
+import fake_dscam
+import numpy as np
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import camera_class_nikon
+from pynikonscicam import constants as consts
+
+
+@pytest.fixture
+def numbered_frames(monkeypatch):
+    """Fill each frame with the low byte of its frame number, so the order of frames can be checked."""
+    def render(camera) -> np.ndarray:
+        return np.full(camera.geometry[3], camera.frame_count & 0xFF, np.uint8)
+
+    monkeypatch.setattr(fake_dscam._Camera, "render", render)
+
+
+@pytest.fixture
+def transfer_starts(monkeypatch) -> list[int]:
+    """Driver buffer counts that frame transfer is started with."""
+    starts = []
+    start_frame_transfer = camera_class_nikon.cmds.start_frame_transfer
+
+    def record(camera_handle: int, image_buffer_num: int = 1) -> None:
+        starts.append(image_buffer_num)
+        start_frame_transfer(camera_handle, image_buffer_num)
+
+    monkeypatch.setattr(camera_class_nikon.cmds, "start_frame_transfer", record)
+    return starts
+
+
+def _small_camera() -> NikonCamera:
+    camera = NikonCamera(0)
+    camera.set_feature_value(consts.ECamFeatureId.Format,
+                             (consts.ECamFormatColor.ecfcMono16, consts.ECamFormatSize.ecfsH1440x1024))
+    return camera
+
+
+def test_frames_in_order(numbered_frames, transfer_starts):
+    sdk = fake_dscam.install(fake_dscam.FakeDsCam(exposure_delay=True))
+    with _small_camera() as camera:
+        camera.set_feature_value(consts.ECamFeatureId.ExposureTime, 1000)
+        first = camera.get_image()[0, 0] & 0xFF
+        transfer_starts.clear()
+        frames = camera.capture_n(20, buffers=4)
+        assert frames.shape == (20, *camera.image_shape)
+        assert [frame[0, 0] & 0xFF for frame in frames] == list(range(first + 1, first + 21))
+        assert sdk.call_counts["CAM_GetImage"] == 21  # One fetch per frame, none dropped
+        assert transfer_starts == [4, 1]  # Restored for get_image
+        assert camera._image_buffers == 1
+        assert camera.get_image()[0, 0] & 0xFF == first + 21
+
+
+def test_single_frame_into_out(numbered_frames, transfer_starts):
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with _small_camera() as camera:
+        transfer_starts.clear()
+        out = np.zeros((1, *camera.image_shape), camera.image_dtype)
+        assert camera.capture_n(1, out=out, buffers=1) is out
+        assert out[0, 0, 0] & 0xFF == 1
+        assert transfer_starts == []  # Already started with one buffer
+
+
+def test_out_must_match_the_frames():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with _small_camera() as camera:
+        with pytest.raises(ValueError, match="shape"):
+            camera.capture_n(2, out=np.empty((1, *camera.image_shape), camera.image_dtype))
+        with pytest.raises(ValueError, match="type"):
+            camera.capture_n(2, out=np.empty((2, *camera.image_shape), np.float32))
+        with pytest.raises(ValueError):
+            camera.capture_n(0)
+        with pytest.raises(ValueError):
+            camera.capture_n(1, buffers=129)
+
+
+def test_timeout_restores_the_driver_buffers(transfer_starts):
+    fake_dscam.install(fake_dscam.FakeDsCam(exposure_delay=True))
+    with _small_camera() as camera:
+        camera.set_feature_value(consts.ECamFeatureId.ExposureTime, 600_000)
+        transfer_starts.clear()
+        with pytest.raises(TimeoutError, match="0 of 3 frames"):
+            camera.capture_n(3, buffers=2, timeout=0.2)
+        assert transfer_starts == [2, 1]
+        camera.set_feature_value(consts.ECamFeatureId.ExposureTime, 1000)
+        assert camera.get_image().shape == tuple(camera.image_shape)
@@ -0,0 +1,12 @@
+import numpy as np
+
+from pynikonscicam.change_detection import ChangeDetector
+
+
+def test_no_false_activity_near_full_scale_16_bit():
+    detector = ChangeDetector(stride=1, threshold=100, start_fraction=0.01, start_frames=1, background_shift=15)
+    frame = np.full((32, 32), 65535, np.uint16)
+    for _ in range(50):
+        result = detector.update(frame)
+        assert not result.active
+        assert result.fraction == 0.0
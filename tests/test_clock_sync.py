@@ -0,0 +1,100 @@
+import time
+
+import fake_dscam
+import numpy as np
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam.clock_sync import ClockSync
+
+TICK_RATE = 1e6
+DRIFT = 50e-6
+PERIOD_NS = 10_000_000
+JITTER_NS = 2000
+
+
+def _tick(host_ns: float, offset: int = 5_000_000) -> int:
+    return int(offset + host_ns * TICK_RATE * (1.0 + DRIFT) / 1e9)
+
+
+def _feed(sync: ClockSync, rng: np.random.Generator, start: int, count: int, offset: int = 5_000_000) -> int:
+    """Add count samples one period apart with host jitter, returning the next host time."""
+    for i in range(count):
+        host_ns = start + i * PERIOD_NS
+        sync.add_sample(_tick(host_ns, offset), host_ns + int(abs(rng.normal(0, JITTER_NS))))
+    return start + count * PERIOD_NS
+
+
+def test_fits_drift_and_converts_ticks():
+    rng = np.random.default_rng(1)
+    sync = ClockSync(nominal_tick_rate=TICK_RATE)
+    with pytest.raises(RuntimeError):
+        sync.to_host(_tick(0))
+    host_ns = _feed(sync, rng, 1_000_000_000, 500)
+
+    assert sync.ready
+    assert sync.drift_ppm == pytest.approx(50, abs=2)
+    assert sync.residual_ns < 3 * JITTER_NS
+    frame_time = sync.to_host(_tick(host_ns))
+    assert abs(frame_time.host_ns - host_ns) < 3 * JITTER_NS
+    assert 0 < frame_time.error_ns < 3 * JITTER_NS
+    assert abs(frame_time.wall_ns - frame_time.host_ns - (time.time_ns() - time.perf_counter_ns())) < 10_000_000
+    assert sync.outliers == 0
+    assert "drift +" in repr(sync)
+
+
+def test_rejects_late_samples():
+    rng = np.random.default_rng(2)
+    sync = ClockSync(nominal_tick_rate=TICK_RATE)
+    host_ns = _feed(sync, rng, 0, 200)
+    drift_ppm = sync.drift_ppm
+    outliers = sync.outliers
+
+    for i in range(5):  # Events seen 5 ms late, e.g. the thread was descheduled
+        late_ns = host_ns + i * PERIOD_NS
+        assert not sync.add_sample(_tick(late_ns), late_ns + 5_000_000)
+    assert sync.outliers == outliers + 5
+    assert sync.resets == 0
+    host_ns = _feed(sync, rng, host_ns + 5 * PERIOD_NS, 10)
+    assert sync.drift_ppm == pytest.approx(drift_ppm, abs=0.5)
+    assert abs(sync.to_host(_tick(host_ns)).host_ns - host_ns) < 3 * JITTER_NS
+
+
+def test_restarts_after_clock_jump():
+    rng = np.random.default_rng(3)
+    sync = ClockSync(min_samples=8, max_rejects=5, nominal_tick_rate=TICK_RATE)
+    host_ns = _feed(sync, rng, 0, 100)
+
+    # The camera clock restarts, every later sample is far off the fit
+    offset = -_tick(host_ns)
+    for i in range(4):
+        jumped_ns = host_ns + i * PERIOD_NS
+        assert not sync.add_sample(_tick(jumped_ns, offset), jumped_ns)
+    assert sync.resets == 0
+    jumped_ns = host_ns + 4 * PERIOD_NS
+    assert not sync.add_sample(_tick(jumped_ns, offset), jumped_ns)
+    assert sync.resets == 1
+    assert sync.samples == 1 and not sync.ready  # Restarted from the last sample
+
+    host_ns = _feed(sync, rng, jumped_ns + PERIOD_NS, 50, offset)
+    assert sync.drift_ppm == pytest.approx(50, abs=5)
+    assert abs(sync.to_host(_tick(host_ns, offset)).host_ns - host_ns) < 3 * JITTER_NS
+
+
+def test_frame_times_from_camera():
+    fake_dscam.install(fake_dscam.FakeDsCam(tick_drift=DRIFT))
+    with NikonCamera(0) as camera:
+        with pytest.raises(RuntimeError):
+            camera.get_frame_time()
+        sync = camera.enable_clock_sync(min_samples=4, nominal_tick_rate=TICK_RATE)
+        for _ in range(5):
+            before = time.perf_counter_ns()
+            camera.get_image()
+            after = time.perf_counter_ns()
+        assert sync.samples == 5
+        frame_time = camera.get_frame_time()
+        assert before - 5_000_000 < frame_time.host_ns < after + 5_000_000
+
+        camera.disable_clock_sync()
+        with pytest.raises(RuntimeError):
+            camera.get_frame_time()
@@ -0,0 +1,51 @@
+import time
+
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam import methods as methods
+
+Fid = consts.ECamFeatureId
+
+
+def _wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _feature_reads(sdk: fake_dscam.FakeDsCam) -> int:
+    return sdk.call_counts["CAM_GetAllFeatures"] + sdk.call_counts["CAM_GetFeatures"]
+
+
+def test_values_follow_the_camera_without_reading_features():
+    sdk = fake_dscam.install()
+    with NikonCamera(0) as camera:
+        camera.enable_feature_tracking(poll_interval=0.01)
+        reads = _feature_reads(sdk)
+        for exposure, gain in ((20_000, 150), (30_000, 250)):  # As ContinuousAE would
+            sdk.set_feature_externally(camera.camera_handle, Fid.ExposureTime, exposure)
+            sdk.set_feature_externally(camera.camera_handle, Fid.Gain, gain)
+            _wait_until(lambda: camera.get_cached_feature_value(Fid.Gain) == gain)
+            assert camera.get_feature_value(Fid.ExposureTime) == exposure
+            assert methods.get_feature_value(camera.feature_map[Fid.ExposureTime]) == exposure
+        for _ in range(100):
+            camera.get_feature_value(Fid.Gain)
+        assert _feature_reads(sdk) == reads
+
+        camera.disable_feature_tracking()
+        sdk.set_feature_externally(camera.camera_handle, Fid.Gain, 400)
+        assert camera.get_feature_value(Fid.Gain) == 400  # Read from the camera again
+        assert _feature_reads(sdk) > reads
+
+
+def test_tracking_starts_from_the_current_values():
+    sdk = fake_dscam.install()
+    with NikonCamera(0) as camera:
+        sdk.set_feature_externally(camera.camera_handle, Fid.Gain, 300)  # Before tracking was enabled
+        camera.enable_feature_tracking(poll_interval=0.01)
+        assert camera.get_feature_value(Fid.Gain) == 300
+        camera.set_feature_value(Fid.Gain, 500)  # Own writes are cached as well
+        assert camera.get_feature_value(Fid.Gain) == 500
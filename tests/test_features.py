@@ -0,0 +1,69 @@
+import fake_dscam
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam import methods as methods
+
+Fid = consts.ECamFeatureId
+
+
+def test_rejected_values_leave_feature_map_unchanged():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        camera.set_feature_values({Fid.ExposureTime: 10_000, Fid.Gain: 200})
+        camera.validator.validate = lambda feature_id, value, clamp=False, snap=False: value  # Let the SDK reject
+
+        with pytest.raises(Exception, match="Failed to set features"):
+            camera.set_feature_values({Fid.ExposureTime: 20_000, Fid.Gain: 10 ** 9})
+        with pytest.raises(Exception, match="Failed to set feature"):
+            camera.set_feature_value(Fid.Gain, 10 ** 9)
+
+        assert methods.get_feature_value(camera.feature_map[Fid.ExposureTime]) == 10_000
+        assert methods.get_feature_value(camera.feature_map[Fid.Gain]) == 200
+        assert camera.get_cached_feature_value(Fid.ExposureTime) == 10_000
+
+
+class RecordingDsCam(fake_dscam.FakeDsCam):
+    """Stand-in recording the features sent by each CAM_SetFeatures call."""
+    def __init__(self) -> None:
+        super().__init__()
+        self.sets: list[list[int]] = []
+
+    def _CAM_SetFeatures(self, camera_handle, features):
+        vector = fake_dscam._deref(features)
+        self.sets.append([vector.pstFeatureValue[i].uiFeatureId for i in range(vector.uiCountUsed)])
+        return super()._CAM_SetFeatures(camera_handle, features)
+
+
+def test_trigger_mode_flip_sends_only_the_trigger_mode():
+    sdk = fake_dscam.install(RecordingDsCam())
+    with NikonCamera(0) as camera:
+        # The camera changes a feature itself after the feature map was read, e.g. during auto exposure
+        sdk.set_feature_externally(camera.camera_handle, Fid.ExposureTime, 50_000)
+        sdk.sets.clear()
+        reads = sdk.call_counts["CAM_GetAllFeatures"]
+        for mode in (consts.ECamTriggerMode.Off, consts.ECamTriggerMode.Soft) * 3:
+            camera.set_trigger_mode(mode)
+            assert sdk.cameras[0].value(Fid.TriggerMode) == mode
+            assert camera.get_cached_feature_value(Fid.TriggerMode) == mode
+        assert sdk.sets == [[Fid.TriggerMode]] * 6
+        assert sdk.cameras[0].value(Fid.ExposureTime) == 50_000  # Not reverted to the value in the map
+        assert sdk.call_counts["CAM_GetAllFeatures"] == reads  # Nothing read back
+
+
+def test_rejected_fast_set_restores_the_previous_value():
+    sdk = fake_dscam.install()
+    with NikonCamera(0) as camera:
+        camera.set_feature_fast(Fid.Gain, 200)
+        camera.validator.validate = lambda feature_id, value, clamp=False, snap=False: value  # Let the SDK reject
+
+        with pytest.raises(Exception, match="Failed to set feature"):
+            camera.set_feature_fast(Fid.Gain, 10 ** 9)
+        assert methods.get_feature_value(camera.feature_map[Fid.Gain]) == 200
+        assert camera.get_cached_feature_value(Fid.Gain) == 200
+        assert sdk.cameras[0].value(Fid.Gain) == 200
+
+        camera.set_feature_fast(Fid.Gain, 300)  # The cached one-feature vector still points at the map
+        assert methods.get_feature_value(camera.feature_map[Fid.Gain]) == 300
+        assert sdk.cameras[0].value(Fid.Gain) == 300
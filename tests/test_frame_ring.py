@@ -0,0 +1,40 @@
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam.frame_ring import FramePublisher
+
+
+def test_published_metadata_belongs_to_the_published_frame(monkeypatch):
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        publisher = FramePublisher(camera)
+        other_counts = []
+        get_image = camera.get_image
+
+        def get_image_then_another(out=None):  # Another thread gets the next frame as soon as the lock is free
+            image = get_image(out)
+            other_counts.append(camera.get_image_with_metadata()[1].frame_count)
+            return image
+
+        monkeypatch.setattr(camera, "get_image", get_image_then_another)
+        published = []
+        for _ in range(5):
+            frame = publisher.ring.read(publisher.publish())
+            assert frame.info.usFrameNo == frame.frame_count & 0xFFFF
+            published.append(frame.frame_count)
+            del frame
+        assert len(set(published)) == len(published)
+        assert not set(published) & set(other_counts)
+        publisher.close()
+
+
+def test_get_image_with_metadata():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        first, metadata = camera.get_image_with_metadata()
+        assert first.shape == tuple(camera.image_shape)
+        out, next_metadata = camera.get_image_with_metadata(out=first)
+        assert out is first
+        assert next_metadata.frame_count == metadata.frame_count + 1
+        assert next_metadata.camera_time > metadata.camera_time
+        assert bytes(camera.get_image_info()) == next_metadata.info
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import fake_dscam
+import numpy as np
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam.frame_server import BLOCK, DROP_OLDEST, FrameClient, FrameServer
+
+_BUFFER_SIZE = 64 * 1024  # Small socket buffers, so a client that does not read soon holds up its queue
+
+
+def _wait_for_clients(server: FrameServer, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(server.stats()) != count:
+        assert time.monotonic() < deadline, f"{len(server.stats())} clients connected, expected {count}"
+        time.sleep(0.01)
+
+
+def _connect(server: FrameServer) -> FrameClient:
+    count = len(server.stats()) + 1
+    client = FrameClient(*server.address, timeout=10, receive_buffer_size=_BUFFER_SIZE)
+    _wait_for_clients(server, count)
+    return client
+
+
+def test_publish_from_camera():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera, FrameServer(camera, port=0) as server, _connect(server) as client:
+        for sequence in (1, 2):
+            assert server.publish_from_camera() == sequence
+            frame = client.read()
+            assert frame.sequence == sequence
+            assert frame.image.shape == tuple(camera.image_shape)
+            assert frame.info.usFrameNo == frame.frame_count & 0xFFFF
+            assert frame.info.uiSerialNo == camera.serial_number
+
+
+def test_drop_oldest_for_a_slow_client():
+    image = np.zeros((1024, 1024), np.uint8)
+    with FrameServer(port=0, queue_size=2, policy=DROP_OLDEST, send_buffer_size=_BUFFER_SIZE) as server:
+        with _connect(server) as client:
+            for _ in range(10):  # Publishing does not wait for the client
+                server.publish(image)
+            assert server.stats()[0]["frames_dropped"] > 0
+            received = []
+            while not received or received[-1] != 10:  # The newest frame is never dropped
+                out = client.read().image
+                received.append(client.last_sequence)
+            assert received == sorted(received)
+            assert len(received) < 10
+            assert client.missed == received[-1] - received[0] + 1 - len(received)  # Gaps after the first frame
+            np.testing.assert_array_equal(out, image)
+
+
+def test_block_delivers_every_frame():
+    image = np.zeros((1024, 1024), np.uint8)
+    with FrameServer(port=0, queue_size=1, policy=BLOCK, send_buffer_size=_BUFFER_SIZE) as server:
+        with _connect(server) as client:
+            publishers = [threading.Thread(target=lambda: [server.publish(image) for _ in range(10)])
+                          for _ in range(3)]
+            for publisher in publishers:
+                publisher.start()
+            sequences = [client.read().sequence for _ in range(30)]
+            for publisher in publishers:
+                publisher.join()
+            assert sorted(sequences) == list(range(1, 31))
+            assert client.missed == 0
+            assert server.stats()[0]["frames_dropped"] == 0
+
+
+def test_block_disconnects_a_stalled_client():
+    image = np.zeros((1024, 1024), np.uint8)
+    with FrameServer(port=0, queue_size=1, policy=BLOCK, block_timeout=0.1, send_buffer_size=_BUFFER_SIZE) as server:
+        with _connect(server) as client:
+            start = time.monotonic()
+            for _ in range(5):
+                server.publish(image)
+            assert time.monotonic() - start < 2  # Waited for the client once, not for every frame
+            assert server.stats() == []
+            with pytest.raises(ConnectionError):
+                while True:
+                    client.read()
+
+
+def test_client_disconnect():
+    image = np.zeros((16, 16), np.uint8)
+    with FrameServer(port=0) as server:
+        first = _connect(server)
+        with _connect(server) as second:
+            first.close()
+            deadline = time.monotonic() + 5
+            while len(server.stats()) > 1:  # Found by its sender thread when sending to it fails
+                assert time.monotonic() < deadline
+                server.publish(image)
+                second.read()
+            sequence = server.publish(image)
+            assert second.read().sequence == sequence
+            assert second.missed == 0
@@ -0,0 +1,72 @@
+import fake_dscam
+import numpy as np
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam.latency import LatencyRecorder
+
+
+def _record(recorder: LatencyRecorder, start: int, *durations: int) -> None:
+    recorder.record(*np.cumsum((start, *durations)))
+
+
+def test_ring_buffer_keeps_newest_oldest_first():
+    recorder = LatencyRecorder(("a", "b"), capacity=3)
+    assert len(recorder) == 0
+    assert recorder.summary() == {}
+    assert repr(recorder) == "LatencyRecorder: no records"
+
+    for i in range(5):
+        _record(recorder, 1000 * i, i + 1, 10 * (i + 1))
+    assert len(recorder) == 3
+    assert recorder.count == 5
+    np.testing.assert_array_equal(recorder.durations(), [[3, 30], [4, 40], [5, 50]])
+
+    recorder.clear()
+    assert len(recorder) == 0
+    assert recorder.count == 0
+    _record(recorder, 0, 7, 70)
+    np.testing.assert_array_equal(recorder.durations(), [[7, 70]])
+
+
+def test_summary_and_histogram():
+    recorder = LatencyRecorder(("a", "b"), capacity=10)
+    for i in range(1, 5):
+        _record(recorder, 0, 1000 * i, 2000)
+
+    summary = recorder.summary(percentiles=(50.0,))
+    assert list(summary) == ["a", "b", "total"]
+    assert summary["a"] == {"mean": 2.5, "min": 1.0, "max": 4.0, "p50": 2.5}
+    assert summary["b"]["mean"] == 2.0
+    assert summary["total"]["max"] == 6.0
+    assert "over 4 records" in repr(recorder)
+
+    counts, edges = recorder.histogram("a", bins=4)
+    assert counts.sum() == 4
+    assert edges[0] == pytest.approx(1.0) and edges[-1] == pytest.approx(4.0)
+    counts, _ = recorder.histogram("total", bins=np.array([0.0, 4.5, 10.0]))
+    np.testing.assert_array_equal(counts, [2, 2])
+    with pytest.raises(ValueError):
+        recorder.histogram("c")
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        LatencyRecorder(("a",), capacity=0)
+
+
+def test_get_image_records_each_stage():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        recorder = camera.enable_latency_recording(capacity=2)
+        for _ in range(3):
+            camera.get_image()
+        assert recorder.count == 3
+        durations = recorder.durations()
+        assert durations.shape == (2, len(NikonCamera.GET_IMAGE_STAGES))
+        assert (durations >= 0).all()
+        assert set(recorder.summary()) == {*NikonCamera.GET_IMAGE_STAGES, "total"}
+
+        camera.disable_latency_recording()
+        camera.get_image()
+        assert recorder.count == 3
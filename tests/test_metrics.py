@@ -0,0 +1,52 @@
+import math
+
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam import methods as methods
+from pynikonscicam import tracing as tracing
+
+
+def _get_image_calls(camera: NikonCamera) -> int:
+    return camera.metrics.sdk_calls.calls.get("CAM_GetImage", [0, 0, 0])[0]
+
+
+def test_sdk_metrics_per_camera():
+    fake_dscam.install(fake_dscam.FakeDsCam(device_count=2))
+    dll = methods.pDsCamDLL
+    with NikonCamera(0) as first, NikonCamera(1) as second:
+        first.enable_metrics(port=None)
+        second.enable_metrics(port=None)
+        for _ in range(3):
+            first.get_image()
+        second.get_image()
+        assert _get_image_calls(first) == 3
+        assert _get_image_calls(second) == 1
+
+        # A user's tracer runs alongside the metrics
+        summary = tracing.SummarySink()
+        with tracing.SdkTracer(summary):
+            second.get_image()
+        assert summary.summary()["CAM_GetImage"]["calls"] == 1
+
+        # The other camera keeps its SDK metrics when the first one to attach is detached
+        first.disable_metrics()
+        second.get_image()
+        assert _get_image_calls(second) == 3
+        second.disable_metrics()
+    assert methods.pDsCamDLL is dll
+
+
+def test_temperature_from_notices():
+    sdk = fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        metrics = camera.enable_metrics(port=None)
+        assert math.isnan(metrics.temperature_celsius)
+        sdk.inject_notice(camera.camera_handle, consts.ECamNoticeType.ecntInfo,
+                          eCode=consts.ECamNoticeInfoCode.ecnicTemperature, dValue=21.5)
+        assert metrics.temperature_celsius == 21.5
+        sdk.inject_notice(camera.camera_handle, consts.ECamNoticeType.ecntInfo,
+                          eCode=consts.ECamNoticeInfoCode.ecnicTemperature, dValue=0.0, iValue=35)
+        assert metrics.temperature_celsius == 0.0
+        camera.disable_metrics()
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from pynikonscicam.mosaic import MosaicAcquirer, Tile, plan_grid
+
+
+class TileCamera:
+    """Returns an image filled with the value of the tile the stage is at, recording the order of the calls."""
+    def __init__(self, values: dict[tuple[int, int], int], shape: tuple[int, int] = (8, 12)) -> None:
+        self.values = values
+        self.image_shape = shape
+        self.image_dtype = np.dtype(np.uint8)
+        self.position: Tile | None = None
+        self.calls: list[str] = []
+
+    def move(self, tile: Tile) -> None:
+        self.calls.append(f"move {tile.index}")
+        self.position = tile
+
+    def get_image(self, out: np.ndarray, on_received=None) -> np.ndarray:
+        self.calls.append(f"received {self.position.index}")
+        value = self.values[self.position.row, self.position.column]
+        if on_received is not None:
+            on_received()
+        out[...] = value  # Fetched and decoded after the move has started
+        self.calls.append("fetched")
+        return out
+
+
+def _acquire(tmp_path, camera: TileCamera, tiles: list[Tile], blend: bool) -> np.ndarray:
+    mosaic = MosaicAcquirer(camera, tiles, camera.move, tmp_path / "mosaic.npy", blend=blend)
+    report = mosaic.run()
+    mosaic.close()
+    assert report.tiles == len(tiles)
+    return np.load(tmp_path / "mosaic.npy")
+
+
+def test_tiles_placed_in_the_canvas(tmp_path):
+    values = {(row, column): 10 * (row * 3 + column + 1) for row in range(2) for column in range(3)}
+    camera = TileCamera(values)
+    tiles = plan_grid(2, 3, camera.image_shape, overlap=0.25)
+    canvas = _acquire(tmp_path, camera, tiles, blend=False)
+    assert canvas.shape == (8 + 6, 12 + 2 * 9)
+    expected = np.zeros(canvas.shape, np.uint8)
+    for tile in tiles:  # Without blending, each tile overwrites its overlaps with the tiles acquired before it
+        expected[tile.y:tile.y + 8, tile.x:tile.x + 12] = values[tile.row, tile.column]
+    np.testing.assert_array_equal(canvas, expected)
+
+
+def test_overlaps_blended(tmp_path):
+    camera = TileCamera({(0, 0): 0, (0, 1): 200, (1, 0): 100, (1, 1): 100})
+    tiles = plan_grid(2, 2, camera.image_shape, overlap=0.25, serpentine=False)
+    canvas = _acquire(tmp_path, camera, tiles, blend=True).astype(float)
+    ramp = (np.arange(3) + 0.5) / 3  # Overlap of 12 - 9 columns
+    np.testing.assert_array_equal(canvas[0, 9:12], np.rint(200 * ramp))
+    np.testing.assert_array_equal(canvas[0, :9], 0)
+    np.testing.assert_array_equal(canvas[0, 12:], 200)
+    # The second row blends with the first across its top 8 - 6 rows
+    ramp = (np.arange(2) + 0.5) / 2
+    np.testing.assert_array_equal(canvas[6:8, 0], np.rint(100 * ramp))
+    np.testing.assert_array_equal(canvas[8:, 0], 100)
+    np.testing.assert_array_equal(canvas[6:8, 20], np.rint(200 + (100 - 200) * ramp))
+
+
+def test_next_move_starts_once_the_image_is_received(tmp_path):
+    camera = TileCamera({(0, column): column for column in range(3)})
+    _acquire(tmp_path, camera, plan_grid(1, 3, camera.image_shape), blend=False)
+    assert camera.calls == ["move 0", "received 0", "move 1", "fetched", "received 1", "move 2", "fetched",
+                            "received 2", "fetched"]
+
+
+def test_stage_error_stops_the_mosaic(tmp_path):
+    camera = TileCamera({(0, column): column for column in range(3)})
+
+    def move(tile: Tile) -> None:
+        if tile.index == 1:
+            raise RuntimeError("Stage limit")
+        camera.move(tile)
+
+    mosaic = MosaicAcquirer(camera, plan_grid(1, 3, camera.image_shape), move, tmp_path / "mosaic.npy")
+    with pytest.raises(RuntimeError, match="Stage limit"):
+        mosaic.run()
+    mosaic.close()
@@ -0,0 +1,38 @@
+import fake_dscam
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+
+Fid = consts.ECamFeatureId
+
+
+def test_one_push_ae_returns_the_event_values():
+    sdk = fake_dscam.install(fake_dscam.FakeDsCam(one_push_time=0.2))
+    sdk.ae_result = {Fid.ExposureTime: 12_000, Fid.Gain: 300}
+    with NikonCamera(0) as camera:
+        reads = sdk.call_counts["CAM_GetAllFeatures"]
+        result = camera.one_push_ae(timeout=5.0)
+        assert sdk.call_counts["CAM_GetAllFeatures"] == reads  # Values taken from the ecetFeatureChanged events
+        assert camera.get_cached_feature_value(Fid.ExposureMode) == consts.ECamExposureMode.OnePushAE
+    assert result.settled
+    assert result.values == {Fid.ExposureTime: 12_000, Fid.Gain: 300}
+    assert 0.2 <= result.duration < 1.0  # As long as the camera takes, not the timeout
+
+
+def test_one_push_ae_disabled():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        camera.set_feature_value(Fid.ExposureMode, consts.ECamExposureMode.Manual)
+        with pytest.raises(RuntimeError, match="disabled"):
+            camera.one_push_ae(timeout=1.0, set_mode=False)
+
+
+def test_one_push_white_balance():
+    sdk = fake_dscam.install(fake_dscam.FakeDsCam(one_push_time=0.1))
+    with NikonCamera(0) as camera:
+        result = camera.one_push_white_balance(timeout=5.0)
+        assert camera.get_cached_feature_value(Fid.WhiteBalanceRed) == sdk.wb_result[Fid.WhiteBalanceRed]
+    assert result.settled
+    assert result.values == sdk.wb_result
+    assert result.duration < 1.0
@@ -0,0 +1,50 @@
+import numpy as np
+
+from pynikonscicam.pipeline import Pipeline, Source, Stage
+
+
+def add_one(image: np.ndarray) -> np.ndarray:
+    image += 1
+    return image
+
+
+def pass_through(image: np.ndarray) -> np.ndarray:
+    return image
+
+
+def _run(source: Source, stages: list[Stage]) -> list[np.ndarray]:
+    results = []
+    Pipeline(source, [*stages, Stage(lambda image: results.append(image.copy()), name="sink")]).run()
+    return results
+
+
+def test_process_stage_in_place_on_pickled_input():
+    results = _run(Source(lambda: np.zeros(5, np.int64), count=3), [Stage(add_one, mode="process")])
+    assert len(results) == 3
+    for result in results:
+        np.testing.assert_array_equal(result, np.ones(5, np.int64))
+
+
+def test_process_stage_in_place_on_pooled_input_not_shared():
+    def fill(out: np.ndarray) -> np.ndarray:
+        out[...] = 0
+        return out
+
+    # The source's pool is not shared, the process stage is not next to it
+    source = Source(fill, count=3, buffer_shape=(5,), buffer_dtype=np.int64)
+    results = _run(source, [Stage(pass_through), Stage(add_one, mode="process")])
+    assert len(results) == 3
+    for result in results:
+        np.testing.assert_array_equal(result, np.ones(5, np.int64))
+
+
+def test_process_stage_in_place_on_shared_pool():
+    def fill(out: np.ndarray) -> np.ndarray:
+        out[...] = 0
+        return out
+
+    source = Source(fill, count=3, buffer_shape=(5,), buffer_dtype=np.int64)
+    results = _run(source, [Stage(add_one, mode="process")])
+    assert len(results) == 3
+    for result in results:
+        np.testing.assert_array_equal(result, np.ones(5, np.int64))
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam.pretrigger import PreTriggerRecorder, TriggeredEvent
+
+
+def _wait_until(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _frame_counts(event: TriggeredEvent) -> list[int]:
+    return [frame.frame_count for frame in event.pre + event.post]
+
+
+def test_trigger_keeps_the_frames_around_it():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    events = []
+    with NikonCamera(0) as camera:
+        with PreTriggerRecorder(camera, events.append, pre_frames=5, post_frames=3) as recorder:
+            _wait_until(lambda: recorder.frames > 5)
+            assert recorder.trigger()
+            _wait_until(lambda: events)
+    event, = events
+    assert len(event.pre) == 5 and len(event.post) == 3
+    counts = _frame_counts(event)
+    assert counts == list(range(counts[0], counts[0] + 8))  # Consecutive frames with their own metadata
+    assert all(frame.host_time_ns < event.trigger_time_ns for frame in event.pre)
+    assert all(frame.host_time_ns > event.trigger_time_ns for frame in event.post)
+    assert event.pre[-1].camera_time < event.post[0].camera_time
+
+
+def test_writer_backpressure_holds_acquisition_without_allocating():
+    fake_dscam.install(fake_dscam.FakeDsCam(exposure_delay=True))
+    release = threading.Event()
+    events = []
+
+    def slow_writer(event: TriggeredEvent) -> None:
+        release.wait()
+        events.append((event.number, _frame_counts(event)))
+
+    with NikonCamera(0) as camera:
+        recorder = PreTriggerRecorder(camera, slow_writer, pre_frames=4, post_frames=2)
+        buffers = [buffer.ctypes.data for buffer in recorder._buffers]
+        with recorder:
+            try:
+                _wait_until(lambda: len(recorder._live) == 4)
+                assert recorder.trigger()
+                assert not recorder.trigger()  # Still recording the first event's post-trigger frames
+                _wait_until(lambda: recorder._event is None and len(recorder._live) == 4)
+                assert recorder.trigger()
+                # The first event's buffers are held by the writer, so the second event runs out of buffers
+                _wait_until(lambda: recorder._event is not None and len(recorder._event.post) == 1)
+                frames = recorder.frames
+                time.sleep(0.1)
+                assert recorder.frames == frames
+                assert not recorder._free and not recorder._live
+            finally:
+                release.set()
+            _wait_until(lambda: len(events) == 2)
+        assert [buffer.ctypes.data for buffer in recorder._buffers] == buffers
+    assert [number for number, _ in events] == [0, 1]
+    for _, counts in events:
+        assert counts == list(range(counts[0], counts[0] + 6))
+    assert recorder.writer_errors == 0
+
+
+def test_stop_during_post_frames_writes_what_was_recorded():
+    fake_dscam.install(fake_dscam.FakeDsCam(exposure_delay=True))
+    events = []
+    with NikonCamera(0) as camera:
+        recorder = PreTriggerRecorder(camera, events.append, pre_frames=2, post_frames=100)
+        recorder.start()
+        _wait_until(lambda: recorder.frames > 2)
+        recorder.trigger()
+        _wait_until(lambda: recorder.frames > 5)
+        recorder.stop()
+    event, = events
+    assert len(event.pre) == 2
+    assert 0 < len(event.post) < 100
+    counts = _frame_counts(event)
+    assert counts == list(range(counts[0], counts[0] + len(counts)))
+    assert not recorder.recording
+
+
+def test_frame_metadata_is_read_with_the_image(monkeypatch):
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    events = []
+    with NikonCamera(0) as camera:
+        get_image = camera.get_image
+
+        def get_image_then_another(out=None):  # Another thread gets the next frame as soon as the lock is free
+            image = get_image(out)
+            get_image()
+            return image
+
+        monkeypatch.setattr(camera, "get_image", get_image_then_another)
+        with PreTriggerRecorder(camera, events.append, pre_frames=3, post_frames=0) as recorder:
+            _wait_until(lambda: len(recorder._live) == 3)
+            recorder.trigger()
+            _wait_until(lambda: events)
+    counts = _frame_counts(events[0])
+    assert counts == list(range(counts[0], counts[0] + 3))
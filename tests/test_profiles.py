@@ -0,0 +1,20 @@
+import fake_dscam
+
+from pynikonscicam import FeatureProfile, NikonCamera
+from pynikonscicam import constants as consts
+
+Fid = consts.ECamFeatureId
+
+
+def test_apply_profile_refreshes_cache_and_geometry():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        profile = FeatureProfile("half", {
+            Fid.Format: (consts.ECamFormatColor.ecfcRgb24, consts.ECamFormatSize.ecfsH1440x1024),
+            Fid.Gain: 400,
+        })
+        assert set(camera.apply_profile(profile)) == {Fid.Format, Fid.Gain}
+        assert camera.get_cached_feature_value(Fid.Gain) == 400
+        assert tuple(camera.image_shape) == (1024, 1440, 3)
+        assert camera.get_image().shape == (1024, 1440, 3)
+        assert camera.apply_profile(profile) == []
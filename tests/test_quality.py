@@ -0,0 +1,65 @@
+import csv
+
+import numpy as np
+import pytest
+
+from pynikonscicam.pipeline import Pipeline, Source, Stage
+from pynikonscicam.quality import FrameQC
+
+
+def test_statistics_of_8_bit_rgb():
+    image = np.zeros((64, 64, 3), np.uint8)
+    image[..., 0] = 10
+    image[..., 1] = 255
+    image[..., 2] = 100
+    stats = FrameQC(stride=4, bins=8).measure(image)
+    assert stats.channel_means == (10.0, 255.0, 100.0)
+    assert stats.mean == pytest.approx(365 / 3)
+    assert stats.saturated_fraction == pytest.approx(1 / 3)
+    assert stats.histogram.shape == (3, 8)
+    assert stats.histogram.sum(axis=1).tolist() == [256, 256, 256]  # 16 x 16 samples per channel
+    assert stats.histogram[0, 0] == stats.histogram[1, 7] == stats.histogram[2, 3] == 256
+
+
+def test_statistics_of_16_bit_mono_with_saturation_level():
+    image = np.full((32, 32), 1000, np.uint16)
+    image[:16] = 60000
+    stats = FrameQC(stride=1, bins=4, saturation=50000).measure(image, frame=7)
+    assert stats.frame == 7
+    assert stats.mean == pytest.approx(30500, abs=16)  # Within half a fine bin of 16 DN
+    assert stats.saturated_fraction == pytest.approx(0.5)
+    assert stats.histogram.tolist() == [[512, 0, 0, 512]]
+
+
+def test_records_are_not_changed_by_later_frames():
+    qc = FrameQC(stride=2, bins=4)
+    qc.measure(np.zeros((16, 16), np.uint8))
+    qc.measure(np.full((16, 16), 255, np.uint8))
+    assert qc.records[0].histogram.tolist() == [[64, 0, 0, 0]]
+    assert qc.records[1].histogram.tolist() == [[0, 0, 0, 64]]
+    assert [stats.frame for stats in qc.records] == [0, 1]
+
+
+def test_pipeline_stage_and_csv(tmp_path):
+    frames = iter([np.full((8, 8, 3), value, np.uint8) for value in (0, 50, 100)])
+    qc = FrameQC(stride=1, bins=2)
+    seen = []
+    Pipeline(Source(lambda: next(frames, None)), [Stage(qc), Stage(lambda image: seen.append(image[0, 0, 0]))]).run()
+    assert seen == [0, 50, 100]
+    assert [stats.mean for stats in qc.records] == [0.0, 50.0, 100.0]
+
+    path = tmp_path / "qc.csv"
+    qc.save_csv(path)
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0][:6] == ["frame", "mean", "mean_0", "mean_1", "mean_2", "saturated_fraction"]
+    assert len(rows) == 4 and len(rows[0]) == 6 + 3 * 2
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        FrameQC(bins=3)
+    with pytest.raises(ValueError):
+        FrameQC(stride=0)
+    with pytest.raises(ValueError, match="uint8 or uint16"):
+        FrameQC().measure(np.zeros((8, 8), np.float32))
@@ -0,0 +1,101 @@
+import time
+
+import fake_dscam
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam import structures as structs
+from pynikonscicam.recovery import RecoverySupervisor
+
+
+def test_outage_during_restart_is_not_dropped():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        supervisor = RecoverySupervisor(camera)
+        restart = supervisor._restart
+        restarts = []
+
+        def restart_with_outage(snapshot, reopen):
+            restart(snapshot, reopen)
+            if not restarts:  # A transfer error arrives while the first recovery is restarting transfer
+                supervisor._on_trans_error(None)
+            restarts.append(reopen)
+
+        supervisor._restart = restart_with_outage
+        supervisor._on_trans_error(None)
+        assert not supervisor.healthy
+
+        assert supervisor.recover("ecetTransError").success
+        assert not supervisor.healthy
+        assert supervisor._pending is not None
+
+        assert supervisor.recover("ecetTransError").success
+        assert supervisor.healthy
+        assert supervisor._pending is None
+        assert camera.get_image() is not None
+
+
+def test_reopen_reported_after_the_outage_is_claimed_is_kept():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        supervisor = RecoverySupervisor(camera, poll_interval=0.01)
+        reopens = []
+        restart = supervisor._restart
+        supervisor._restart = lambda snapshot, reopen: (reopens.append(reopen), restart(snapshot, reopen))
+        recover = supervisor.recover
+
+        def recover_after_failed_reset(*args):
+            if not reopens:  # The bus reset fails between _run claiming the outage and recover starting
+                supervisor._on_bus_reset(_bus_reset(consts.ECamEventBusResetCode.ecebrcFailed))
+            return recover(*args)
+
+        supervisor.recover = recover_after_failed_reset
+        supervisor.start()
+        try:
+            supervisor._on_trans_error(None)
+            assert _wait(lambda: supervisor.reports)
+            assert supervisor.wait_recovered(5)
+        finally:
+            supervisor.stop()
+        assert reopens[0] is True
+        assert len(supervisor.reports) == 1
+
+
+def test_failed_recovery_is_retried():
+    fake_dscam.install()
+    with NikonCamera(0) as camera:
+        supervisor = RecoverySupervisor(camera, recovery_timeout=0.05, retry_interval=0.01, poll_interval=0.01)
+        restart = supervisor._restart
+        failures = [RuntimeError("Camera unplugged")] * 12
+
+        def flaky_restart(snapshot, reopen):
+            if failures:
+                raise failures.pop()
+            restart(snapshot, reopen)
+
+        supervisor._restart = flaky_restart
+        supervisor.start()
+        try:
+            supervisor._on_trans_error(None)
+            assert supervisor.wait_recovered(5)
+        finally:
+            supervisor.stop()
+        assert not supervisor.reports[0].success
+        assert supervisor.reports[-1].success and supervisor.reports[-1].reopened
+        assert supervisor._pending is None
+
+
+def _bus_reset(code: consts.ECamEventBusResetCode) -> structs.CAM_Event:
+    event = structs.CAM_Event()
+    event.eEventType = consts.ECamEventType.ecetBusReset
+    event.stBusReset.eBusResetCode = code
+    return event
+
+
+def _wait(condition, timeout: float = 5.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
@@ -0,0 +1,54 @@
+import os
+
+import fake_dscam
+import pytest
+
+from pynikonscicam import structures as structs
+from pynikonscicam.frame_ring import SharedFrameRing
+from pynikonscicam.remote import RemoteNikonCamera
+
+
+def two_cameras() -> None:
+    fake_dscam.install(fake_dscam.FakeDsCam(device_count=2))
+
+
+def test_remote_camera_by_serial_number():
+    with RemoteNikonCamera(serial_number=1001, initializer=two_cameras, timeout=60) as camera:
+        assert camera.serial_number == 1001
+        assert camera.get_image().shape == tuple(camera.image_shape)
+        image, metadata = camera.get_image_with_metadata()
+        assert image.shape == tuple(camera.image_shape)
+        assert structs.CAM_ImageInfo.from_buffer_copy(metadata.info).uiSerialNo == 1001
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="Shared memory blocks are not listed as files")
+def test_close_removes_the_frame_ring():
+    for _ in range(3):
+        camera = RemoteNikonCamera(initializer=two_cameras, timeout=60)
+        camera.get_image()
+        ring_path = os.path.join("/dev/shm", camera._ring.name.lstrip("/"))
+        process = camera._process
+        assert os.path.exists(ring_path)
+        camera.close()
+        assert process.exitcode == 0  # Exited by itself rather than killed while removing the ring
+        assert not os.path.exists(ring_path)
+
+
+def test_get_image_requests_an_overwritten_frame_again(monkeypatch):
+    read = SharedFrameRing.read
+    misses = []
+
+    def overwritten_once(ring, sequence):
+        if not misses:
+            misses.append(sequence)
+            return None
+        return read(ring, sequence)
+
+    with RemoteNikonCamera(initializer=two_cameras, timeout=60) as camera:
+        monkeypatch.setattr(SharedFrameRing, "read", overwritten_once)
+        assert camera.get_image().shape == tuple(camera.image_shape)
+        assert len(misses) == 1
+
+        monkeypatch.setattr(SharedFrameRing, "read", lambda ring, sequence: None)
+        with pytest.raises(RuntimeError, match="overwritten"):
+            camera.get_image()
@@ -0,0 +1,5 @@
+import stress_thread_safety
+
+
+def test_stress_with_format_switches(capsys):
+    assert stress_thread_safety.main(["--duration", "1"]) == 0, capsys.readouterr().out
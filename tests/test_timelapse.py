@@ -0,0 +1,87 @@
+import time
+
+import fake_dscam
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam.timelapse import CATCH_UP, IDLE_CIS_OFF, SKIP, TimelapseFrame, TimelapseScheduler
+
+
+def _small_camera() -> NikonCamera:
+    camera = NikonCamera(0)
+    camera.set_feature_value(consts.ECamFeatureId.Format,
+                             (consts.ECamFormatColor.ecfcMono16, consts.ECamFormatSize.ecfsH1440x1024))
+    return camera
+
+
+def _slow_first_frame(frames: list[TimelapseFrame], delay: float):
+    def on_frame(frame: TimelapseFrame) -> None:
+        frames.append(frame)
+        if len(frames) == 1:
+            time.sleep(delay)
+    return on_frame
+
+
+def test_skip_drops_missed_slots():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    frames = []
+    with _small_camera() as camera:
+        # The first frame takes until 2.5 intervals, so slot 1 is missed and slot 2 is acquired late
+        scheduler = TimelapseScheduler(camera, 0.3, _slow_first_frame(frames, 0.75), count=4, policy=SKIP)
+        report = scheduler.run()
+    assert [frame.index for frame in frames] == [0, 2, 3]
+    assert report.frames == 3 and report.skipped == 1
+    assert 0.1 < frames[1].lateness < 0.3
+    assert report.max_lateness == frames[1].lateness
+    assert [frame.scheduled - frames[0].scheduled for frame in frames] == pytest.approx([0.0, 0.6, 0.9])
+
+
+def test_catch_up_acquires_missed_slots():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    frames = []
+    with _small_camera() as camera:
+        scheduler = TimelapseScheduler(camera, 0.3, _slow_first_frame(frames, 0.75), count=4, policy=CATCH_UP)
+        report = scheduler.run()
+    assert [frame.index for frame in frames] == [0, 1, 2, 3]
+    assert report.frames == 4 and report.skipped == 0
+    assert frames[1].lateness > 0.3  # Acquired straight away, a whole slot late
+    assert frames[3].lateness < 0.15  # Back on the grid
+
+
+def test_camera_idled_between_acquisitions():
+    sdk = fake_dscam.install(fake_dscam.FakeDsCam())
+    states = []
+    with _small_camera() as camera:
+        def on_frame(frame: TimelapseFrame) -> None:
+            states.append(camera.transfer_paused)
+
+        scheduler = TimelapseScheduler(camera, 0.3, on_frame, count=3, idle=IDLE_CIS_OFF, idle_threshold=0.1,
+                                       wake_lead=0.05)
+        scheduler.start()
+        time.sleep(0.15)  # Between slots 0 and 1
+        assert camera.transfer_paused
+        assert not sdk.cameras[0].transferring
+        assert sdk.cameras[0].value(consts.ECamFeatureId.CisPower) == 0
+        with pytest.raises(RuntimeError, match="paused"):
+            camera.get_image()
+        report = scheduler.join(5)
+        assert report.frames == 3
+        assert report.idle_cycles == 2
+        assert states == [False, False, False]
+        assert not camera.transfer_paused
+        assert sdk.cameras[0].value(consts.ECamFeatureId.CisPower) == 1
+        camera.get_image()
+
+
+def test_stop_while_idle_resumes_transfer():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with _small_camera() as camera:
+        scheduler = TimelapseScheduler(camera, 10.0, lambda frame: None, idle="stop_transfer", idle_threshold=1.0)
+        scheduler.start()
+        time.sleep(0.1)
+        assert camera.transfer_paused
+        report = scheduler.stop(5)
+        assert report.frames == 1 and report.idle_cycles == 1
+        assert not camera.transfer_paused
+        camera.get_image()
@@ -0,0 +1,102 @@
+import json
+
+import fake_dscam
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import methods as methods
+from pynikonscicam import tracing as tracing
+from pynikonscicam.error_codes import ErrorCodes
+
+
+def test_callback_sinks_and_proxy_lifetime():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    dll = methods.pDsCamDLL
+    with NikonCamera(0) as camera:
+        first_calls = []
+        second_calls = []
+        first = tracing.SdkTracer(lambda name, start, end, result: first_calls.append((name, end - start, result)))
+        second = tracing.SdkTracer(lambda name, start, end, result: second_calls.append(name))
+        with first:
+            assert first.enabled
+            assert methods.pDsCamDLL is not dll
+            camera.get_image()
+            with second:
+                camera.get_image()
+            assert not second.enabled
+            camera.get_image()
+        assert not first.enabled
+        assert methods.pDsCamDLL is dll
+        camera.get_image()
+
+    names = [name for name, _, _ in first_calls]
+    assert names.count("CAM_GetImage") == 3
+    assert second_calls.count("CAM_GetImage") == 1
+    assert all(duration >= 0 and result == ErrorCodes.OK for _, duration, result in first_calls)
+
+
+def test_sinks_added_while_enabled_and_call_arguments():
+    fake_dscam.install(fake_dscam.FakeDsCam(device_count=2))
+    with NikonCamera(0) as first, NikonCamera(1) as second:
+        handles = []
+
+        class HandleSink:
+            def __call__(self, name, start, end, result):
+                raise AssertionError("bind_args is used instead")
+
+            def bind_args(self, name):
+                def record(start, end, result, args):
+                    if name == "CAM_GetImage":
+                        handles.append(args[0])
+                return record
+
+        summary = tracing.SummarySink()
+        with tracing.SdkTracer(summary) as tracer:
+            first.get_image()
+            sink = HandleSink()
+            tracer.add_sink(sink)
+            second.get_image()
+            tracer.remove_sink(sink)
+            first.get_image()
+        assert handles == [second.camera_handle]
+        assert summary.summary()["CAM_GetImage"]["calls"] == 3
+
+
+def test_summary_sink_statistics():
+    summary = tracing.SummarySink(capacity=2)
+    assert repr(summary) == "SummarySink: no calls"
+    summary("CAM_Fast", 0, 1000, ErrorCodes.OK)
+    for duration in (10_000, 20_000, 30_000):
+        summary("CAM_Slow", 0, duration, ErrorCodes.OK)
+    summary("CAM_Slow", 0, 40_000, ErrorCodes.ERR_ABORT)
+    summary("CAM_Slow", 0, 40_000, 12345)
+
+    result = summary.summary(percentiles=(50.0,))
+    assert list(result) == ["CAM_Slow", "CAM_Fast"]  # Sorted by cumulative duration
+    slow = result["CAM_Slow"]
+    assert slow["calls"] == 5
+    assert slow["total_ms"] == pytest.approx(0.14)
+    assert slow["mean_us"] == pytest.approx(28.0)
+    assert slow["p50_us"] == pytest.approx(40.0)  # Only the latest two durations are kept
+    assert slow["errors"] == {"ERR_ABORT": 1, "12345": 1}
+    assert result["CAM_Fast"]["errors"] == {}
+    assert "CAM_Slow" in repr(summary)
+
+    summary.clear()
+    assert summary.summary() == {}
+
+
+def test_chrome_trace_sink_written_on_disable(tmp_path):
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    path = tmp_path / "trace.json"
+    with NikonCamera(0) as camera:
+        with tracing.SdkTracer(tracing.ChromeTraceSink(path, max_events=3)):
+            camera.get_image()
+            assert not path.exists()
+
+    with open(path) as file:
+        trace = json.load(file)
+    events = trace["traceEvents"]
+    assert len(events) == 3
+    assert all(event["ph"] == "X" and event["dur"] >= 0 and event["args"]["result"] == "OK" for event in events)
+    assert all(event["name"].startswith("CAM_") for event in events)
@@ -0,0 +1,73 @@
+import fake_dscam
+import pytest
+
+from pynikonscicam import NikonCamera
+from pynikonscicam import constants as consts
+from pynikonscicam import structures as structs
+from pynikonscicam.validation import FeatureValidator, RangeLimits
+
+Fid = consts.ECamFeatureId
+
+
+def _range_description(feature_id: Fid, minimum: int, maximum: int, resolution: int) -> structs.CAM_FeatureDesc:
+    description = structs.CAM_FeatureDesc()
+    description.uiFeatureId = feature_id
+    description.eFeatureDescType = consts.ECamFeatureDescType.edesc_Range
+    desc_range = description.FeatureDesc.stRange
+    var_type = consts.FeatureIDVarTypeMap[feature_id]
+    for variant, value in ((desc_range.stMin, minimum), (desc_range.stMax, maximum),
+                           (desc_range.stRes, resolution), (desc_range.stDef, minimum)):
+        fake_dscam._set_variant(variant, var_type, value)
+    return description
+
+
+def test_range_snap_and_clamp():
+    validator = FeatureValidator([_range_description(Fid.ExposureTime, 100, 1050, 100)])
+    assert validator.range(Fid.ExposureTime) == RangeLimits(100, 1050, 100, 100)
+    assert validator.range(Fid.Gain) is None
+    assert validator.validate(Fid.Gain, -1) == -1  # Not described
+
+    assert validator.validate(Fid.ExposureTime, 500) == 500
+    for value in (50, 1100, 450, 500.5):
+        with pytest.raises(ValueError):
+            validator.validate(Fid.ExposureTime, value)
+    assert validator.validate(Fid.ExposureTime, 449, snap=True) == 400
+    assert validator.validate(Fid.ExposureTime, 500.5, snap=True) == 500
+    assert validator.validate(Fid.ExposureTime, 50, clamp=True) == 100
+    assert validator.validate(Fid.ExposureTime, 5000, clamp=True) == 1000  # Largest value on the resolution grid
+    assert validator.validate(Fid.ExposureTime, 1049, clamp=True, snap=True) == 1000
+
+
+def test_camera_descriptions():
+    fake_dscam.install(fake_dscam.FakeDsCam())
+    with NikonCamera(0) as camera:
+        validator = camera.validator
+        assert validator.range(Fid.Gain) == RangeLimits(100, 6400, 1, 100)
+        assert validator.range(Fid.Format) is None
+
+        # Element and format lists
+        assert validator.validate(Fid.TriggerMode, consts.ECamTriggerMode.Soft) == consts.ECamTriggerMode.Soft
+        with pytest.raises(ValueError, match="Soft"):
+            validator.validate(Fid.TriggerMode, 99)
+        image_format = (consts.ECamFormatColor.ecfcMono16, consts.ECamFormatSize.ecfsH1440x1024)
+        assert validator.validate(Fid.Format, image_format) == consts.FormatFeature(*image_format)
+        with pytest.raises(ValueError, match=r"value 3/99 is not one of: .*ecfcMono16/"):
+            validator.validate(Fid.Format, (consts.ECamFormatColor.ecfcMono16, 99))
+
+        # Structured values are checked field by field
+        with pytest.raises(ValueError, match="RoiSize height"):
+            validator.validate(Fid.RoiSize, consts.SizeFeature(height=100, width=128))
+        assert validator.validate(Fid.RoiSize, consts.SizeFeature(height=100, width=128), snap=True) == \
+            consts.SizeFeature(height=96, width=128)
+        assert validator.validate(Fid.RoiSize, consts.SizeFeature(height=0, width=5000), clamp=True) == \
+            consts.SizeFeature(height=64, width=2880)
+        with pytest.raises(ValueError, match="TriggerOption frame_count"):
+            validator.validate(Fid.TriggerOption, consts.TriggerOptionFeature(delay_time=0, frame_count=0))
+        assert validator.validate(Fid.TriggerOption, (20_000_000, 5000), clamp=True) == \
+            consts.TriggerOptionFeature(delay_time=10_000_000, frame_count=1000)
+
+        # set_feature_value checks before calling the SDK
+        with pytest.raises(ValueError):
+            camera.set_feature_value(Fid.Gain, 50)
+        camera.set_feature_value(Fid.Gain, 50, clamp=True)
+        assert camera.get_feature_value(Fid.Gain) == 100